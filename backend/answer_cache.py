@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# (normalized major, intent, retrieved document IDs)
+AnswerKey = Tuple[str, str, FrozenSet[str]]
+
+
+@dataclass
+class _Entry:
+    key: AnswerKey
+    embedding: np.ndarray
+    reply: str
+    created: float
+
+
+class AnswerCache:
+    """Semantic cache of generated answers for repeated advising questions.
+
+    An answer is only reused when *both* hold:
+
+    - the new turn has the same normalized major, intent and set of retrieved
+      document IDs as the cached one (so the model would have seen the same
+      context), and
+    - the query embedding is a near-duplicate, i.e. cosine similarity is at
+      least `similarity_threshold`.
+
+    Entries expire after `ttl_seconds`, the cache holds at most `max_entries`
+    (least recently used are evicted first), and everything is dropped when
+    `index_version()` changes, i.e. after a re-ingest.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+        index_version: Optional[Callable[[], str]] = None,
+    ) -> None:
+        self._threshold = similarity_threshold
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._index_version = index_version or (lambda: "")
+        self._version = self._index_version()
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._by_key: Dict[AnswerKey, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(major: Optional[str], intent: str, doc_ids: Iterable[str]) -> AnswerKey:
+        return ((major or "").upper(), intent, frozenset(doc_ids))
+
+    @staticmethod
+    def _normalize(embedding: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(list(embedding), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _check_version(self) -> None:
+        version = self._index_version()
+        if version != self._version:
+            self._entries.clear()
+            self._by_key.clear()
+            self._version = version
+            self._invalidations += 1
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        ids = self._by_key.get(entry.key)
+        if ids is not None:
+            ids.remove(entry_id)
+            if not ids:
+                del self._by_key[entry.key]
+
+    def lookup(self, key: AnswerKey, query_embedding: Iterable[float]) -> Optional[str]:
+        """Return a cached reply for a near-duplicate question, if any."""
+
+        query = self._normalize(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            best_id: Optional[int] = None
+            best_sim = self._threshold
+            for entry_id in list(self._by_key.get(key, [])):
+                entry = self._entries[entry_id]
+                if now - entry.created > self._ttl:
+                    self._remove(entry_id)
+                    continue
+                sim = float(entry.embedding @ query)
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self._hits += 1
+            return self._entries[best_id].reply
+
+    def store(self, key: AnswerKey, query_embedding: Iterable[float], reply: str) -> None:
+        entry = _Entry(
+            key=key,
+            embedding=self._normalize(query_embedding),
+            reply=reply,
+            created=time.monotonic(),
+        )
+        with self._lock:
+            self._check_version()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._by_key.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "invalidations": self._invalidations,
+            }
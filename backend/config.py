@@ -17,6 +17,116 @@ class Settings(BaseSettings):
     # OpenRouter (primary chat LLM)
     openrouter_api_key: Optional[str] = Field(None, env="OPENROUTER_API_KEY")
     openrouter_model: str = Field("meta-llama/llama-3.1-8b-instruct:free", env="OPENROUTER_MODEL")
+    openrouter_base_url: str = Field("https://openrouter.ai/api/v1", env="OPENROUTER_BASE_URL")
+
+    # Shared OpenRouter HTTP connection pool (see backend/openrouter_client.py).
+    # HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`).
+    openrouter_http2: bool = Field(False, env="OPENROUTER_HTTP2")
+    openrouter_max_connections: int = Field(20, env="OPENROUTER_MAX_CONNECTIONS")
+    openrouter_max_keepalive: int = Field(10, env="OPENROUTER_MAX_KEEPALIVE")
+    openrouter_keepalive_expiry: float = Field(60.0, env="OPENROUTER_KEEPALIVE_EXPIRY")
+    openrouter_timeout: float = Field(30.0, env="OPENROUTER_TIMEOUT")
+    openrouter_connect_timeout: float = Field(5.0, env="OPENROUTER_CONNECT_TIMEOUT")
+
+    # Encoder running all-MiniLM-L6-v2 (see backend/rag/encoders.py): "torch"
+    # (sentence-transformers), "onnx" or "onnx-int8" (ONNX Runtime, from the
+    # export written by backend/scripts/export_onnx_encoder.py; default dir
+    # backend/.onnx/). 0 threads = ONNX Runtime's default.
+    embedding_backend: str = Field("torch", env="EMBEDDING_BACKEND")
+    embedding_onnx_dir: Optional[str] = Field(None, env="EMBEDDING_ONNX_DIR")
+    embedding_onnx_threads: int = Field(0, env="EMBEDDING_ONNX_THREADS")
+
+    # Local embedding cache (see backend/rag/embedding_cache.py)
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_dir: Optional[str] = Field(None, env="EMBEDDING_CACHE_DIR")
+    embedding_cache_max_items: int = Field(4096, env="EMBEDDING_CACHE_MAX_ITEMS")
+
+    # Thread pool for blocking embedding / vector store calls (see backend/rag/executor.py).
+    # Workers default to min(8, CPU count) when unset.
+    rag_executor_workers: Optional[int] = Field(None, env="RAG_EXECUTOR_WORKERS")
+    rag_executor_max_pending: int = Field(64, env="RAG_EXECUTOR_MAX_PENDING")
+
+    # Micro-batching of concurrent embed_query calls (see backend/rag/batcher.py)
+    query_batching_enabled: bool = Field(True, env="QUERY_BATCHING_ENABLED")
+    query_batch_max_size: int = Field(16, env="QUERY_BATCH_MAX_SIZE")
+    query_batch_max_wait_ms: float = Field(2.0, env="QUERY_BATCH_MAX_WAIT_MS")
+
+    # Intent classification: "local" tries the embedding classifier first and
+    # only calls the LLM below the threshold; "llm" always calls the LLM.
+    intent_classifier: str = Field("local", env="INTENT_CLASSIFIER")
+    intent_confidence_threshold: float = Field(0.6, env="INTENT_CONFIDENCE_THRESHOLD")
+
+    # Worker processes for PDF page extraction during ingestion (default: CPU count)
+    ingest_pdf_workers: Optional[int] = Field(None, env="INGEST_PDF_WORKERS")
+
+    # Streaming ingestion: documents per embed/write batch, and how many
+    # batches may wait between pipeline stages
+    ingest_batch_size: int = Field(64, env="INGEST_BATCH_SIZE")
+    ingest_queue_size: int = Field(2, env="INGEST_QUEUE_SIZE")
+
+    # Vector index: "chroma" (persistent HNSW collection) or "numpy" (exact
+    # search over a memory-mapped matrix); re-run ingestion after switching
+    vector_store_backend: str = Field("chroma", env="VECTOR_STORE_BACKEND")
+    # Storage precision of the numpy backend: "float32", "float16" or "int8"
+    # (int8 with a per-vector scale); see backend/rag/quantization.py
+    vector_store_dtype: str = Field("float32", env="VECTOR_STORE_DTYPE")
+
+    # Retrieval ranking: "vector" (embeddings only), "bm25" (lexical only) or
+    # "hybrid" (both, fused with reciprocal rank fusion). Hybrid is opt-in:
+    # it fetches 4x the rows per vector query and builds a BM25 index.
+    retrieval_mode: str = Field("vector", env="RETRIEVAL_MODE")
+    retrieval_rrf_k: int = Field(60, env="RETRIEVAL_RRF_K")
+
+    # Most catalog courses (mentioned in the question or listed in the
+    # profile) pinned into a turn's context without a vector query
+    catalog_max_pinned: int = Field(6, env="CATALOG_MAX_PINNED")
+
+    # Retrieved excerpts kept when the prerequisite analysis is used as
+    # context for sequencing questions
+    planning_max_excerpts: int = Field(2, env="PLANNING_MAX_EXCERPTS")
+
+    # Token budget of the answer prompt (see backend/rag/prompt_packer.py):
+    # near-duplicate excerpts are removed, then the profile, excerpts,
+    # few-shot examples and history are kept in that order while they fit.
+    # 0 disables packing.
+    prompt_token_budget: int = Field(3000, env="PROMPT_TOKEN_BUDGET")
+    # Cosine similarity at which an excerpt counts as a duplicate of a
+    # higher-ranked one, and the MMR relevance/diversity trade-off
+    prompt_dedup_threshold: float = Field(0.9, env="PROMPT_DEDUP_THRESHOLD")
+    prompt_mmr_lambda: float = Field(0.7, env="PROMPT_MMR_LAMBDA")
+
+    # Semantic answer cache in front of generate_answer (see backend/answer_cache.py)
+    answer_cache_enabled: bool = Field(True, env="ANSWER_CACHE_ENABLED")
+    answer_cache_similarity: float = Field(0.95, env="ANSWER_CACHE_SIMILARITY")
+    answer_cache_ttl_seconds: float = Field(3600.0, env="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries: int = Field(1024, env="ANSWER_CACHE_MAX_ENTRIES")
+
+    # Server-side conversation sessions (see backend/session_store.py).
+    # SESSION_DB is a SQLite file that keeps sessions across restarts;
+    # empty = memory only. Once a session holds SESSION_KEEP_MESSAGES +
+    # SESSION_SUMMARY_BATCH unsummarized messages, all but the newest
+    # SESSION_KEEP_MESSAGES are folded into its summary in the background.
+    sessions_enabled: bool = Field(True, env="SESSIONS_ENABLED")
+    session_db: Optional[str] = Field(None, env="SESSION_DB")
+    session_max_in_memory: int = Field(1000, env="SESSION_MAX_IN_MEMORY")
+    session_ttl_seconds: float = Field(7 * 24 * 3600.0, env="SESSION_TTL_SECONDS")
+    session_keep_messages: int = Field(6, env="SESSION_KEEP_MESSAGES")
+    session_summary_batch: int = Field(2, env="SESSION_SUMMARY_BATCH")
+
+    # Load the embedding model and index in the background at startup and
+    # run a few warmup queries (see backend/startup.py); /ready reports when
+    # done. False = load lazily on the first request, and ready at once.
+    startup_warmup: bool = Field(True, env="STARTUP_WARMUP")
+    # After a failed warmup, the next request (or /ready) at least this long
+    # after the failure starts it again.
+    startup_retry_seconds: float = Field(30.0, env="STARTUP_RETRY_SECONDS")
+
+    # Prometheus metrics on GET /metrics (see backend/metrics.py); needs
+    # prometheus_client
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    # Per-stage breakdown in each chat response's `metadata.timings_ms`
+    # (debug requests always get it)
+    response_timings: bool = Field(False, env="RESPONSE_TIMINGS")
 
     class Config:
         # Resolve .env relative to this file so uvicorn CWD doesn't matter
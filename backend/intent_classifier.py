@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .models import IntentResult
+from .rag.embeddings import EmbeddingBackend
+
+
+# Labeled example questions per intent. Each label's centroid is the mean of
+# its normalized example embeddings; add examples here when a class of
+# question is routinely misclassified.
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "major_requirements": [
+        "What are the ECE core courses?",
+        "Which courses do I need to graduate as a BME major?",
+        "How many technical electives does Mechanical Engineering require?",
+        "Does CEE require a senior design capstone?",
+        "What math classes count toward the engineering degree requirements?",
+        "Do I need a natural science elective for my major?",
+        "Which ECE electives satisfy the design requirement?",
+        "How many credits are required for a Pratt degree?",
+    ],
+    "prerequisites_sequencing": [
+        "What are the prerequisites for ECE 280L?",
+        "Can I take BME 354L before BME 244L?",
+        "What should I take next semester after EGR 201L?",
+        "Which order should I take MATH 353 and ME 331L in?",
+        "Am I eligible for CEE 429 if I finished CEE 421L?",
+        "Is ECE 350L offered in the fall or the spring?",
+        "Can I take ME 344L and ME 431L in the same semester?",
+        "Plan my courses for the next four semesters.",
+    ],
+    "study_abroad_transfer": [
+        "Can I study abroad junior year as an ECE major?",
+        "Will courses taken abroad count toward my BME requirements?",
+        "How do I transfer credit from a summer course at another university?",
+        "Does AP credit count for MATH 212?",
+        "How do I get a study away course pre-approved?",
+        "Can I take a required course at a community college over the summer?",
+        "Which semester is best to go abroad for Mechanical Engineering?",
+        "Do transfer credits count toward my GPA?",
+    ],
+    "overload_registration": [
+        "Can I take six courses next semester?",
+        "How do I request a course overload?",
+        "What GPA do I need to take more than 5.5 credits?",
+        "Can first-year students overload?",
+        "Is there an extra charge for taking an overload?",
+        "How do I register for a class that is full?",
+        "Can I drop below four courses and stay full time?",
+        "When does registration open for next semester?",
+    ],
+    "other": [
+        "Hi, who are you?",
+        "Thanks for the help!",
+        "Where is the Pratt advising office?",
+        "How do I contact my academic dean?",
+        "What research opportunities are there for undergraduates?",
+        "Are there engineering clubs I can join?",
+        "How do I find an internship for the summer?",
+        "What is the weather like at Duke?",
+    ],
+}
+
+
+class LocalIntentClassifier:
+    """Nearest-centroid intent classifier over the shared embedding model.
+
+    Each label is represented by the normalized mean of its example question
+    embeddings. A question is assigned to the closest centroid by cosine
+    similarity, and `confidence` is that label's softmax probability over
+    similarities scaled by `1 / temperature` — a real probability rather than
+    a fixed constant, so callers can threshold on it.
+    """
+
+    def __init__(
+        self,
+        embedding_backend: EmbeddingBackend,
+        examples: Optional[Dict[str, List[str]]] = None,
+        temperature: float = 0.05,
+    ) -> None:
+        self._embeddings = embedding_backend
+        self._examples = examples or INTENT_EXAMPLES
+        self._temperature = temperature
+        self._labels: List[str] = list(self._examples)
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_centroids(self) -> np.ndarray:
+        if self._centroids is not None:
+            return self._centroids
+        async with self._lock:
+            if self._centroids is None:
+                centroids = []
+                for label in self._labels:
+                    vectors = np.asarray(
+                        await self._embeddings.embed_documents(self._examples[label]),
+                        dtype=np.float32,
+                    )
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                    centroid = vectors.mean(axis=0)
+                    centroids.append(centroid / np.linalg.norm(centroid))
+                self._centroids = np.stack(centroids)
+        return self._centroids
+
+    async def warmup(self) -> None:
+        await self._ensure_centroids()
+
+    async def classify(self, question: str, embedding: Optional[Sequence[float]] = None) -> IntentResult:
+        """Classify `question`, or its already computed `embedding` if given.
+
+        The chat pipeline passes the turn's (profile-aware) query embedding,
+        so classification costs no extra forward pass.
+        """
+
+        centroids = await self._ensure_centroids()
+        if embedding is None:
+            embedding = await self._embeddings.embed_query(question)
+        query = np.array(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        sims = centroids @ query
+        logits = (sims - sims.max()) / self._temperature
+        probs = np.exp(logits) / np.exp(logits).sum()
+        best = int(np.argmax(probs))
+
+        confidence = float(probs[best])
+        if not math.isfinite(confidence):
+            confidence = 0.0
+        return IntentResult(intent=self._labels[best], confidence=confidence, source="local")
@@ -1,33 +1,245 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import importlib.util
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
+from .answer_cache import AnswerCache
 from .config import get_settings
-from .models import ChatRequest, ChatResponse, SourceChunk
+from .intent_classifier import LocalIntentClassifier
+from .metrics import HAS_PROMETHEUS, MetricsMiddleware, register_callback
+from .models import (
+    BatchRetrieveRequest,
+    BatchRetrieveResponse,
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    RetrieveResult,
+    SessionCreated,
+)
 from .openrouter_client import OpenRouterClient
 from .rag_pipeline import (
-    classify_intent,
-    generate_answer,
+    docs_to_sources,
+    document_chunks,
     retrieve_context,
-    retrieve_fewshot_examples,
+    run_chat_pipeline,
+    shape_response,
+    stream_chat_pipeline,
+    summarize_conversation,
 )
 from .rag.embeddings import EmbeddingBackend
-from .rag.vector_store import VectorStore
-from .rag.retriever import Retriever
+from .rag.catalog import CourseCatalog
+from .rag.executor import get_stage_executor
+from .rag.ingest import load_course_documents
+from .rag.prereqs import PrereqGraph
+from .rag.prompt_packer import PromptPacker, TokenCounter
+from .rag.vector_store import create_vector_store
+from .session_store import SessionStore, SessionSummarizer, UnknownSessionError
+from .startup import Readiness, warm_up
+from .rag.retriever import RetrievalRequest, Retriever
+from .rag.schema import Document
+from .retrieval.simple_retriever import BM25Index
+
+
+# Process-wide OpenRouter client; it owns a pooled keep-alive HTTP client.
+_llm_client: Optional[OpenRouterClient] = None
+
+
+# Startup progress for /ready; replaced each time warmup (re)starts.
+_readiness = Readiness()
+_warmup_task: Optional["asyncio.Task[None]"] = None
+
+
+def _start_warmup() -> None:
+    global _readiness, _warmup_task
+    _readiness = Readiness()
+    _warmup_task = asyncio.create_task(
+        warm_up(
+            _readiness,
+            _embedding_backend,
+            _vector_store,
+            _retriever,
+            intent_classifier=_intent_classifier if get_settings().intent_classifier == "local" else None,
+            load_catalog=_load_course_data,
+        )
+    )
+
+
+def _warmup_error() -> Optional[str]:
+    """The error of a failed warmup, or None.
+
+    Once `startup_retry_seconds` have passed since the failure, warmup is
+    started again (the status goes back to "starting"); the caller still
+    reports this failure.
+    """
+
+    if not _readiness.failed:
+        return None
+    error = _readiness.error
+    if time.monotonic() - (_readiness.failed_at or 0.0) >= get_settings().startup_retry_seconds:
+        _start_warmup()
+    return error
+
 
-app = FastAPI(title="Duke Pratt Degree & Course Planning Chatbot API")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    global _readiness, _warmup_task
+    if get_settings().openrouter_api_key:
+        # Open the connection pool up front rather than on the first request.
+        _get_llm_client()
+    if get_settings().startup_warmup:
+        # The server starts accepting requests right away; chat requests get
+        # `_warming_up_response` until the model and index are loaded.
+        _start_warmup()
+    else:
+        _readiness = Readiness()
+        _readiness.mark_ready()
+    yield
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+        await asyncio.gather(_warmup_task, return_exceptions=True)
+    _warmup_task = None
+    if _session_summarizer is not None:
+        # Unfinished summaries are redone after the next turn.
+        await _session_summarizer.aclose()
+    if _session_store is not None:
+        _session_store.close()
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
+    # Let in-flight embedding / Chroma calls finish before the process exits.
+    # The executor is process-wide; it starts new threads if the app is
+    # started again in this process.
+    get_stage_executor().shutdown(wait=True)
+
+
+# orjson is optional (`pip install orjson`): it serializes responses several
+# times faster than the stdlib encoder, which is the fallback.
+_HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+app = FastAPI(
+    title="Duke Pratt Degree & Course Planning Chatbot API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if _HAS_ORJSON else JSONResponse,
+)
 
 
 # Global RAG components initialised at startup. These are lightweight wrappers
-# around a persistent Chroma index built by backend/rag/ingest.py.
+# around a persistent vector index built by backend/rag/ingest.py; the
+# embedding model, the index and the course CSVs are only loaded on first use
+# (or by the lifespan warmup), so importing this module stays fast.
 _embedding_backend = EmbeddingBackend()
-_vector_store = VectorStore(
-    persist_dir=Path(__file__).resolve().parent / ".chroma",
+_PERSIST_DIR = Path(__file__).resolve().parent / ".chroma"
+_vector_store = create_vector_store(
+    get_settings().vector_store_backend,
+    _PERSIST_DIR,
+    dtype=get_settings().vector_store_dtype,
+)
+_retriever = Retriever(
+    store=_vector_store,
+    embedding_backend=_embedding_backend,
+    mode=get_settings().retrieval_mode,
+    rrf_k=get_settings().retrieval_rrf_k,
+)
+_intent_classifier = LocalIntentClassifier(_embedding_backend)
+# Course rows by normalized code, for direct lookups of mentioned courses;
+# the prerequisite DAG; and BM25 over the course rows, for requests that
+# arrive before warmup is done (no embedding model or vector index needed).
+# Set by `_load_course_data`, the first warmup step.
+_course_catalog: Optional[CourseCatalog] = None
+_prereq_graph: Optional[PrereqGraph] = None
+_course_index: Optional[BM25Index] = None
+_course_data_lock = threading.Lock()
+
+
+def _load_course_data() -> None:
+    """Read the course CSVs (blocking; runs on the stage executor, once)."""
+
+    global _course_catalog, _prereq_graph, _course_index
+    with _course_data_lock:
+        if _course_catalog is not None:
+            return
+        docs = load_course_documents()
+        # Written by ingestion; rebuilt from the CSVs if missing.
+        _prereq_graph = PrereqGraph.load(_PERSIST_DIR) or PrereqGraph.from_documents(docs)
+        _course_index = BM25Index(docs)
+        _course_catalog = CourseCatalog(docs)
+
+
+async def _ensure_course_data() -> None:
+    # Already loaded by warmup, unless STARTUP_WARMUP=false.
+    if _course_catalog is None:
+        await get_stage_executor().run(_load_course_data)
+
+
+def _build_answer_cache() -> Optional[AnswerCache]:
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    return AnswerCache(
+        similarity_threshold=settings.answer_cache_similarity,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_entries=settings.answer_cache_max_entries,
+        # Re-ingesting the index bumps this marker and empties the cache.
+        index_version=_vector_store.index_version,
+    )
+
+
+_answer_cache = _build_answer_cache()
+
+
+def _build_prompt_packer() -> Optional[PromptPacker]:
+    settings = get_settings()
+    if settings.prompt_token_budget <= 0:
+        return None
+    return PromptPacker(
+        # The tokenizer is fetched on the first count, once the model is loaded.
+        TokenCounter(tokenizer_factory=lambda: _embedding_backend.tokenizer),
+        budget=settings.prompt_token_budget,
+        embedding_backend=_embedding_backend,
+        duplicate_threshold=settings.prompt_dedup_threshold,
+        mmr_lambda=settings.prompt_mmr_lambda,
+    )
+
+
+_prompt_packer = _build_prompt_packer()
+
+
+def _build_session_store() -> Optional[SessionStore]:
+    settings = get_settings()
+    if not settings.sessions_enabled:
+        return None
+    # A relative SESSION_DB is resolved against backend/, like .env.
+    path = Path(__file__).resolve().parent / settings.session_db if settings.session_db else None
+    return SessionStore(path, max_sessions=settings.session_max_in_memory, ttl_seconds=settings.session_ttl_seconds)
+
+
+async def _summarize_session(summary: str, messages: List[ChatMessage]) -> str:
+    return await summarize_conversation(_get_llm_client(), summary, messages)
+
+
+_session_store = _build_session_store()
+_session_summarizer = (
+    SessionSummarizer(
+        _session_store,
+        _summarize_session,
+        keep_messages=get_settings().session_keep_messages,
+        batch_messages=get_settings().session_summary_batch,
+    )
+    if _session_store is not None
+    else None
 )
-_retriever = Retriever(store=_vector_store, embedding_backend=_embedding_backend)
 
 # Serve raw context documents (CSVs, PDFs) so the frontend can
 # open a "View source" link for retrieved chunks.
@@ -38,6 +250,58 @@ app.mount(
     name="context-docs",
 )
 
+
+def _register_metrics() -> None:
+    """Export cache, executor and session counters, read at scrape time."""
+
+    def cache_lookups() -> Dict[Any, float]:
+        values: Dict[Any, float] = {}
+        if _answer_cache is not None:
+            stats = _answer_cache.stats()
+            values[("answer", "hit")] = stats["hits"]
+            values[("answer", "miss")] = stats["misses"]
+        stats = _embedding_backend.cache_stats()
+        if stats:
+            values[("embedding", "hit")] = stats["hits_memory"] + stats["hits_disk"]
+            values[("embedding", "miss")] = stats["misses"]
+        return values
+
+    def executor_stats() -> Dict[Any, float]:
+        stats = get_stage_executor().stats()
+        return {("queued",): stats["queue_depth"], ("running",): stats["running"]}
+
+    def startup() -> Dict[Any, float]:
+        return {(step,): seconds for step, seconds in _readiness.steps_s.items()}
+
+    def sessions() -> Dict[Any, float]:
+        return {(): _session_store.stats()["sessions_in_memory"]} if _session_store is not None else {}
+
+    register_callback(
+        "rag_cache_lookups_total",
+        "Answer and embedding cache lookups by result.",
+        "counter",
+        ["cache", "result"],
+        cache_lookups,
+    )
+    register_callback(
+        "rag_stage_executor_tasks",
+        "Blocking embedding / vector store calls waiting for or running on the stage executor.",
+        "gauge",
+        ["state"],
+        executor_stats,
+    )
+    register_callback(
+        "app_ready", "1 once startup warmup has finished.", "gauge", [], lambda: {(): float(_readiness.ready)}
+    )
+    register_callback("app_startup_step_seconds", "Duration of each startup warmup step.", "gauge", ["step"], startup)
+    register_callback("chat_sessions_in_memory", "Conversation sessions held in memory.", "gauge", [], sessions)
+
+
+if get_settings().metrics_enabled and HAS_PROMETHEUS:
+    _register_metrics()
+    # Runs inside CORS: preflight requests answered by CORS are not counted.
+    app.add_middleware(MetricsMiddleware)
+
 # CORS so the Vite dev server (and later production frontend) can call this API.
 app.add_middleware(
     CORSMiddleware,
@@ -51,118 +315,326 @@ app.add_middleware(
 
 
 def _get_llm_client() -> OpenRouterClient:
-    """Construct an OpenRouter client using environment-based settings."""
+    """Return the shared OpenRouter client, creating it on first use."""
 
     # OpenRouterClient itself pulls from get_settings(), and will raise a
     # clear error if the key is truly missing. The chat endpoint performs a
     # separate guard using get_settings() as well.
-    return OpenRouterClient()
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = OpenRouterClient()
+    return _llm_client
 
 
 @app.get("/health")
 async def health_check() -> dict:
-    return {"status": "ok"}
+    # Executor stats are cheap counters; they show whether the blocking
+    # embedding / Chroma stages are backing up under load.
+    return {"status": "ok", "executor": get_stage_executor().stats()}
+
+
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: 200 once the model and index are loaded and warm.
+
+    Unlike `/health` (liveness), this returns 503 while startup warmup is
+    still running or if it failed, with the per-step load times.
+    """
 
+    body = {
+        **_readiness.snapshot(),
+        "model_loaded": _embedding_backend.loaded,
+        "index_open": _vector_store.loaded,
+    }
+    # Polling /ready also retries a failed warmup (see `_warmup_error`).
+    _warmup_error()
+    return JSONResponse(body, status_code=200 if body["status"] == "ready" else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint (text exposition format)."""
+
+    if not get_settings().metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    if not HAS_PROMETHEUS:
+        raise HTTPException(status_code=404, detail="Metrics need prometheus_client (pip install prometheus-client)")
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+    return PlainTextResponse(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+_PLACEHOLDER_REPLY = (
+    "This is a placeholder backend response. No OpenRouter API key is "
+    "configured yet, so I am not calling a real model. "
+    "Once credentials are added, I will use Pratt handbook "
+    "context and a GPT-style model to answer more precisely."
+)
 
-@app.post("/api/chat", response_model=ChatResponse, tags=["chat"])
+
+async def _placeholder_response(request: ChatRequest) -> ChatResponse:
+    await _ensure_course_data()
+    assert _course_catalog is not None
+    pinned = _course_catalog.pinned_for(
+        request.message, request.prattProfile, limit=get_settings().catalog_max_pinned
+    )
+    docs = await retrieve_context(
+        retriever=_retriever,
+        question=request.message,
+        pratt_profile=request.prattProfile,
+        intent="other",
+        k=3,
+    )
+    pinned_ids = {d.id for d in pinned}
+    docs = pinned + [d for d in docs if d.id not in pinned_ids]
+    response = ChatResponse(
+        reply=_PLACEHOLDER_REPLY,
+        retrieved_chunks=document_chunks(docs),
+        metadata={
+            "intent": "other",
+            "intent_confidence": 0.0,
+            "using_model": False,
+            "pinned_courses": [d.code for d in pinned if d.code],
+        },
+    )
+    return shape_response(response, docs, request.verbosity)
+
+
+_WARMING_UP_REPLY = (
+    "The assistant is still starting up (loading the embedding model and "
+    "course index), so this is a quick catalog lookup rather than a full "
+    "answer. Please ask again in a few seconds."
+)
+
+
+async def _warming_up_response(request: ChatRequest) -> ChatResponse:
+    # Only what warmup has loaded so far: no sources at all in the first
+    # moments, before the course CSVs are read.
+    catalog, index = _course_catalog, _course_index
+    pinned: List[Document] = []
+    hits: List[Document] = []
+    if catalog is not None and index is not None:
+        pinned = catalog.pinned_for(request.message, request.prattProfile, limit=get_settings().catalog_max_pinned)
+        pinned_ids = {d.id for d in pinned}
+        hits = [doc for doc, _ in index.search(request.message, k=3) if doc.id not in pinned_ids]
+    docs = pinned + hits
+    response = ChatResponse(
+        reply=_WARMING_UP_REPLY,
+        retrieved_chunks=document_chunks(docs),
+        metadata={
+            "intent": "other",
+            "intent_confidence": 0.0,
+            "using_model": False,
+            "warming_up": True,
+            "pinned_courses": [d.code for d in pinned if d.code],
+        },
+    )
+    return shape_response(response, docs, request.verbosity)
+
+
+def _raise_if_warmup_failed() -> None:
+    # A failed warmup is an error, not "still starting": answering from the
+    # catalog forever would hide it.
+    error = _warmup_error()
+    if error is not None:
+        raise HTTPException(status_code=500, detail=f"Startup failed: {error}")
+
+
+def _raise_if_unknown_session(request: ChatRequest) -> None:
+    """Reject a `conversationId` this server did not issue (or that expired)."""
+
+    if not request.conversationId:
+        return
+    if _session_store is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Server-side sessions are disabled (SESSIONS_ENABLED=false); send `history` instead.",
+        )
+    if _session_store.get(request.conversationId) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation session.")
+
+
+def _pipeline_kwargs() -> Dict[str, Any]:
+    settings = get_settings()
+    return {
+        "k": 5,
+        "fewshot_k": 2,
+        "intent_classifier": _intent_classifier if settings.intent_classifier == "local" else None,
+        "intent_threshold": settings.intent_confidence_threshold,
+        "answer_cache": _answer_cache,
+        "catalog": _course_catalog,
+        "max_pinned": settings.catalog_max_pinned,
+        "prereq_graph": _prereq_graph,
+        "planning_max_excerpts": settings.planning_max_excerpts,
+        "packer": _prompt_packer,
+        "sessions": _session_store,
+        "summarizer": _session_summarizer,
+        "response_timings": settings.response_timings,
+    }
+
+
+@app.post("/api/chat", response_model=ChatResponse, response_model_exclude_none=True, tags=["chat"])
 async def chat_endpoint(request: ChatRequest) -> ChatResponse:
     """Main chat endpoint consumed by the React frontend.
 
-    Pipeline:
-      1. Classify intent from the latest user message.
-      2. Retrieve a small set of handbook-like chunks.
+    `request.verbosity` controls the payload size: "minimal", "standard"
+    (default) or "debug" (adds the prompt chunks and messages).
+
+    Pipeline (see `rag_pipeline.run_chat_pipeline`):
+      1. Classify intent from the latest user message while embedding the
+         question and speculatively retrieving context / few-shot examples.
+      2. Narrow the retrieved chunks to the intent's document types.
       3. Call the LLM with a RAG-style prompt.
     """
 
     if not request.message.strip():
         raise HTTPException(status_code=400, detail="Message must not be empty.")
+    _raise_if_unknown_session(request)
+
+    _raise_if_warmup_failed()
+    if not _readiness.ready:
+        return await _warming_up_response(request)
 
     # If no OpenRouter key is configured, return a deterministic placeholder
     # response so the frontend can still exercise the full request/response
     # flow without any external dependencies.
     current_settings = get_settings()
     if not current_settings.openrouter_api_key:
-        docs = await retrieve_context(
-            retriever=_retriever,
-            question=request.message,
-            pratt_profile=request.prattProfile,
-            intent="other",
-            k=3,
-        )
-        retrieved_chunks = [d.text for d in docs]
-        sources: list[SourceChunk] = []
-        for d in docs:
-            meta = d.metadata or {}
-            sources.append(
-                SourceChunk(
-                    text=d.text,
-                    source_file=meta.get("source_file"),
-                    page=meta.get("page"),
-                    chunk_index=meta.get("chunk_index"),
-                    type=meta.get("type"),
-                )
-            )
-        return ChatResponse(
-            reply=(
-                "This is a placeholder backend response. No OpenRouter API key is "
-                "configured yet, so I am not calling a real model. "
-                "Once credentials are added, I will use Pratt handbook "
-                "context and a GPT-style model to answer more precisely."
-            ),
-            retrieved_chunks=retrieved_chunks,
-            sources=sources,
-            metadata={"intent": "other", "intent_confidence": 0.0, "using_model": False},
-        )
+        return await _placeholder_response(request)
 
     llm = _get_llm_client()
+    await _ensure_course_data()
 
     try:
-        intent_result = await classify_intent(llm, request.message)
-        docs = await retrieve_context(
-            retriever=_retriever,
-            question=request.message,
-            pratt_profile=request.prattProfile,
-            intent=intent_result.intent,
-            k=5,
-        )
-        retrieved_chunks = [d.text for d in docs]
-        sources: list[SourceChunk] = []
-        for d in docs:
-            meta = d.metadata or {}
-            sources.append(
-                SourceChunk(
-                    text=d.text,
-                    source_file=meta.get("source_file"),
-                    page=meta.get("page"),
-                    chunk_index=meta.get("chunk_index"),
-                    type=meta.get("type"),
-                )
-            )
-
-        fewshot_docs = await retrieve_fewshot_examples(
-            retriever=_retriever,
-            question=request.message,
-            pratt_profile=request.prattProfile,
-            k=2,
-        )
-        # Expose few-shot example texts alongside main context so the
-        # frontend can optionally display them for debugging/demo.
-        fewshot_chunks = [d.text for d in fewshot_docs]
-        response = await generate_answer(
-            llm,
-            request,
-            retrieved_chunks,
-            intent=intent_result.intent,
-            fewshot_chunks=fewshot_chunks,
-        )
-        response.sources = sources
-        if fewshot_chunks:
-            # Hard-cap what we expose so the frontend dropdown only
-            # shows the top 2 few-shot examples actually used.
-            response.metadata.setdefault("fewshot_chunks", fewshot_chunks[:2])
-        # Attach more metadata if needed
-        response.metadata.setdefault("intent_confidence", intent_result.confidence)
-        response.metadata.setdefault("using_model", True)
-        return response
+        return await run_chat_pipeline(llm, _retriever, request, **_pipeline_kwargs())
+    except UnknownSessionError:
+        # Deleted or expired after the check above.
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation session.")
     except Exception as exc:  # pragma: no cover - generic safety net
         raise HTTPException(status_code=500, detail=f"Chat pipeline failed: {exc}")
+
+
+@app.post("/api/sessions", status_code=201, response_model=SessionCreated, tags=["chat"])
+async def create_session() -> SessionCreated:
+    """Start a server-side conversation session.
+
+    The returned `conversationId` is random and unguessable; chat requests
+    send it instead of the full `history`. 404 when sessions are disabled,
+    in which case clients keep sending `history`.
+    """
+
+    if _session_store is None:
+        raise HTTPException(status_code=404, detail="Server-side sessions are disabled.")
+    return SessionCreated(conversationId=_session_store.create())
+
+
+@app.delete("/api/sessions/{conversation_id}", status_code=204, response_class=Response, tags=["chat"])
+async def delete_session(conversation_id: str) -> Response:
+    """Forget a server-side conversation session (history and summary).
+
+    Only the holder of the issued ID can name the session, so the ID is the
+    credential; unknown IDs are a 404.
+    """
+
+    if _session_store is None or _session_store.get(conversation_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired conversation session.")
+    _session_store.delete(conversation_id)
+    return Response(status_code=204)
+
+
+@app.post("/api/retrieve/batch", response_model=BatchRetrieveResponse, tags=["retrieval"])
+async def retrieve_batch_endpoint(request: BatchRetrieveRequest) -> BatchRetrieveResponse:
+    """Retrieve context for many questions in one call (bulk advising).
+
+    No LLM is involved. All questions go through `Retriever.retrieve_many`,
+    so questions sharing a major/intent filter share one vector query.
+    """
+
+    if any(not q.message.strip() for q in request.queries):
+        raise HTTPException(status_code=400, detail="Messages must not be empty.")
+    _raise_if_warmup_failed()
+    if not _readiness.ready:
+        raise HTTPException(status_code=503, detail="The index is still loading.", headers={"Retry-After": "5"})
+
+    found = await _retriever.retrieve_many(
+        [
+            RetrievalRequest(question=q.message, pratt_profile=q.prattProfile, intent=q.intent, k=q.k)
+            for q in request.queries
+        ]
+    )
+    return BatchRetrieveResponse(
+        results=[
+            RetrieveResult(retrieved_chunks=document_chunks(docs), sources=docs_to_sources(docs))
+            for docs in found
+        ]
+    )
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    if _HAS_ORJSON:
+        import orjson
+
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {_dumps(data)}\n\n"
+
+
+@app.post("/api/chat/stream", tags=["chat"])
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """Streaming variant of `/api/chat` using Server-Sent Events.
+
+    Events, in order:
+      - `sources`: retrieved chunks, sources and metadata, sent as soon as
+        retrieval finishes (before the LLM starts generating).
+      - `token`: one per streamed completion delta, `{"text": "..."}`.
+      - `done`: final metadata (including `timings_ms`), or `error` with a
+        `detail` message if the pipeline failed mid-stream.
+
+    If the client disconnects, the pipeline generator is closed, which
+    closes the upstream OpenRouter request. A failed startup is a 500
+    before any event.
+    """
+
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message must not be empty.")
+    _raise_if_unknown_session(request)
+    _raise_if_warmup_failed()
+
+    async def events() -> AsyncIterator[str]:
+        if not _readiness.ready or not get_settings().openrouter_api_key:
+            if _readiness.ready:
+                response = await _placeholder_response(request)
+            else:
+                response = await _warming_up_response(request)
+            yield _sse(
+                "sources",
+                {
+                    "retrieved_chunks": response.retrieved_chunks,
+                    "sources": [s.model_dump(exclude_none=True) for s in response.sources],
+                    "metadata": response.metadata,
+                },
+            )
+            yield _sse("token", {"text": response.reply})
+            yield _sse("done", {"metadata": response.metadata})
+            return
+
+        await _ensure_course_data()
+        pipeline = stream_chat_pipeline(_get_llm_client(), _retriever, request, **_pipeline_kwargs())
+        try:
+            async for event, data in pipeline:
+                if await http_request.is_disconnected():
+                    break
+                yield _sse(event, data)
+        except Exception as exc:
+            yield _sse("error", {"detail": f"Chat pipeline failed: {exc}"})
+        finally:
+            await pipeline.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
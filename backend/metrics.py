@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple
+
+
+# prometheus_client is optional (see requirements.txt). Without it the
+# stage timers still feed `metadata.timings_ms`, but nothing is exported.
+HAS_PROMETHEUS = importlib.util.find_spec("prometheus_client") is not None
+
+# Seconds; covers a ~1 ms cache hit up to a slow free-tier LLM completion.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _NoMetric:
+    """Stands in for a metric when prometheus_client is not installed."""
+
+    def labels(self, **labels: str) -> "_NoMetric":
+        return self
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def dec(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+if HAS_PROMETHEUS:
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+    STAGE_SECONDS: Any = Histogram(
+        "rag_stage_duration_seconds",
+        "Duration of chat pipeline, retrieval, vector store and LLM stages.",
+        ["stage"],
+        buckets=DEFAULT_BUCKETS,
+    )
+    REQUEST_SECONDS: Any = Histogram(
+        "http_request_duration_seconds",
+        "API request duration until the last response byte (streams included).",
+        ["path", "method", "status"],
+        buckets=DEFAULT_BUCKETS,
+    )
+    IN_FLIGHT: Any = Gauge("http_requests_in_flight", "API requests currently being served.")
+    LLM_TOKENS: Any = Counter("llm_tokens_total", "LLM tokens reported by OpenRouter usage.", ["call", "kind"])
+    LLM_REQUESTS: Any = Counter("llm_requests_total", "OpenRouter chat completion calls.", ["call", "outcome"])
+else:
+    STAGE_SECONDS = REQUEST_SECONDS = IN_FLIGHT = LLM_TOKENS = LLM_REQUESTS = _NoMetric()
+
+
+class CallbackCollector:
+    """A counter or gauge read from `collect()` at scrape time (e.g. cache stats)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]],
+    ) -> None:
+        self.name = name
+        self._documentation = documentation
+        self._family = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+        self._labelnames = list(labelnames)
+        self._collect = collect
+
+    def collect(self) -> Iterator[Any]:
+        family = self._family(self.name, self._documentation, labels=self._labelnames)
+        try:
+            values = self._collect()
+        except Exception:  # a broken collector must not break the scrape
+            values = {}
+        for key, value in sorted(values.items()):
+            family.add_metric(list(key), value)
+        yield family
+
+
+_callbacks: Dict[str, CallbackCollector] = {}
+_callbacks_lock = threading.Lock()
+
+
+def register_callback(
+    name: str,
+    documentation: str,
+    kind: str,
+    labelnames: Sequence[str],
+    collect: Callable[[], Dict[LabelValues, float]],
+) -> None:
+    """Export `collect()` as `name` on the default registry (no-op without prometheus_client)."""
+
+    if not HAS_PROMETHEUS:
+        return
+    collector = CallbackCollector(name, documentation, kind, labelnames, collect)
+    with _callbacks_lock:
+        # Re-registering a name replaces it (module reloads, tests).
+        previous = _callbacks.pop(name, None)
+        if previous is not None:
+            REGISTRY.unregister(previous)
+        REGISTRY.register(collector)
+        _callbacks[name] = collector
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block under `stage`."""
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """ASGI middleware for request durations and in-flight counts.
+
+    Plain ASGI rather than Starlette's `BaseHTTPMiddleware`, so a streamed
+    response is timed until its last chunk, not until its headers. Only
+    paths starting with one of `prefixes` are recorded, under the route
+    template (e.g. `/api/sessions/{conversation_id}`) to keep label
+    cardinality bounded.
+    """
+
+    def __init__(self, app: Any, prefixes: Sequence[str] = ("/api/",)) -> None:
+        self.app = app
+        self._prefixes = tuple(prefixes)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self._prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        IN_FLIGHT.inc()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the shared scope.
+            template = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(path=template, method=scope["method"], status=str(status["code"])).observe(
+                time.perf_counter() - start
+            )
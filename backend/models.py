@@ -7,6 +7,12 @@ from pydantic import BaseModel, Field
 
 ChatRole = Literal["user", "assistant"]
 
+# How much a chat response carries (see rag_pipeline.shape_response):
+# "minimal": reply, metadata and source provenance without texts;
+# "standard": adds source texts (each document once) and few-shot examples;
+# "debug": adds the prompt chunks and the full prompt messages.
+ResponseVerbosity = Literal["minimal", "standard", "debug"]
+
 
 class ChatMessage(BaseModel):
     id: str
@@ -16,7 +22,10 @@ class ChatMessage(BaseModel):
 
 
 class SourceChunk(BaseModel):
-    text: str
+    # Document ID in the index; sources are unique by ID within a response.
+    id: Optional[str] = None
+    # Omitted in "minimal" responses.
+    text: Optional[str] = None
     source_file: Optional[str] = None
     page: Optional[int] = None
     chunk_index: Optional[int] = None
@@ -34,7 +43,12 @@ class PrattProfile(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     history: List[ChatMessage] = Field(default_factory=list)
+    # Server-side session: an ID issued by `POST /api/sessions`. With it and
+    # no `history`, the server supplies the conversation's earlier turns
+    # (see backend/session_store.py). Unknown IDs are rejected with a 404.
+    conversationId: Optional[str] = Field(default=None, max_length=128)
     prattProfile: Optional[PrattProfile] = None
+    verbosity: ResponseVerbosity = "standard"
 
 
 class ChatResponse(BaseModel):
@@ -44,6 +58,34 @@ class ChatResponse(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class SessionCreated(BaseModel):
+    conversationId: str
+
+
+class RetrieveQuery(BaseModel):
+    message: str
+    prattProfile: Optional[PrattProfile] = None
+    intent: Optional[str] = None
+    k: int = Field(default=5, ge=1, le=50)
+
+
+class BatchRetrieveRequest(BaseModel):
+    queries: List[RetrieveQuery] = Field(default_factory=list, max_length=100)
+
+
+class RetrieveResult(BaseModel):
+    retrieved_chunks: List[str] = Field(default_factory=list)
+    sources: List[SourceChunk] = Field(default_factory=list)
+
+
+class BatchRetrieveResponse(BaseModel):
+    results: List[RetrieveResult] = Field(default_factory=list)
+
+
 class IntentResult(BaseModel):
     intent: str
-    confidence: float
+    # Probability from the local classifier; None when the label came from
+    # the LLM, which gives no calibrated score.
+    confidence: Optional[float] = None
+    # "local" (embedding classifier) or "llm"
+    source: str = "llm"
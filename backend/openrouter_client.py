@@ -1,33 +1,71 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
+import asyncio
+import importlib.util
+import json
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 import httpx
 
-from .config import get_settings
+from .config import Settings, get_settings
+from .metrics import LLM_REQUESTS, LLM_TOKENS, observe_stage
 
 
-# Base OpenRouter API URL; specific endpoints are appended to this.
+# Default base OpenRouter API URL; specific endpoints are appended to this.
+# Override with OPENROUTER_BASE_URL (e.g. to point at a local stub server).
 API_URL = "https://openrouter.ai/api/v1"
 
 
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Create the pooled, keep-alive HTTP client used for OpenRouter calls."""
+
+    # HTTP/2 is opt-in and silently downgraded if `h2` is not installed.
+    http2 = settings.openrouter_http2 and importlib.util.find_spec("h2") is not None
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.openrouter_max_connections,
+            max_keepalive_connections=settings.openrouter_max_keepalive,
+            keepalive_expiry=settings.openrouter_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.openrouter_timeout, connect=settings.openrouter_connect_timeout),
+    )
+
+
+def _record_call(call: str, outcome: str, start: float, usage: Optional[Dict[str, Any]]) -> None:
+    """Export one completion call: its duration, outcome and token usage."""
+
+    observe_stage(f"llm_{call}", time.perf_counter() - start)
+    LLM_REQUESTS.labels(call=call, outcome=outcome).inc()
+    for kind in ("prompt", "completion"):
+        tokens = (usage or {}).get(f"{kind}_tokens")
+        if isinstance(tokens, int):
+            LLM_TOKENS.labels(call=call, kind=kind).inc(tokens)
+
+
 class OpenRouterClient:
     """Thin async client for OpenRouter chat completions.
 
     This client takes OpenAI-style message lists and returns the
     assistant's content string.
+
+    One instance is meant to live for the whole process: it owns a pooled
+    `httpx.AsyncClient`, so consecutive intent / answer calls reuse warm
+    TCP+TLS connections instead of paying a handshake each time. Call
+    `aclose()` on shutdown (main.py does this from the FastAPI lifespan).
     """
 
-    def __init__(self) -> None:
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None) -> None:
         settings = get_settings()
         if not settings.openrouter_api_key:
             raise RuntimeError("OPENROUTER_API_KEY is not configured")
 
         self._api_key = settings.openrouter_api_key
         self._model = settings.openrouter_model
-
-    async def chat(self, messages: List[Dict[str, Any]], temperature: float = 0.2) -> str:
-        headers = {
+        self._base_url = (settings.openrouter_base_url or API_URL).rstrip("/")
+        self._headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
@@ -36,15 +74,87 @@ class OpenRouterClient:
             "X-Title": "Duke Pratt Degree Planning Assistant",
         }
 
+        self._owns_http = http_client is None
+        self._http = http_client or build_http_client(settings)
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def chat(self, messages: List[Dict[str, Any]], temperature: float = 0.2) -> str:
         payload: Dict[str, Any] = {
             "model": self._model,
             "messages": messages,
             "temperature": temperature,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(f"{API_URL}/chat/completions", headers=headers, json=payload)
+        start = time.perf_counter()
+        outcome, usage = "error", None
+        try:
+            resp = await self._http.post(f"{self._base_url}/chat/completions", headers=self._headers, json=payload)
             resp.raise_for_status()
             data = resp.json()
+            usage = data.get("usage")
+            content = data["choices"][0]["message"]["content"]
+            outcome = "ok"
+            return content
+        finally:
+            _record_call("chat", outcome, start, usage)
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 0.2,
+    ) -> AsyncIterator[str]:
+        """Stream the assistant's reply as content deltas (`stream: true`).
+
+        OpenRouter sends Server-Sent Events: `data: {json}` lines, keep-alive
+        comment lines starting with ":", and a final `data: [DONE]`. Closing
+        this generator early closes the HTTP response, which cancels the
+        upstream generation.
+
+        Token usage is requested with `stream_options.include_usage`; it
+        arrives in a final chunk without choices.
+        """
+
+        payload: Dict[str, Any] = {
+            "model": self._model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        headers = {**self._headers, "Accept": "text/event-stream"}
 
-        return data["choices"][0]["message"]["content"]
+        start = time.perf_counter()
+        outcome, usage = "error", None
+        try:
+            async with self._http.stream(
+                "POST", f"{self._base_url}/chat/completions", headers=headers, json=payload
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        continue
+                    if "error" in chunk:
+                        raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+                    usage = chunk.get("usage") or usage
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            _record_call("stream", outcome, start, usage)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+EncodeBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class QueryBatcher:
+    """Coalesce concurrent single-text embedding requests into one batch.
+
+    The first `submit()` after an idle period opens a batch window. The batch
+    is flushed when either `max_batch_size` texts have arrived or
+    `max_wait_ms` has elapsed, whichever comes first. One `encode_batch`
+    call then serves every waiting coroutine, so a burst of concurrent chat
+    requests pays for a single batched MiniLM forward pass instead of N
+    single-row ones.
+    """
+
+    def __init__(
+        self,
+        encode_batch: EncodeBatch,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        self._encode_batch = encode_batch
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._pending: List[Tuple[str, "asyncio.Future[List[float]]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: "set[asyncio.Task[None]]" = set()
+
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+
+    async def submit(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[List[float]]" = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._batches += 1
+        self._items += len(batch)
+        self._max_seen = max(self._max_seen, len(batch))
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Keep a strong reference until the batch completes.
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[str, "asyncio.Future[List[float]]"]]) -> None:
+        try:
+            vectors = await self._encode_batch([text for text, _ in batch])
+        except asyncio.CancelledError:
+            # E.g. the loop shutting down: nobody may wait on forever.
+            for _, future in batch:
+                future.cancel()
+            raise
+        except BaseException as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            # A caller may have been cancelled (e.g. client disconnect).
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": (self._items / self._batches) if self._batches else 0.0,
+            "max_batch_size_seen": self._max_seen,
+        }
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import PrattProfile
+from .schema import Document
+
+
+# Course codes as students and the catalog write them: "ECE 280L",
+# "ece280l", "MATH-218D", "EGR 103".
+COURSE_CODE_RE = re.compile(r"\b([A-Za-z]{2,8})[\s\-]*(\d{2,3})([A-Za-z]{0,2})\b")
+
+
+def parse_course_code(raw: str) -> Optional[Tuple[str, str, str]]:
+    """Split a course code into (SUBJECT, number, SUFFIX), or None."""
+
+    match = COURSE_CODE_RE.fullmatch(raw.strip())
+    if not match:
+        return None
+    subject, number, suffix = match.groups()
+    return subject.upper(), number, suffix.upper()
+
+
+def normalize_course_code(raw: str) -> Optional[str]:
+    """Canonical "SUBJ 123L" form: "ece110l", "ECE-110L" -> "ECE 110L"."""
+
+    parts = parse_course_code(raw)
+    if parts is None:
+        return None
+    subject, number, suffix = parts
+    return f"{subject} {number}{suffix}"
+
+
+def _key(raw: str) -> str:
+    # Catalog numbers are not always clean ("280L9"), so stored codes are
+    # keyed on their alphanumerics only.
+    return re.sub(r"[^A-Z0-9]", "", raw.upper())
+
+
+def course_chunk(doc: Document) -> str:
+    """Course row as prompt context, with the code and title the row's text omits."""
+
+    header = " ".join(part for part in (doc.code, doc.title) if part)
+    offered = doc.metadata.get("offered")
+    if offered:
+        header += f" (typically offered: {offered})"
+    return f"{header}\n{doc.text}" if header else doc.text
+
+
+class CourseCatalog:
+    """In-memory index of course rows keyed by normalized course code.
+
+    Built from the same course Documents that ingestion writes to the
+    index (same IDs), so pinned courses dedupe against retrieved ones.
+    Lookups are dict hits: exact code first ("ECE 110L"), then the code
+    without its letter suffix ("ECE 110" -> "ECE 110L").
+    """
+
+    def __init__(self, docs: Iterable[Document]) -> None:
+        self._by_code: Dict[str, Document] = {}
+        self._by_number: Dict[str, Document] = {}
+        for doc in docs:
+            if not doc.code:
+                continue
+            # First occurrence wins when several CSVs list the same course.
+            self._by_code.setdefault(_key(doc.code), doc)
+            parts = parse_course_code(doc.code)
+            if parts is not None:
+                self._by_number.setdefault(parts[0] + parts[1], doc)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def lookup(self, raw: str) -> Optional[Document]:
+        """Find a course by any common spelling of its code."""
+
+        doc = self._by_code.get(_key(raw))
+        if doc is not None:
+            return doc
+        parts = parse_course_code(raw)
+        if parts is None:
+            return None
+        return self._by_number.get(parts[0] + parts[1])
+
+    def mentioned_in(self, text: str) -> List[Document]:
+        """Courses whose codes appear in `text`, in order of first mention."""
+
+        found: List[Document] = []
+        seen = set()
+        for match in COURSE_CODE_RE.finditer(text):
+            doc = self.lookup(match.group(0))
+            if doc is not None and doc.id not in seen:
+                seen.add(doc.id)
+                found.append(doc)
+        return found
+
+    def pinned_for(
+        self,
+        question: str,
+        pratt_profile: Optional[PrattProfile],
+        limit: int = 6,
+    ) -> List[Document]:
+        """Courses to pin into a turn's context: question mentions, then profile courses."""
+
+        pinned = self.mentioned_in(question)
+        if pratt_profile:
+            seen = {d.id for d in pinned}
+            for raw in [*pratt_profile.currentCourses, *pratt_profile.completedCourses]:
+                doc = self.lookup(raw)
+                if doc is not None and doc.id not in seen:
+                    seen.add(doc.id)
+                    pinned.append(doc)
+        return pinned[:limit]
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .file_lock import file_lock
+
+
+# Cache files live beside the Chroma index so a fresh checkout / CI run starts
+# cold but repeated ingests and repeated questions on one machine stay warm.
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".embedding_cache"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_KEY_RE = re.compile(rb"[0-9a-f]{64}")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivially different inputs share a key.
+
+    Only unicode form and whitespace are normalized; casing is left alone
+    because not every embedding model is uncased.
+    """
+
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """Content address for an embedding: sha256 over model name + normalized text."""
+
+    payload = f"{model_name}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + memory-mapped disk) cache of embedding vectors.
+
+    - The memory tier is an `OrderedDict` LRU bounded by `max_memory_items`.
+    - The disk tier is an append-only float32 matrix (`vectors.f32`) plus a
+      parallel `keys.txt` file where line *i* is the key of row *i*. Rows are
+      read through `np.memmap`, so a large cache costs page cache rather than
+      Python heap. Appends hold a file lock (`lock`), so several processes
+      can share one cache directory; a disk miss re-reads `keys.txt` when
+      its size or mtime has changed since the last sync.
+
+    Each model gets its own subdirectory because vector dimensions differ
+    between models. All public methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        max_memory_items: int = 4096,
+    ) -> None:
+        self._model_name = model_name
+        self._max_memory_items = max(0, max_memory_items)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk_dir: Optional[Path] = None
+        self._disk_index: Dict[str, int] = {}
+        # Rows of `vectors.f32` known to match `keys.txt`, and the bytes of
+        # `keys.txt` read so far.
+        self._disk_rows = 0
+        self._keys_offset = 0
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+        # (size, mtime_ns) of `keys.txt` after the last sync.
+        self._keys_stamp: Optional[Tuple[int, int]] = None
+
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if cache_dir is not None:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self._disk_dir = Path(cache_dir) / slug
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            with file_lock(self._lock_path):
+                self._sync_disk_index()
+
+    # --- Disk tier -----------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / "vectors.f32"
+
+    @property
+    def _keys_path(self) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / "keys.txt"
+
+    @property
+    def _dim_path(self) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / "dim"
+
+    @property
+    def _lock_path(self) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / "lock"
+
+    def _sync_disk_index(self) -> None:
+        """Read keys appended since the last sync and cut off a torn tail.
+
+        Row *i* is only trusted while lines 0..i of `keys.txt` are all valid
+        keys and `vectors.f32` holds at least i + 1 rows. Anything past that
+        common prefix (a crash between the two appends, a partial line) is
+        truncated, so the next append lands on the row its key line names.
+        The caller holds the file lock.
+        """
+
+        if self._dim is None:
+            if not self._dim_path.exists():
+                return
+            self._dim = int(self._dim_path.read_text().strip())
+        row_bytes = self._dim * 4
+        vectors_size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        keys_size = self._keys_path.stat().st_size if self._keys_path.exists() else 0
+        if keys_size < self._keys_offset or vectors_size < self._disk_rows * row_bytes:
+            # Truncated by another process: start over.
+            self._disk_index.clear()
+            self._disk_rows = 0
+            self._keys_offset = 0
+            self._mmap = None
+
+        tail = b""
+        if keys_size > self._keys_offset:
+            with self._keys_path.open("rb") as f:
+                f.seek(self._keys_offset)
+                tail = f.read()
+        rows_on_disk = vectors_size // row_bytes
+        # Only newline-terminated lines are complete.
+        for line in tail.split(b"\n")[:-1]:
+            if self._disk_rows >= rows_on_disk or not _KEY_RE.fullmatch(line):
+                break
+            self._disk_index.setdefault(line.decode("ascii"), self._disk_rows)
+            self._disk_rows += 1
+            self._keys_offset += len(line) + 1
+
+        if keys_size > self._keys_offset:
+            with self._keys_path.open("r+b") as f:
+                f.truncate(self._keys_offset)
+        if vectors_size > self._disk_rows * row_bytes:
+            with self._vectors_path.open("r+b") as f:
+                f.truncate(self._disk_rows * row_bytes)
+        self._keys_stamp = self._stat_keys()
+
+    def _stat_keys(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self._keys_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _refresh_disk_index(self) -> None:
+        """Pick up rows other processes appended since the last sync."""
+
+        if self._disk_dir is None or self._stat_keys() == self._keys_stamp:
+            return
+        with file_lock(self._lock_path):
+            self._sync_disk_index()
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        row = self._disk_index.get(key)
+        if row is None or self._dim is None:
+            return None
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            # Only the synced prefix: rows past it may be truncated at any time.
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._disk_rows, self._dim))
+        return np.array(self._mmap[row])
+
+    def _disk_put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        if self._disk_dir is None or not items:
+            return
+
+        with file_lock(self._lock_path):
+            self._sync_disk_index()
+            if self._dim is None:
+                self._dim = int(items[0][1].shape[0])
+                self._dim_path.write_text(str(self._dim))
+
+            new_keys: Dict[str, np.ndarray] = {}
+            for key, vector in items:
+                if key not in self._disk_index and vector.shape[0] == self._dim:
+                    new_keys.setdefault(key, vector)
+            if not new_keys:
+                return
+
+            # Vectors are written before keys: a crash in between leaves rows
+            # without keys, which the next sync truncates.
+            with self._vectors_path.open("ab") as f:
+                f.write(np.ascontiguousarray(np.stack(list(new_keys.values())), dtype=np.float32).tobytes())
+            with self._keys_path.open("ab") as f:
+                f.write(("\n".join(new_keys) + "\n").encode("ascii"))
+            self._sync_disk_index()
+
+    # --- Memory tier ---------------------------------------------------
+
+    def _memory_put(self, key: str, vector: np.ndarray) -> None:
+        if self._max_memory_items == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_items:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    # --- Public API ----------------------------------------------------
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up cached vectors for `texts`; misses are returned as None."""
+
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            refreshed = False
+            for text in texts:
+                key = cache_key(self._model_name, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._hits_memory += 1
+                else:
+                    vector = self._disk_get(key)
+                    if vector is None and not refreshed:
+                        # At most one stat (and re-sync) per call.
+                        refreshed = True
+                        self._refresh_disk_index()
+                        vector = self._disk_get(key)
+                    if vector is not None:
+                        self._hits_disk += 1
+                        self._memory_put(key, vector)
+                    else:
+                        self._misses += 1
+                results.append(vector)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        """Store freshly computed vectors in both tiers."""
+
+        items: List[Tuple[str, np.ndarray]] = []
+        for text, vector in zip(texts, vectors):
+            items.append((cache_key(self._model_name, text), np.asarray(vector, dtype=np.float32)))
+
+        with self._lock:
+            for key, vector in items:
+                self._memory_put(key, vector)
+            self._disk_put_many(items)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and tier sizes, e.g. for logging or metrics."""
+
+        with self._lock:
+            return {
+                "hits_memory": self._hits_memory,
+                "hits_disk": self._hits_disk,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "memory_items": len(self._memory),
+                "disk_items": len(self._disk_index),
+            }
@@ -1,23 +1,152 @@
 from __future__ import annotations
 
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from sentence_transformers import SentenceTransformer
+from ..config import get_settings
+from .batcher import QueryBatcher
+from .embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache
+from .encoders import AnyEncoder, create_encoder
+from .executor import StageExecutor, get_stage_executor
+
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def _default_encoder(model_name: str) -> AnyEncoder:
+    settings = get_settings()
+    return create_encoder(
+        settings.embedding_backend,
+        model_name,
+        onnx_dir=Path(settings.embedding_onnx_dir) if settings.embedding_onnx_dir else None,
+        threads=settings.embedding_onnx_threads,
+    )
+
+
+def _default_cache(model_name: str) -> Optional[EmbeddingCache]:
+    settings = get_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+    cache_dir = Path(settings.embedding_cache_dir) if settings.embedding_cache_dir else DEFAULT_CACHE_DIR
+    return EmbeddingCache(
+        model_name=model_name,
+        cache_dir=cache_dir,
+        max_memory_items=settings.embedding_cache_max_items,
+    )
 
 
 class EmbeddingBackend:
-        """Simple embedding backend using a local sentence-transformers model.
+    """Simple embedding backend using a local MiniLM model.
+
+    We always use the `all-MiniLM-L6-v2` model so the RAG stack works fully
+    offline and does not depend on any external embedding API.
+
+    Vectors are looked up in an `EmbeddingCache` before running the model, so
+    re-ingesting unchanged documents or repeating a question skips the
+    forward pass entirely. Encoding runs on a `StageExecutor` thread so it
+    never blocks the event loop, and concurrent `embed_query` calls are
+    coalesced by a `QueryBatcher` into a single `encode` call.
+
+    The network runs on the encoder selected by `EMBEDDING_BACKEND` (see
+    backend/rag/encoders.py): PyTorch sentence-transformers, or its ONNX
+    export on ONNX Runtime, optionally int8-quantized. Cached vectors are
+    keyed by the encoder's `variant`, so backends never share entries.
+
+    The model (and torch with it) is loaded on first use, not in the
+    constructor, so importing the API does not wait for it. The app loads it
+    in the background at startup via `load` / `warmup`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        cache: Optional[EmbeddingCache] = None,
+        executor: Optional[StageExecutor] = None,
+        encoder: Optional[AnyEncoder] = None,
+    ) -> None:
+        self._model_name = model_name
+        self._encoder = encoder if encoder is not None else _default_encoder(model_name)
+        self._cache = cache if cache is not None else _default_cache(self._encoder.variant)
+        self._executor = executor or get_stage_executor()
+
+        settings = get_settings()
+        self._batcher: Optional[QueryBatcher] = None
+        if settings.query_batching_enabled:
+            self._batcher = QueryBatcher(
+                self.embed_documents,
+                max_batch_size=settings.query_batch_max_size,
+                max_wait_ms=settings.query_batch_max_wait_ms,
+            )
+
+    @property
+    def variant(self) -> str:
+        """Model name plus encoder backend, e.g. "all-MiniLM-L6-v2@onnx-int8"."""
+
+        return self._encoder.variant
 
-        We always use the `all-MiniLM-L6-v2` model so the RAG stack works fully
-        offline and does not depend on any external embedding API.
+    @property
+    def loaded(self) -> bool:
+        return self._encoder.loaded
+
+    def load(self) -> Any:
+        """Load the model if needed (blocking; safe to call from any thread)."""
+
+        return self._encoder.load()
+
+    async def warmup(self, texts: List[str]) -> None:
+        """Load the model on the executor and encode `texts` once.
+
+        The texts bypass the embedding cache, so the forward pass really runs
+        and the first request does not pay for kernel and allocator warmup.
         """
 
-        def __init__(self) -> None:
-                self._local_model: SentenceTransformer = SentenceTransformer("all-MiniLM-L6-v2")
+        await self._executor.run(self._encoder.encode, texts)
+
+    @property
+    def tokenizer(self) -> Any:
+        """The model's tokenizer (used to count prompt tokens), if it has one."""
+
+        return self._encoder.tokenizer
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        return self._cache
 
-        async def embed_documents(self, texts: List[str]) -> List[List[float]]:
-            vectors = self._local_model.encode(texts, show_progress_bar=False)
+    def cache_stats(self) -> Dict[str, int]:
+        return self._cache.stats() if self._cache is not None else {}
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        if self._cache is None:
+            vectors = self._encoder.encode(texts)
             return [v.tolist() for v in vectors]  # type: ignore[return-value]
 
-        async def embed_query(self, text: str) -> List[float]:
-            return (await self.embed_documents([text]))[0]
+        cached = self._cache.get_many(texts)
+        results: List[Optional[List[float]]] = [v.tolist() if v is not None else None for v in cached]
+
+        # Encode each distinct missing text once, even if repeated in the batch.
+        missing: Dict[str, List[int]] = {}
+        for i, vector in enumerate(results):
+            if vector is None:
+                missing.setdefault(texts[i], []).append(i)
+
+        if missing:
+            missing_texts = list(missing)
+            vectors = self._encoder.encode(missing_texts)
+            self._cache.put_many(missing_texts, vectors)
+            for text, vector in zip(missing_texts, vectors):
+                as_list = vector.tolist()
+                for i in missing[text]:
+                    results[i] = as_list
+
+        return results  # type: ignore[return-value]
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._executor.run(self._encode, texts)
+
+    async def embed_query(self, text: str) -> List[float]:
+        if self._batcher is not None:
+            return await self._batcher.submit(text)
+        return (await self.embed_documents([text]))[0]
+
+    def batcher_stats(self) -> Dict[str, float]:
+        return self._batcher.stats() if self._batcher is not None else {}
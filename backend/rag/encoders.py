@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# "torch": the sentence-transformers model; "onnx": the same network exported
+# to ONNX and run with ONNX Runtime; "onnx-int8": that export with weights
+# dynamically quantized to int8.
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Exports live beside the Chroma index, one subdirectory per model.
+DEFAULT_ONNX_DIR = Path(__file__).resolve().parent.parent / ".onnx"
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+ONNX_CONFIG_FILE = "encoder_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Optional dependencies of the ONNX backends (backend/requirements-onnx.txt).
+ONNX_REQUIREMENTS = "backend/requirements-onnx.txt"
+
+
+class _LazyEncoder(ABC):
+    """Loads its model on first use, once, from any thread."""
+
+    def __init__(self) -> None:
+        self._model: Any = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    @abstractmethod
+    def _load(self) -> Any:
+        """Build the model; called once, under the load lock."""
+
+
+class TorchEncoder(_LazyEncoder):
+    """The sentence-transformers model on PyTorch (the reference encoder)."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str) -> None:
+        super().__init__()
+        self.model_name = model_name
+
+    @property
+    def variant(self) -> str:
+        # The bare model name, so caches written before backends existed stay valid.
+        return self.model_name
+
+    def _load(self) -> Any:
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name)
+
+    @property
+    def tokenizer(self) -> Any:
+        return getattr(self.load(), "tokenizer", None)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self.load().encode(list(texts), show_progress_bar=False), dtype=np.float32)
+
+
+class _CountingTokenizer:
+    """`tokenize(text)` over a `tokenizers.Tokenizer`, as `TokenCounter` expects."""
+
+    def __init__(self, tokenizer: Any) -> None:
+        self._tokenizer = tokenizer
+
+    def tokenize(self, text: str) -> List[str]:
+        return self._tokenizer.encode(text, add_special_tokens=False).tokens
+
+
+class _OnnxModel:
+    def __init__(self, session: Any, tokenizer: Any, counting: Any, input_names: List[str]) -> None:
+        self.session = session
+        self.tokenizer = tokenizer
+        self.counting = _CountingTokenizer(counting)
+        self.input_names = input_names
+
+
+class OnnxEncoder(_LazyEncoder):
+    """The exported model on ONNX Runtime (CPU), optionally int8-quantized.
+
+    Tokenizes, runs the transformer, mean-pools and L2-normalizes like the
+    sentence-transformers pipeline, without importing torch. Create the
+    export with `python -m backend.scripts.export_onnx_encoder`.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model_dir: Optional[Path] = None,
+        quantized: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+    ) -> None:
+        super().__init__()
+        self.model_name = model_name
+        self.backend = "onnx-int8" if quantized else "onnx"
+        self._dir = Path(model_dir) if model_dir is not None else onnx_model_dir(model_name)
+        self._quantized = quantized
+        self._threads = threads
+        self._batch_size = max(1, batch_size)
+        self._config: Dict[str, Any] = {}
+
+    @property
+    def variant(self) -> str:
+        return f"{self.model_name}@{self.backend}"
+
+    @property
+    def model_path(self) -> Path:
+        return self._dir / (ONNX_INT8_MODEL_FILE if self._quantized else ONNX_MODEL_FILE)
+
+    def _load(self) -> _OnnxModel:
+        if not self.model_path.exists():
+            raise RuntimeError(
+                f"No ONNX export at {self.model_path}; run "
+                f"`python -m backend.scripts.export_onnx_encoder{' --int8' if self._quantized else ''}`"
+            )
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise ImportError(
+                f"EMBEDDING_BACKEND={self.backend} needs onnxruntime and tokenizers "
+                f"(`pip install -r {ONNX_REQUIREMENTS}`): {exc}"
+            ) from exc
+
+        self._config = json.loads((self._dir / ONNX_CONFIG_FILE).read_text(encoding="utf-8"))
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self._threads > 0:
+            options.intra_op_num_threads = self._threads
+        session = ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+
+        tokenizer = Tokenizer.from_file(str(self._dir / TOKENIZER_FILE))
+        tokenizer.enable_truncation(max_length=int(self._config["max_seq_length"]))
+        tokenizer.enable_padding(pad_id=int(self._config["pad_token_id"]), pad_token=self._config["pad_token"])
+        # Prompt token counting must not be cut at the model's input limit.
+        counting = Tokenizer.from_file(str(self._dir / TOKENIZER_FILE))
+        counting.no_truncation()
+        counting.no_padding()
+        return _OnnxModel(session, tokenizer, counting, [i.name for i in session.get_inputs()])
+
+    @property
+    def tokenizer(self) -> Any:
+        return self.load().counting
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        model: _OnnxModel = self.load()
+        if not texts:
+            return np.zeros((0, int(self._config["dimension"])), dtype=np.float32)
+
+        # Batch texts of similar length together to minimize padding, like
+        # sentence-transformers does.
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), int(self._config["dimension"])), dtype=np.float32)
+        for start in range(0, len(texts), self._batch_size):
+            rows = order[start : start + self._batch_size]
+            encodings = model.tokenizer.encode_batch([texts[i] for i in rows])
+            mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = model.session.run(None, {name: feeds[name] for name in model.input_names})[0]
+            out[rows] = mean_pool(hidden, mask, normalize=bool(self._config.get("normalize", True)))
+        return out
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """Mean of the token vectors under the attention mask, optionally L2-normalized."""
+
+    mask = attention_mask[:, :, None].astype(np.float32)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled.astype(np.float32)
+
+
+def onnx_model_dir(model_name: str, base_dir: Optional[Path] = None) -> Path:
+    return (base_dir or DEFAULT_ONNX_DIR) / model_name.replace("/", "_")
+
+
+AnyEncoder = Union[TorchEncoder, OnnxEncoder]
+
+
+def create_encoder(
+    backend: str,
+    model_name: str,
+    onnx_dir: Optional[Path] = None,
+    threads: int = 0,
+) -> AnyEncoder:
+    """The encoder for `EMBEDDING_BACKEND`; nothing is loaded until first use."""
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {ENCODER_BACKENDS}")
+    if backend == "torch":
+        return TorchEncoder(model_name)
+    return OnnxEncoder(
+        model_name,
+        model_dir=onnx_model_dir(model_name, onnx_dir),
+        quantized=backend == "onnx-int8",
+        threads=threads,
+    )
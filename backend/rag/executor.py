@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from ..config import get_settings
+
+
+T = TypeVar("T")
+
+
+class StageExecutor:
+    """Bounded thread pool for the blocking stages of the RAG pipeline.
+
+    `SentenceTransformer.encode` and Chroma's `collection.query` are
+    synchronous and CPU-bound; calling them directly from an `async def`
+    stalls the event loop for every other in-flight request. `run()` hands
+    them to a fixed-size pool instead. Torch, NumPy and Chroma's HNSW index
+    release the GIL in their hot loops, so threads scale across cores without
+    having to copy the model into worker processes.
+
+    At most `max_workers + max_pending` calls are admitted at once; further
+    callers wait (without blocking the loop) until a slot frees up, which
+    gives natural backpressure under load.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, name: str = "rag-stage") -> None:
+        self._max_workers = max(1, max_workers)
+        self._capacity = self._max_workers + max(0, max_pending)
+        self._name = name
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # asyncio primitives bind to one event loop, but scripts such as the
+        # benchmarks may call asyncio.run() several times in one process.
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._queue_wait_total = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Created on first use, and again after `shutdown()`: the executor is
+        # a process-wide singleton that outlives one app lifespan (tests and
+        # scripts start the app several times in one process).
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=self._name)
+            return self._pool
+
+    def _slots_for(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self._capacity)
+            self._slots[loop] = slots
+        return slots
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run `fn(*args)` on the pool and await its result."""
+
+        loop = asyncio.get_running_loop()
+        slots = self._slots_for(loop)
+
+        with self._lock:
+            self._waiting += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._waiting + self._queued)
+        try:
+            await slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def call() -> T:
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._queue_wait_total += time.perf_counter() - submitted
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        try:
+            return await loop.run_in_executor(self._get_pool(), call)
+        finally:
+            slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and cumulative counters."""
+
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self._max_workers,
+                "capacity": self._capacity,
+                "queue_depth": self._waiting + self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "max_queue_depth": self._max_queue_depth,
+                "avg_queue_wait_ms": (self._queue_wait_total / finished * 1000.0) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads; a later `run()` starts a new pool."""
+
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_stage_executor() -> StageExecutor:
+    """Process-wide executor shared by the embedding backend and vector store."""
+
+    settings = get_settings()
+    workers = settings.rag_executor_workers or min(8, os.cpu_count() or 1)
+    return StageExecutor(max_workers=workers, max_pending=settings.rag_executor_max_pending)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized.
+    fcntl = None  # type: ignore[assignment]
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock on `path` across threads and processes (advisory `flock`).
+
+    Used around appends to on-disk files that several processes (the server,
+    an ingest run, a benchmark) may write at the same time.
+    """
+
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(str(path), threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
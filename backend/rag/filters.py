@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, Mapping):
+        return value == condition
+
+    for op, operand in condition.items():
+        if op == "$eq":
+            ok = value == operand
+        elif op == "$ne":
+            ok = value != operand
+        elif op == "$in":
+            ok = value in operand
+        elif op == "$nin":
+            ok = value not in operand
+        elif op == "$gt":
+            ok = value is not None and value > operand
+        elif op == "$gte":
+            ok = value is not None and value >= operand
+        elif op == "$lt":
+            ok = value is not None and value < operand
+        elif op == "$lte":
+            ok = value is not None and value <= operand
+        else:
+            raise ValueError(f"Unsupported where operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches_where(metadata: Mapping[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style `where` filter against one metadata dict.
+
+    Supports the subset `Retriever.build_where` produces and a bit more:
+    field equality, `$eq`/`$ne`/`$in`/`$nin`/`$gt`/`$gte`/`$lt`/`$lte`, and
+    `$and`/`$or` combinations. Lets non-Chroma search paths (e.g. BM25)
+    apply exactly the same filters as the vector store.
+    """
+
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
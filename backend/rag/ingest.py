@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import copy
 import csv
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple
-
-from pypdf import PdfReader
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+from ..config import get_settings
 from .schema import Document, normalize_major
 from .embeddings import EmbeddingBackend
-from .vector_store import VectorStore
+from .ingest_pipeline import DocChange, FileDone, IngestItem, IngestPipeline
+from .manifest import IngestManifest, document_hash, file_sha256
+from .pdf_extract import extract_pdf_pages
+from .prereqs import PREREQ_GRAPH_NAME, PrereqGraph
+from .vector_store import create_vector_store, vector_store_dir
 
 
 CONTEXT_DIR = Path(__file__).resolve().parent.parent.parent / "ContextDocuments"
@@ -60,6 +65,9 @@ def _row_to_document(file_path: Path, row_index: int, row: dict) -> Document:
         "source_file": filename,
         "row_index": row_index,
     }
+    offered = row.get("Course Typically Offered")
+    if offered:
+        metadata["offered"] = str(offered).strip()
 
     return Document(
         id=doc_id,
@@ -95,24 +103,45 @@ def _chunk_text(text: str, max_words: int = 400) -> List[str]:
     return chunks
 
 
-def _pdf_to_documents(pdf_path: Path) -> List[Document]:
+def _chunk_pages(pages: List[str], max_words: int = 400) -> List[Tuple[str, int]]:
+    """Like `_chunk_text` over all pages, also returning each chunk's start page.
+
+    Chunks are identical to `_chunk_text("\n\n".join(pages))`, so document
+    IDs stay stable; the page number (1-based) is the page of the chunk's
+    first word.
+    """
+
+    words: List[str] = []
+    word_pages: List[int] = []
+    for page_number, page_text in enumerate(pages, start=1):
+        page_words = page_text.split()
+        words.extend(page_words)
+        word_pages.extend([page_number] * len(page_words))
+
+    chunks: List[Tuple[str, int]] = []
+    for i in range(0, len(words), max_words):
+        chunk_words = words[i : i + max_words]
+        if chunk_words:
+            chunks.append((" ".join(chunk_words), word_pages[i]))
+    return chunks
+
+
+def _pdf_to_documents(pdf_path: Path, pages: Optional[List[str]] = None) -> List[Document]:
     """Convert a PDF into Documents.
 
-    - Normal handbooks are split into ~400-word chunks.
+    - Normal handbooks are split into ~400-word chunks, each tagged with the
+      page it starts on.
     - Few-shot PDFs (filename contains "fewshot" or "few_shot") are split
       into whole example paths instead of arbitrary chunks. Each example
       becomes a single Document so we can retrieve the top-k examples.
+
+    `pages` is the per-page text from `extract_pdf_pages`; when omitted the
+    PDF is extracted (through the page cache) here.
     """
 
-    reader = PdfReader(str(pdf_path))
-    full_text_parts: List[str] = []
-    for page in reader.pages:
-        try:
-            page_text = page.extract_text() or ""
-        except Exception:
-            page_text = ""
-        if page_text.strip():
-            full_text_parts.append(page_text)
+    if pages is None:
+        pages = extract_pdf_pages([pdf_path])[pdf_path]
+    full_text_parts = [page_text for page_text in pages if page_text.strip()]
 
     full_text = "\n\n".join(full_text_parts).strip()
     if not full_text:
@@ -169,14 +198,15 @@ def _pdf_to_documents(pdf_path: Path) -> List[Document]:
     major_code = _guess_major_from_pdf_name(filename)
     doc_type = "handbook_requirement"
 
-    chunks = _chunk_text(full_text, max_words=400)
+    chunks = _chunk_pages(pages, max_words=400)
     docs: List[Document] = []
-    for idx, chunk in enumerate(chunks):
+    for idx, (chunk, page_number) in enumerate(chunks):
         doc_id = f"{filename}:chunk-{idx}"
         title = f"{filename} section {idx + 1}"
         metadata = {
             "source_file": filename,
             "chunk_index": idx,
+            "page": page_number,
         }
         docs.append(
             Document(
@@ -193,48 +223,239 @@ def _pdf_to_documents(pdf_path: Path) -> List[Document]:
     return docs
 
 
-def load_context_documents(context_dir: Path = CONTEXT_DIR) -> Tuple[List[Document], List[Document]]:
+def _csv_to_documents(csv_path: Path) -> List[Document]:
+    docs: List[Document] = []
+    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        for idx, row in enumerate(reader):
+            doc = _row_to_document(csv_path, idx, row)
+            if doc.text:
+                docs.append(doc)
+    return docs
+
+
+def _source_files(context_dir: Path) -> List[Path]:
+    return sorted(context_dir.glob("*.csv")) + sorted(context_dir.glob("*.pdf"))
+
+
+def load_file_documents(path: Path, pdf_pages: Optional[List[str]] = None) -> List[Document]:
+    """Parse one context file (CSV or PDF) into Documents."""
+
+    if path.suffix.lower() == ".csv":
+        return _csv_to_documents(path)
+    return _pdf_to_documents(path, pages=pdf_pages)
+
+
+def load_course_documents(context_dir: Path = CONTEXT_DIR) -> List[Document]:
+    """One Document per course row of every CSV in `context_dir`."""
+
     course_docs: List[Document] = []
-    handbook_docs: List[Document] = []
+    for csv_path in sorted(context_dir.glob("*.csv")):
+        course_docs.extend(_csv_to_documents(csv_path))
+    return course_docs
 
+
+def load_context_documents(context_dir: Path = CONTEXT_DIR) -> Tuple[List[Document], List[Document]]:
     # Course / CSV documents
-    for csv_path in context_dir.glob("*.csv"):
-        with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            for idx, row in enumerate(reader):
-                doc = _row_to_document(csv_path, idx, row)
-                if doc.text:
-                    course_docs.append(doc)
-
-    # Handbook PDF documents
-    for pdf_path in context_dir.glob("*.pdf"):
-        handbook_docs.extend(_pdf_to_documents(pdf_path))
+    course_docs = load_course_documents(context_dir)
+    handbook_docs: List[Document] = []
+
+    # Handbook PDF documents (pages extracted in parallel, through the cache)
+    pdf_paths = sorted(context_dir.glob("*.pdf"))
+    pdf_pages = extract_pdf_pages(pdf_paths, max_workers=get_settings().ingest_pdf_workers)
+    for pdf_path in pdf_paths:
+        handbook_docs.extend(_pdf_to_documents(pdf_path, pages=pdf_pages[pdf_path]))
 
     return course_docs, handbook_docs
 
 
-async def ingest() -> None:
+def iter_changes(context_dir: Path, old: IngestManifest, full: bool = False) -> Iterator[IngestItem]:
+    """Stream what has to change in the index, one source file at a time.
+
+    Files whose content hash matches the manifest are not even parsed. For
+    changed files, only documents whose text/metadata hash changed are
+    yielded for re-embedding; each file ends with a `FileDone` carrying its
+    current document IDs so stale ones can be deleted. With `full=True`
+    every current document is yielded regardless of hashes.
+    """
+
+    paths = _source_files(context_dir)
+    hashes = {path: file_sha256(path) for path in paths}
+
+    def needs_parse(path: Path) -> bool:
+        previous = old.files.get(path.name)
+        return full or previous is None or previous.sha256 != hashes[path]
+
+    # Extract every changed PDF in one parallel pass before building documents.
+    failed_pages: Dict[Path, List[int]] = {}
+    pdf_pages = extract_pdf_pages(
+        [path for path in paths if path.suffix.lower() == ".pdf" and needs_parse(path)],
+        max_workers=get_settings().ingest_pdf_workers,
+        failed_pages=failed_pages,
+    )
+
+    for path in paths:
+        name = path.name
+        previous = old.files.get(name)
+
+        if not needs_parse(path):
+            yield FileDone(name=name, sha256=hashes[path], status="unchanged")
+            continue
+
+        previous_docs = dict(previous.docs) if previous is not None else {}
+        doc_ids: Set[str] = set()
+        for doc in load_file_documents(path, pdf_pages=pdf_pages.pop(path, None)):
+            digest = document_hash(doc)
+            doc_ids.add(doc.id)
+            old_digest = previous_docs.get(doc.id)
+            if full or old_digest != digest:
+                yield DocChange(
+                    file_name=name,
+                    doc=doc,
+                    digest=digest,
+                    status="+" if old_digest is None else "~",
+                )
+        yield FileDone(
+            name=name,
+            # A PDF with pages that failed to extract is indexed as far as it
+            # goes but not recorded as complete, so the next run re-parses it.
+            sha256="" if path in failed_pages else hashes[path],
+            status="new" if previous is None else "changed",
+            doc_ids=doc_ids,
+        )
+
+    seen_files = {path.name for path in paths}
+    for name, previous in old.files.items():
+        if name not in seen_files:
+            yield FileDone(name=name, sha256=previous.sha256, status="removed")
+
+
+@dataclass
+class IngestPlan:
+    """Difference between the files on disk and the current manifest."""
+
+    upserts: List[Document] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    # file name -> "new" | "changed" | "removed" | "unchanged"
+    file_status: Dict[str, str] = field(default_factory=dict)
+    # document id -> "+" (new) | "~" (changed)
+    doc_status: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.upserts and not self.deletes
+
+
+def plan_ingest(context_dir: Path, old: IngestManifest, full: bool = False) -> IngestPlan:
+    """Collect `iter_changes` into a full plan (used for `--dry-run`)."""
+
+    plan = IngestPlan()
+    for item in iter_changes(context_dir, old, full=full):
+        if isinstance(item, DocChange):
+            plan.upserts.append(item.doc)
+            plan.doc_status[item.doc.id] = item.status
+            continue
+        plan.file_status[item.name] = item.status
+        previous = old.files.get(item.name)
+        if previous is not None and item.status != "unchanged":
+            plan.deletes.extend(
+                doc_id for doc_id in previous.docs if item.doc_ids is None or doc_id not in item.doc_ids
+            )
+    return plan
+
+
+def print_plan(plan: IngestPlan, verbose: bool = True) -> None:
+    for name, status in sorted(plan.file_status.items()):
+        print(f"  [{status:>9}] {name}")
+    if verbose:
+        for doc in plan.upserts:
+            print(f"    {plan.doc_status.get(doc.id, '~')} {doc.id}")
+        for doc_id in plan.deletes:
+            print(f"    - {doc_id}")
+    new = sum(1 for s in plan.doc_status.values() if s == "+")
+    print(
+        f"Plan: {new} new, {len(plan.upserts) - new} changed, "
+        f"{len(plan.deletes)} deleted document(s)."
+    )
+
+
+async def ingest(dry_run: bool = False, full: bool = False) -> None:
+    """Incrementally sync the vector index with `ContextDocuments/`.
+
+    Safe to run repeatedly: unchanged files cost only a hash, documents are
+    written with upserts, and documents whose sources disappeared are
+    deleted. Documents are streamed through `IngestPipeline` in batches of
+    `INGEST_BATCH_SIZE`, checkpointing the manifest after each one, so an
+    interrupted run resumes from the last written batch. `dry_run` prints
+    the diff without touching the index.
+    """
+
+    settings = get_settings()
     context_dir = CONTEXT_DIR
     persist_dir = PERSIST_DIR
     persist_dir.mkdir(parents=True, exist_ok=True)
+    # Each backend keeps its own manifest next to its index.
+    store_dir = vector_store_dir(settings.vector_store_backend, persist_dir)
 
-    print(f"Loading context documents from {context_dir}...")
-    course_docs, handbook_docs = load_context_documents(context_dir)
-    docs = course_docs + handbook_docs
-    print(f"Loaded {len(course_docs)} course documents from CSVs.")
-    print(f"Loaded {len(handbook_docs)} handbook documents from PDFs.")
+    print(f"Scanning context documents in {context_dir}...")
+    old_manifest = IngestManifest.load(store_dir)
 
+    if dry_run:
+        print_plan(plan_ingest(context_dir, old_manifest, full=full))
+        print("Dry run: index not modified.")
+        return
+
+    store = create_vector_store(settings.vector_store_backend, persist_dir, dtype=settings.vector_store_dtype)
     embedding_backend = EmbeddingBackend()
-    print("Computing embeddings (this may take a moment)...")
-    embeddings = await embedding_backend.embed_documents([d.text for d in docs])
+    pipeline = IngestPipeline(
+        store,
+        embedding_backend,
+        # The writer updates its copy as batches commit; the loader keeps
+        # diffing against the manifest as it was at the start of the run.
+        manifest=copy.deepcopy(old_manifest),
+        persist_dir=store_dir,
+        queue_size=settings.ingest_queue_size,
+    )
+    progress = await pipeline.run(
+        iter_changes(context_dir, old_manifest, full=full),
+        batch_size=settings.ingest_batch_size,
+    )
 
-    store = VectorStore(persist_dir=persist_dir)
-    print("Writing to vector store...")
-    await store.add_documents(docs, embeddings)
-    print(f"Ingestion complete. Persistent index stored in {persist_dir}.")
+    for name, status in sorted(progress.file_status.items()):
+        print(f"  [{status:>9}] {name}")
+
+    # Parsing the course CSVs is cheap, so the prerequisite graph is simply
+    # rebuilt on every run.
+    graph = PrereqGraph.from_documents(load_course_documents(context_dir))
+    graph.save(persist_dir)
+    print(f"Prerequisite graph: {len(graph)} course(s) saved to {persist_dir / PREREQ_GRAPH_NAME}.")
+
+    if not progress.changed:
+        print("Index is up to date.")
+        return
+
+    print(
+        f"Upserted {progress.upserted} document(s) ({progress.new} new), "
+        f"deleted {progress.deleted}, in {progress.batches} batch(es)."
+    )
+    stats = embedding_backend.cache_stats()
+    if stats:
+        print(
+            f"Embedding cache: {stats['hits_memory'] + stats['hits_disk']} hits, "
+            f"{stats['misses']} misses."
+        )
+    # Each committed batch already bumped the index version, which
+    # invalidates caches keyed on search results (e.g. the answer cache).
+    print(f"Ingestion complete. Persistent index stored in {store_dir}.")
 
 
 if __name__ == "__main__":
+    import argparse
     import asyncio
 
-    asyncio.run(ingest())
+    parser = argparse.ArgumentParser(description="Build or update the Pratt RAG vector index.")
+    parser.add_argument("--dry-run", action="store_true", help="print the diff without writing to the index")
+    parser.add_argument("--full", action="store_true", help="re-embed and upsert every document")
+    args = parser.parse_args()
+
+    asyncio.run(ingest(dry_run=args.dry_run, full=args.full))
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from .embeddings import EmbeddingBackend
+from .executor import get_stage_executor
+from .manifest import FileEntry, IngestManifest
+from .schema import Document
+from .vector_store import AnyVectorStore
+
+
+@dataclass
+class DocChange:
+    """A document that must be (re-)embedded and upserted."""
+
+    file_name: str
+    doc: Document
+    digest: str
+    # "+" (new) | "~" (changed)
+    status: str
+
+
+@dataclass
+class FileDone:
+    """Marks that every change of one source file has been emitted.
+
+    `doc_ids` is the file's full current set of document IDs, so the writer
+    can delete the ones that disappeared; it is None for a removed file.
+    """
+
+    name: str
+    sha256: str
+    # "new" | "changed" | "removed" | "unchanged"
+    status: str
+    doc_ids: Optional[Set[str]] = None
+
+
+IngestItem = Union[DocChange, FileDone]
+
+
+@dataclass
+class Batch:
+    number: int
+    changes: List[DocChange]
+    # Files whose last change is in this batch (or an earlier one).
+    files_done: List[FileDone]
+    embeddings: Optional[List[List[float]]] = None
+
+
+def iter_batches(items: Iterable[IngestItem], batch_size: int) -> Iterator[Batch]:
+    """Group a stream of changes into fixed-size batches.
+
+    `FileDone` markers ride along with the batch that holds (or follows) the
+    file's last document, so a file is only marked complete once all of its
+    documents have been written.
+    """
+
+    batch_size = max(1, batch_size)
+    number = 0
+    changes: List[DocChange] = []
+    files_done: List[FileDone] = []
+    for item in items:
+        if isinstance(item, FileDone):
+            files_done.append(item)
+            continue
+        changes.append(item)
+        if len(changes) >= batch_size:
+            number += 1
+            yield Batch(number=number, changes=changes, files_done=files_done)
+            changes, files_done = [], []
+    if changes or files_done:
+        yield Batch(number=number + 1, changes=changes, files_done=files_done)
+
+
+@dataclass
+class IngestProgress:
+    batches: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    new: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    # file name -> "new" | "changed" | "removed" | "unchanged"
+    file_status: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.upserted or self.deleted)
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.upserted / elapsed if elapsed > 0 else 0.0
+        return (
+            f"  batch {self.batches}: {self.upserted} upserted, {self.deleted} deleted, "
+            f"{len(self.file_status)} file(s) done ({rate:.0f} docs/s)"
+        )
+
+
+_END = object()
+
+
+class IngestPipeline:
+    """Load -> embed -> write in fixed-size batches with bounded queues.
+
+    Each stage runs as its own task and hands batches to the next through an
+    `asyncio.Queue` of `queue_size`, so at most a few batches are in memory
+    at a time and a slow stage (usually embedding) holds back the loader.
+
+    After every batch is written the index version is bumped and the
+    manifest is saved as a checkpoint: the hashes of the documents just
+    upserted are recorded, and a file's new sha256 only once all of its
+    documents are in. A crashed run therefore resumes where it stopped: the
+    unfinished file is re-parsed, but its already-committed documents match
+    the manifest and are skipped.
+    """
+
+    def __init__(
+        self,
+        store: AnyVectorStore,
+        embedding_backend: EmbeddingBackend,
+        manifest: IngestManifest,
+        persist_dir: Path,
+        queue_size: int = 2,
+    ) -> None:
+        self._store = store
+        self._embedding_backend = embedding_backend
+        self._manifest = manifest
+        self._persist_dir = persist_dir
+        self._queue_size = max(1, queue_size)
+
+    async def run(self, items: Iterable[IngestItem], batch_size: int) -> IngestProgress:
+        progress = IngestProgress()
+        loaded: "asyncio.Queue[object]" = asyncio.Queue(self._queue_size)
+        embedded: "asyncio.Queue[object]" = asyncio.Queue(self._queue_size)
+
+        tasks = [
+            asyncio.create_task(self._load(iter_batches(items, batch_size), loaded)),
+            asyncio.create_task(self._embed(loaded, embedded)),
+            asyncio.create_task(self._write(embedded, progress)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return progress
+
+    async def _load(self, batches: Iterator[Batch], out: "asyncio.Queue[object]") -> None:
+        # Parsing is synchronous; pull each batch on a worker thread so the
+        # event loop keeps embedding/writing the previous ones meanwhile.
+        executor = get_stage_executor()
+        while True:
+            batch = await executor.run(next, batches, None)
+            if batch is None:
+                break
+            await out.put(batch)
+        await out.put(_END)
+
+    async def _embed(self, source: "asyncio.Queue[object]", out: "asyncio.Queue[object]") -> None:
+        while True:
+            batch = await source.get()
+            if batch is _END:
+                break
+            assert isinstance(batch, Batch)
+            if batch.changes:
+                batch.embeddings = await self._embedding_backend.embed_documents(
+                    [change.doc.text for change in batch.changes]
+                )
+            await out.put(batch)
+        await out.put(_END)
+
+    async def _write(self, source: "asyncio.Queue[object]", progress: IngestProgress) -> None:
+        while True:
+            batch = await source.get()
+            if batch is _END:
+                break
+            assert isinstance(batch, Batch)
+            progress.batches += 1
+            if await self._commit(batch, progress):
+                print(progress.line())
+
+    async def _commit(self, batch: Batch, progress: IngestProgress) -> bool:
+        """Write one batch and checkpoint the manifest; False if nothing changed."""
+
+        files = self._manifest.files
+
+        if batch.changes:
+            assert batch.embeddings is not None
+            await self._store.upsert_documents([c.doc for c in batch.changes], batch.embeddings)
+            for change in batch.changes:
+                # New files get an empty sha256 until complete, so an
+                # interrupted run re-parses them.
+                entry = files.setdefault(change.file_name, FileEntry(sha256=""))
+                entry.docs[change.doc.id] = change.digest
+            progress.upserted += len(batch.changes)
+            progress.new += sum(1 for c in batch.changes if c.status == "+")
+
+        dirty = bool(batch.changes)
+        for done in batch.files_done:
+            progress.file_status[done.name] = done.status
+            if done.status == "unchanged":
+                continue
+            if done.doc_ids is None:
+                entry = files.pop(done.name, None)
+                stale = list(entry.docs) if entry is not None else []
+            else:
+                entry = files.setdefault(done.name, FileEntry(sha256=""))
+                stale = [doc_id for doc_id in entry.docs if doc_id not in done.doc_ids]
+                for doc_id in stale:
+                    del entry.docs[doc_id]
+                entry.sha256 = done.sha256
+            if stale:
+                await self._store.delete_documents(stale)
+                progress.deleted += len(stale)
+            dirty = True
+
+        if dirty:
+            # Bump before the checkpoint: once the manifest records a write,
+            # caches keyed on the index version must already see a new one.
+            # A crash in between only repeats the batch on the next run.
+            self._store.bump_index_version()
+            self._manifest.save(self._persist_dir)
+        return dirty
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from .schema import Document
+
+
+MANIFEST_NAME = "ingest_manifest.json"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_hash(doc: Document) -> str:
+    """Hash of everything that ends up in the index for a document.
+
+    Metadata is included so that e.g. a changed title or page number is
+    re-upserted even if the text itself did not change.
+    """
+
+    payload = json.dumps({"text": doc.text, "metadata": doc.to_metadata()}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FileEntry:
+    sha256: str
+    # document id -> document_hash
+    docs: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class IngestManifest:
+    """What the vector index currently contains, per source file.
+
+    Stored as JSON beside the Chroma index. Ingestion compares it to the
+    files in `ContextDocuments/` to decide which files to re-parse, which
+    documents to re-embed/upsert and which to delete.
+    """
+
+    files: Dict[str, FileEntry] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, persist_dir: Path) -> "IngestManifest":
+        path = persist_dir / MANIFEST_NAME
+        if not path.exists():
+            return cls()
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            files={
+                name: FileEntry(sha256=entry["sha256"], docs=dict(entry.get("docs", {})))
+                for name, entry in raw.get("files", {}).items()
+            }
+        )
+
+    def save(self, persist_dir: Path) -> None:
+        path = persist_dir / MANIFEST_NAME
+        tmp = path.with_suffix(".tmp")
+        payload = {
+            "files": {
+                name: {"sha256": entry.sha256, "docs": entry.docs}
+                for name, entry in sorted(self.files.items())
+            }
+        }
+        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        # Atomic replace so a crash never leaves a half-written manifest.
+        tmp.replace(path)
@@ -0,0 +1,576 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..metrics import stage_timer
+from .embeddings import EmbeddingBackend
+from .executor import StageExecutor, get_stage_executor
+from .filters import matches_where
+from .quantization import QuantizedMatrix, numpy_dtype, quantize
+from .schema import Document
+from .vector_store import SearchSpec, _to_document, _where_key
+
+
+# Metadata fields with a precomputed boolean mask per distinct value. These
+# are the fields `Retriever.build_where` filters on.
+MASKED_FIELDS = ("major", "type")
+
+_SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+
+# Compact (rewrite the live rows as a new generation) once this share of the
+# rows is dead and there are at least COMPACT_MIN_DEAD dead rows.
+COMPACT_DEAD_RATIO = 0.25
+COMPACT_MIN_DEAD = 256
+
+
+@dataclass
+class _IndexState:
+    """Immutable snapshot of the index; writers swap in a new one."""
+
+    ids: List[str]
+    texts: List[str]
+    metadatas: List[Dict[str, Any]]
+    # (count, dim) L2-normalized rows at the store's dtype; read-only
+    # memmaps once persisted.
+    vectors: QuantizedMatrix
+    # Rows replaced by a later upsert of the same ID, or deleted.
+    dead: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    # field -> value -> boolean row mask, for MASKED_FIELDS
+    masks: Dict[str, Dict[Any, np.ndarray]] = field(default_factory=dict)
+    # where key -> candidate rows (None means every row)
+    candidates: Dict[str, Optional[np.ndarray]] = field(default_factory=dict)
+    # Boolean mask of live rows; None when no row is dead.
+    alive: Optional[np.ndarray] = field(init=False, default=None)
+    # document id -> its live row
+    positions: Dict[str, int] = field(init=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if len(self.dead):
+            self.alive = np.ones(len(self.ids), dtype=bool)
+            self.alive[self.dead] = False
+        for row, doc_id in enumerate(self.ids):
+            if self.alive is None or self.alive[row]:
+                self.positions[doc_id] = row
+        for name in MASKED_FIELDS:
+            members: Dict[Any, List[int]] = {}
+            for row, metadata in enumerate(self.metadatas):
+                members.setdefault(metadata.get(name), []).append(row)
+            masks: Dict[Any, np.ndarray] = {}
+            for value, rows in members.items():
+                mask = np.zeros(len(self.ids), dtype=bool)
+                mask[rows] = True
+                masks[value] = mask
+            self.masks[name] = masks
+
+    def live_rows(self) -> np.ndarray:
+        if self.alive is None:
+            return np.arange(len(self.ids))
+        return np.flatnonzero(self.alive)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorStore:
+    """Exact (brute-force) vector index over a memory-mapped matrix.
+
+    A drop-in alternative to the Chroma-backed `VectorStore`: rows are
+    L2-normalized on write and stored at `dtype` (float32, float16 or int8),
+    and a query is one `vectors @ q` plus `argpartition`. `major` / `type`
+    filters use precomputed masks.
+
+    On disk: `vectors-<gen>.*`, `scales-<gen>.f32` (int8), `rows-<gen>.jsonl`
+    and `dead-<gen>.i64`, plus `index.json` naming the live generation and
+    file lengths. Writes append and mark replaced rows dead; mostly-dead
+    generations are compacted. The index is loaded lazily and reloaded
+    whenever `index.json` changes.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Path,
+        executor: Optional[StageExecutor] = None,
+        dtype: str = "float32",
+    ) -> None:
+        numpy_dtype(dtype)  # validate early
+        self._persist_dir = persist_dir
+        self._persist_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = executor or get_stage_executor()
+        self._dtype = dtype
+        # Held by writes and by (re)loads.
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._rows_bytes = 0
+        self._dead_count = 0
+        self._state: Optional[_IndexState] = None
+        # Identity of the `index.json` the state was loaded from.
+        self._header_stamp: Optional[Tuple[int, int, int]] = None
+
+    @property
+    def persist_dir(self) -> Path:
+        return self._persist_dir
+
+    @property
+    def dtype(self) -> str:
+        return self._dtype
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    async def open(self) -> None:
+        """Load the index on the executor (startup warmup)."""
+
+        await self._snapshot()
+
+    async def memory_stats(self) -> Dict[str, int]:
+        """Vector bytes held by the index (excluding texts and metadata)."""
+
+        state = await self._snapshot()
+        vectors = state.vectors
+        return {
+            "documents": len(state.positions),
+            "vector_bytes": vectors.nbytes,
+            "bytes_per_document": vectors.nbytes // len(vectors) if len(vectors) else 0,
+        }
+
+    # --- Persistence ---------------------------------------------------
+
+    @property
+    def _index_path(self) -> Path:
+        return self._persist_dir / "index.json"
+
+    def _vectors_path(self, generation: int, dtype: str) -> Path:
+        return self._persist_dir / f"vectors-{generation}.{_SUFFIXES[dtype]}"
+
+    def _scales_path(self, generation: int) -> Path:
+        return self._persist_dir / f"scales-{generation}.f32"
+
+    def _rows_path(self, generation: int) -> Path:
+        return self._persist_dir / f"rows-{generation}.jsonl"
+
+    def _dead_path(self, generation: int) -> Path:
+        return self._persist_dir / f"dead-{generation}.i64"
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self._index_path.stat()
+        except FileNotFoundError:
+            return None
+        # `index.json` is replaced, never edited: a new inode per write.
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _current(self) -> _IndexState:
+        """The loaded index, (re)loaded if `index.json` changed since.
+
+        A stat per call, so a server picks up an ingest run in another
+        process on its next query.
+        """
+
+        stamp = self._stamp()
+        state = self._state
+        if state is not None and stamp == self._header_stamp:
+            return state
+        with self._lock:
+            stamp = self._stamp()
+            if self._state is None or stamp != self._header_stamp:
+                self._state = self._load()
+                self._header_stamp = stamp
+            return self._state
+
+    async def _snapshot(self) -> _IndexState:
+        """`_current()` for the event loop: a (re)load runs on the executor."""
+
+        state = self._state
+        if state is not None and self._stamp() == self._header_stamp:
+            return state
+        return await self._executor.run(self._current)
+
+    def _load(self) -> _IndexState:
+        if not self._index_path.exists():
+            self._generation = self._rows_bytes = self._dead_count = 0
+            empty = QuantizedMatrix(self._dtype, np.zeros((0, 0), dtype=numpy_dtype(self._dtype)))
+            if self._dtype == "int8":
+                empty.scales = np.zeros(0, dtype=np.float32)
+            return _IndexState(ids=[], texts=[], metadatas=[], vectors=empty)
+
+        header = json.loads(self._index_path.read_text(encoding="utf-8"))
+        self._generation = int(header["generation"])
+        self._rows_bytes = int(header["rows_bytes"])
+        self._dead_count = int(header.get("dead", 0))
+        # Indexes written before quantization support have no dtype.
+        stored_dtype = header.get("dtype", "float32")
+        count, dim = int(header["count"]), int(header["dim"])
+
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        with self._rows_path(self._generation).open("rb") as f:
+            # Bytes past `rows_bytes` are from an append that never committed.
+            for line in f.read(self._rows_bytes).splitlines():
+                row = json.loads(line)
+                ids.append(row["id"])
+                texts.append(row["text"])
+                metadatas.append(row["metadata"])
+
+        dead = np.zeros(0, dtype=np.int64)
+        if self._dead_count:
+            dead = np.fromfile(self._dead_path(self._generation), dtype=np.int64, count=self._dead_count)
+        return _IndexState(ids, texts, metadatas, self._map_vectors(stored_dtype, count, dim), dead)
+
+    def _map_vectors(self, dtype: str, count: int, dim: int) -> QuantizedMatrix:
+        np_dtype = numpy_dtype(dtype)
+        if count == 0:
+            data = np.zeros((0, dim), dtype=np_dtype)
+            scales = np.zeros(0, dtype=np.float32) if dtype == "int8" else None
+            return QuantizedMatrix(dtype, data, scales)
+        data = np.memmap(self._vectors_path(self._generation, dtype), dtype=np_dtype, mode="r", shape=(count, dim))
+        scales = None
+        if dtype == "int8":
+            scales = np.memmap(self._scales_path(self._generation), dtype=np.float32, mode="r", shape=(count,))
+        return QuantizedMatrix(dtype, data, scales)
+
+    def _write_header(self, dtype: str, count: int, dim: int) -> None:
+        tmp = self._index_path.with_suffix(".tmp")
+        payload = {
+            "generation": self._generation,
+            "dtype": dtype,
+            "dim": dim,
+            "count": count,
+            "rows_bytes": self._rows_bytes,
+            "dead": self._dead_count,
+        }
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        tmp.replace(self._index_path)
+        self._header_stamp = self._stamp()
+
+    @staticmethod
+    def _encode_rows(ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> bytes:
+        return b"".join(
+            json.dumps({"id": i, "text": t, "metadata": m}).encode("utf-8") + b"\n"
+            for i, t, m in zip(ids, texts, metadatas)
+        )
+
+    def _append(
+        self,
+        state: _IndexState,
+        docs: List[Document],
+        vectors: Optional[QuantizedMatrix],
+        dead_rows: Sequence[int] = (),
+    ) -> _IndexState:
+        """Append `docs` as new rows and mark `dead_rows` dead, in the current generation."""
+
+        dtype = state.vectors.dtype
+        count = len(state.ids)
+        dim = vectors.dim if vectors is not None and docs else state.vectors.dim
+        # Truncate first: a crashed append may have left uncommitted bytes.
+        if docs:
+            assert vectors is not None
+            item_size = numpy_dtype(dtype).itemsize
+            rows = self._encode_rows([d.id for d in docs], [d.text for d in docs], [d.to_metadata() for d in docs])
+            with self._vectors_path(self._generation, dtype).open("ab") as f:
+                f.truncate(count * dim * item_size)
+                f.write(np.ascontiguousarray(vectors.data).tobytes())
+            if vectors.scales is not None:
+                with self._scales_path(self._generation).open("ab") as f:
+                    f.truncate(count * 4)
+                    f.write(np.ascontiguousarray(vectors.scales, dtype=np.float32).tobytes())
+            with self._rows_path(self._generation).open("ab") as f:
+                f.truncate(self._rows_bytes)
+                f.write(rows)
+            self._rows_bytes += len(rows)
+        dead = np.asarray(dead_rows, dtype=np.int64)
+        if len(dead):
+            with self._dead_path(self._generation).open("ab") as f:
+                f.truncate(self._dead_count * 8)
+                f.write(dead.tobytes())
+            self._dead_count += len(dead)
+        self._write_header(dtype, count + len(docs), dim)
+        return _IndexState(
+            ids=state.ids + [d.id for d in docs],
+            texts=state.texts + [d.text for d in docs],
+            metadatas=state.metadatas + [d.to_metadata() for d in docs],
+            vectors=self._map_vectors(dtype, count + len(docs), dim) if docs else state.vectors,
+            dead=np.concatenate([state.dead, dead]),
+        )
+
+    def _rewrite(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: QuantizedMatrix,
+        old_dtype: str,
+    ) -> _IndexState:
+        old = self._generation
+        self._generation += 1
+        rows = self._encode_rows(ids, texts, metadatas)
+        self._vectors_path(self._generation, vectors.dtype).write_bytes(np.ascontiguousarray(vectors.data).tobytes())
+        if vectors.scales is not None:
+            self._scales_path(self._generation).write_bytes(
+                np.ascontiguousarray(vectors.scales, dtype=np.float32).tobytes()
+            )
+        self._rows_path(self._generation).write_bytes(rows)
+        self._rows_bytes = len(rows)
+        self._dead_count = 0
+        self._write_header(vectors.dtype, len(ids), vectors.dim)
+        for path in (
+            self._vectors_path(old, old_dtype),
+            self._scales_path(old),
+            self._rows_path(old),
+            self._dead_path(old),
+        ):
+            path.unlink(missing_ok=True)
+        return _IndexState(ids, texts, metadatas, self._map_vectors(vectors.dtype, len(ids), vectors.dim))
+
+    def _compact(self, state: _IndexState) -> _IndexState:
+        """Rewrite the live rows, at the store's dtype, as a new generation."""
+
+        live = state.live_rows()
+        vectors = state.vectors.take(live)
+        if vectors.dtype != self._dtype:
+            # Going up in precision keeps the old quantization error; run a
+            # `--full` ingest for exact vectors.
+            vectors = quantize(vectors.dequantize(), self._dtype)
+        return self._rewrite(
+            [state.ids[row] for row in live],
+            [state.texts[row] for row in live],
+            [state.metadatas[row] for row in live],
+            vectors,
+            old_dtype=state.vectors.dtype,
+        )
+
+    def _writable(self) -> _IndexState:
+        state = self._current()
+        if state.vectors.dtype != self._dtype:
+            state = self._compact(state)
+        return state
+
+    def _maybe_compact(self, state: _IndexState) -> _IndexState:
+        dead = len(state.dead)
+        if dead >= COMPACT_MIN_DEAD and dead > COMPACT_DEAD_RATIO * len(state.ids):
+            return self._compact(state)
+        return state
+
+    # --- Index version (same contract as VectorStore) -------------------
+
+    @property
+    def _version_path(self) -> Path:
+        return self._persist_dir / "index_version"
+
+    def index_version(self) -> str:
+        try:
+            return str(self._version_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return ""
+
+    def bump_index_version(self) -> None:
+        self._version_path.write_text(str(time.time_ns()))
+
+    # --- Writes --------------------------------------------------------
+
+    def _upsert(self, docs: List[Document], embeddings: List[List[float]]) -> None:
+        normalized = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(docs), -1))
+        with self._lock:
+            state = self._writable()
+            if state.ids and normalized.shape[1] != state.vectors.dim:
+                raise ValueError(
+                    f"Embedding dimension {normalized.shape[1]} does not match the index ({state.vectors.dim})"
+                )
+            # Last write wins for IDs repeated within one call, as in Chroma.
+            latest = {d.id: i for i, d in enumerate(docs)}
+            docs = [docs[i] for i in latest.values()]
+            vectors = quantize(normalized[list(latest.values())], self._dtype)
+            replaced = [state.positions[d.id] for d in docs if d.id in state.positions]
+            self._state = self._maybe_compact(self._append(state, docs, vectors, replaced))
+
+    def _delete(self, ids: List[str]) -> None:
+        with self._lock:
+            state = self._writable()
+            rows = sorted({state.positions[doc_id] for doc_id in ids if doc_id in state.positions})
+            if not rows:
+                return
+            self._state = self._maybe_compact(self._append(state, [], None, rows))
+
+    async def add_documents(self, docs: List[Document], embeddings: List[List[float]]) -> None:
+        await self.upsert_documents(docs, embeddings)
+
+    async def upsert_documents(self, docs: List[Document], embeddings: List[List[float]]) -> None:
+        """Insert or replace documents by ID (idempotent re-ingestion)."""
+
+        if not docs:
+            return
+        await self._executor.run(self._upsert, docs, embeddings)
+
+    async def delete_documents(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        await self._executor.run(self._delete, ids)
+
+    # --- Search --------------------------------------------------------
+
+    @staticmethod
+    def _mask(state: _IndexState, where: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(state.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= NumpyVectorStore._mask(state, clause)
+            elif key == "$or":
+                any_mask = np.zeros(len(state.ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= NumpyVectorStore._mask(state, clause)
+                mask &= any_mask
+            else:
+                mask &= NumpyVectorStore._field_mask(state, key, condition)
+        return mask
+
+    @staticmethod
+    def _field_mask(state: _IndexState, key: str, condition: Any) -> np.ndarray:
+        values = state.masks.get(key)
+        none = np.zeros(len(state.ids), dtype=bool)
+        if values is not None:
+            if not isinstance(condition, dict):
+                return values.get(condition, none)
+            if set(condition) <= {"$eq", "$in"}:
+                mask = np.ones(len(state.ids), dtype=bool)
+                if "$eq" in condition:
+                    mask &= values.get(condition["$eq"], none)
+                if "$in" in condition:
+                    any_mask = none.copy()
+                    for value in condition["$in"]:
+                        any_mask |= values.get(value, none)
+                    mask &= any_mask
+                return mask
+        clause = {key: condition}
+        return np.fromiter((matches_where(m, clause) for m in state.metadatas), dtype=bool, count=len(state.ids))
+
+    def _candidates(self, state: _IndexState, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not where:
+            if state.alive is None:
+                return None
+            key = ""
+        else:
+            key = _where_key(where)
+        if key not in state.candidates:
+            mask = self._mask(state, where) if where else np.ones(len(state.ids), dtype=bool)
+            if state.alive is not None:
+                mask &= state.alive
+            state.candidates[key] = np.flatnonzero(mask)
+        return state.candidates[key]
+
+    def search_vectors(
+        self,
+        queries: np.ndarray,
+        ks: Sequence[int],
+        wheres: Sequence[Optional[Dict[str, Any]]],
+    ) -> List[List[Tuple[int, float]]]:
+        """Exact top-k `(row, cosine)` pairs for each query row (synchronous).
+
+        All queries are scored in one pass over the stored matrix; each is then
+        restricted to its filter's candidate rows and ranked with
+        `argpartition`, so only the top `k` scores are ever sorted.
+        """
+
+        return self._search(self._current(), queries, ks, wheres)
+
+    def _search(
+        self,
+        state: _IndexState,
+        queries: np.ndarray,
+        ks: Sequence[int],
+        wheres: Sequence[Optional[Dict[str, Any]]],
+    ) -> List[List[Tuple[int, float]]]:
+        if not state.positions:
+            return [[] for _ in ks]
+        with stage_timer("vector_query"):
+            return self._rank(state, queries, ks, wheres)
+
+    def _rank(
+        self,
+        state: _IndexState,
+        queries: np.ndarray,
+        ks: Sequence[int],
+        wheres: Sequence[Optional[Dict[str, Any]]],
+    ) -> List[List[Tuple[int, float]]]:
+        scores = state.vectors.score(_normalize(queries))
+
+        results: List[List[Tuple[int, float]]] = []
+        for row_scores, k, where in zip(scores, ks, wheres):
+            rows = self._candidates(state, where)
+            candidate_scores = row_scores if rows is None else row_scores[rows]
+            k = min(k, candidate_scores.shape[0])
+            if k <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            top = top[np.argsort(-candidate_scores[top], kind="stable")]
+            hits = top if rows is None else rows[top]
+            results.append([(int(r), float(candidate_scores[t])) for r, t in zip(hits, top)])
+        return results
+
+    async def similarity_search(
+        self,
+        embedding_backend: Optional[EmbeddingBackend],
+        query: str,
+        k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        spec = SearchSpec(k=k, where=where, query=query, query_embedding=query_embedding)
+        return (await self.similarity_search_many(embedding_backend, [spec]))[0]
+
+    async def similarity_search_many(
+        self,
+        embedding_backend: Optional[EmbeddingBackend],
+        specs: Sequence[SearchSpec],
+    ) -> List[List[Document]]:
+        """Same contract as `VectorStore.similarity_search_many`.
+
+        Filters do not need grouping here: every spec shares one matrix
+        product regardless of its `where`.
+        """
+
+        if not specs:
+            return []
+        embeddings: List[Optional[List[float]]] = [s.query_embedding for s in specs]
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+        if missing:
+            assert embedding_backend is not None, "an embedding backend is needed for specs without embeddings"
+            computed = await embedding_backend.embed_documents([specs[i].query for i in missing])
+            for i, vector in zip(missing, computed):
+                embeddings[i] = vector
+
+        state = await self._snapshot()
+        queries = np.asarray(embeddings, dtype=np.float32)
+        # Search and map rows through one snapshot, even if a write swaps it.
+        hits = await self._executor.run(
+            self._search, state, queries, [s.k for s in specs], [s.where for s in specs]
+        )
+        results: List[List[Document]] = []
+        for rows in hits:
+            vectors = state.vectors.take([row for row, _ in rows]).dequantize()
+            results.append(
+                [
+                    _to_document(state.ids[row], state.texts[row], state.metadatas[row], vector)
+                    for (row, _), vector in zip(rows, vectors)
+                ]
+            )
+        return results
+
+    async def all_documents(self) -> List[Document]:
+        """Every document in the index (used to build the BM25 index)."""
+
+        state = await self._snapshot()
+        return [_to_document(state.ids[row], state.texts[row], state.metadatas[row]) for row in state.live_rows()]
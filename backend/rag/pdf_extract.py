@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pypdf import PdfReader
+
+from .manifest import file_sha256
+
+
+logger = logging.getLogger(__name__)
+
+# Extracted page text, one JSON file per PDF content hash. Unchanged handbooks
+# are served from here without opening them in pypdf at all.
+PAGE_CACHE_DIR = Path(__file__).resolve().parent.parent / ".pdf_page_cache"
+
+# Below this many uncached pages, extraction runs inline: spinning up worker
+# processes costs more than it saves.
+_MIN_PAGES_FOR_POOL = 8
+
+
+def _extract_range(path: str, start: int, stop: int) -> Tuple[List[str], List[int]]:
+    """Extract text for pages [start, stop) of one PDF (runs in a worker).
+
+    Returns the page texts and the indices of pages whose extraction failed
+    (their text is "").
+    """
+
+    reader = PdfReader(path)
+    texts: List[str] = []
+    failed: List[int] = []
+    for i in range(start, stop):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            logger.warning("Could not extract page %d of %s", i + 1, path, exc_info=True)
+            texts.append("")
+            failed.append(i)
+    return texts, failed
+
+
+def _load_cached(cache_dir: Path, sha: str) -> Optional[List[str]]:
+    path = cache_dir / f"{sha}.json"
+    if not path.exists():
+        return None
+    try:
+        return list(json.loads(path.read_text(encoding="utf-8"))["pages"])
+    except (ValueError, KeyError):
+        return None
+
+
+def _store_cached(cache_dir: Path, sha: str, pages: List[str]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f"{sha}.json.tmp"
+    tmp.write_text(json.dumps({"pages": pages}), encoding="utf-8")
+    tmp.replace(cache_dir / f"{sha}.json")
+
+
+def extract_pdf_pages(
+    paths: Sequence[Path],
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[Path] = PAGE_CACHE_DIR,
+    failed_pages: Optional[Dict[Path, List[int]]] = None,
+) -> Dict[Path, List[str]]:
+    """Return the text of every page (index = page number - 1) for each PDF.
+
+    Pages of PDFs not found in the on-disk cache are split into contiguous
+    page ranges and fanned out over a process pool *across all PDFs at once*,
+    so total extraction time scales with core count rather than with the
+    size of the largest handbook.
+
+    A page that fails to extract (a pypdf error, a crashed worker) is
+    returned as "" and listed in `failed_pages`, if given. A PDF with failed
+    pages is not cached, so the next call extracts it again.
+    """
+
+    results: Dict[Path, List[str]] = {}
+    # (path, sha, page_count) for PDFs that need extracting
+    todo: List[Tuple[Path, str, int]] = []
+
+    for path in paths:
+        sha = file_sha256(path)
+        cached = _load_cached(cache_dir, sha) if cache_dir is not None else None
+        if cached is not None:
+            results[path] = cached
+        else:
+            todo.append((path, sha, len(PdfReader(str(path)).pages)))
+
+    if not todo:
+        return results
+
+    workers = max_workers or os.cpu_count() or 1
+    total_pages = sum(count for _, _, count in todo)
+
+    # Roughly `workers` equal-sized ranges overall, never splitting below one page.
+    span = max(1, -(-total_pages // workers))
+    jobs: List[Tuple[Path, int, int]] = []
+    for path, _, count in todo:
+        for start in range(0, count, span):
+            jobs.append((path, start, min(count, start + span)))
+
+    pages_by_path: Dict[Path, List[str]] = {path: [""] * count for path, _, count in todo}
+    failed_by_path: Dict[Path, List[int]] = {path: [] for path, _, _ in todo}
+    if workers == 1 or total_pages < _MIN_PAGES_FOR_POOL:
+        for path, start, stop in jobs:
+            texts, failed = _extract_range(str(path), start, stop)
+            pages_by_path[path][start:stop] = texts
+            failed_by_path[path].extend(failed)
+    else:
+        # Ingest runs this on a StageExecutor thread; forking a process with
+        # live threads can deadlock the child on a lock held at fork time.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+            futures = [
+                (path, start, stop, pool.submit(_extract_range, str(path), start, stop))
+                for path, start, stop in jobs
+            ]
+            for path, start, stop, future in futures:
+                try:
+                    texts, failed = future.result()
+                except Exception:
+                    # A dead worker (BrokenProcessPool, MemoryError, ...) loses the whole range.
+                    logger.warning("Could not extract pages %d-%d of %s", start + 1, stop, path, exc_info=True)
+                    failed = list(range(start, stop))
+                else:
+                    pages_by_path[path][start:stop] = texts
+                failed_by_path[path].extend(failed)
+
+    for path, sha, _ in todo:
+        pages = pages_by_path[path]
+        failed = sorted(failed_by_path[path])
+        if failed:
+            logger.warning(
+                "%d of %d page(s) of %s failed to extract; not caching it so they are retried",
+                len(failed),
+                len(pages),
+                path.name,
+            )
+            if failed_pages is not None:
+                failed_pages[path] = failed
+        elif cache_dir is not None:
+            _store_cached(cache_dir, sha, pages)
+        results[path] = pages
+
+    return results
@@ -0,0 +1,533 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog import COURSE_CODE_RE, normalize_course_code, parse_course_code
+from .schema import Document
+
+
+PREREQ_GRAPH_NAME = "prereq_graph.json"
+
+SEASONS = ("Fall", "Spring")
+
+# Subject names used in prerequisite prose -> catalog subject codes. Longer
+# names are replaced first ("Mechanical Engineering" before "Engineering").
+SUBJECT_NAMES: Dict[str, str] = {
+    "Civil and Environmental Engineering": "CEE",
+    "Civil & Environmental Engineering": "CEE",
+    "Electrical and Computer Engineering": "ECE",
+    "Electrical & Computer Engineering": "ECE",
+    "Biomedical Engineering": "BME",
+    "Mechanical Engineering": "ME",
+    "Computer Science": "COMPSCI",
+    "CompSci": "COMPSCI",
+    "Statistical Science": "STA",
+    "StatSci": "STA",
+    "Engineering": "EGR",
+    "Mathematics": "MATH",
+    "Math": "MATH",
+    "Physics": "PHYSICS",
+    "Chemistry": "CHEM",
+    "Chem": "CHEM",
+    "Statistics": "STA",
+    "Biology": "BIOLOGY",
+    "Environment": "ENVIRON",
+}
+_SUBJECT_NAME_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(name) for name in sorted(SUBJECT_NAMES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_SUBJECT_BY_LOWER = {name.lower(): code for name, code in SUBJECT_NAMES.items()}
+
+# Catalog subjects whose course rows are ingested without a major (their
+# subject code is not a major code).
+SUBJECT_MAJORS: Dict[str, str] = {"CEE": "CEE_ENV"}
+
+_LABEL_RE = re.compile(
+    r"(co-?requisites?\s+or\s+prerequisites?|co-?\s*/\s*prerequisites?|prerequisites?|co-?requisites?)\s*:",
+    re.IGNORECASE,
+)
+# Parenthetical asides without course numbers: curriculum codes such as
+# "(GE, MC)" or remarks such as "(R preferred; Stata acceptable)".
+_ASIDE_RE = re.compile(r"\s*\([^()\d]*\)")
+# A course number and the word right before it: "BME 244L", "EGR103", or a
+# bare "353A" / "or 353A" that inherits the previous subject.
+_REF_RE = re.compile(r"(?:\b([A-Za-z]+)\s*)?(?<!\d)(\d{2,3}[A-Z]{0,2})\b")
+_SUBJECT_CODE_RE = re.compile(r"[A-Z]{2,8}")
+_ALTERNATIVES_RE = re.compile(r"\b(?:either|one of|any of)\b", re.IGNORECASE)
+_CONNECTOR_WORDS = {"and", "or", "one", "of", "either", "both"}
+
+
+@dataclass
+class CourseNode:
+    code: str
+    title: Optional[str] = None
+    major: Optional[str] = None
+    # Seasons the course is typically offered; empty = unknown / any term.
+    offered: List[str] = field(default_factory=list)
+    # AND of OR-groups: every group needs one of its courses.
+    prereqs: List[List[str]] = field(default_factory=list)
+    # Same shape; may also be taken in the same semester.
+    coreqs: List[List[str]] = field(default_factory=list)
+    # Non-course conditions ("consent of instructor", "junior standing").
+    notes: List[str] = field(default_factory=list)
+
+
+def parse_offered(raw: Optional[str]) -> List[str]:
+    """ "Fall Only" -> ["Fall"], "Fall and/or Spring" -> both, else unknown ([])."""
+
+    text = (raw or "").lower()
+    return [season for season in SEASONS if season.lower() in text]
+
+
+def _split_top_level(text: str, sep: str) -> List[str]:
+    parts: List[str] = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0 and text.startswith(sep, i):
+            parts.append(text[start:i])
+            i += len(sep)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _unwrap(text: str) -> str:
+    """Drop parentheses enclosing all of `text`, keeping inner ones balanced."""
+
+    text = text.strip()
+    while text.startswith("(") and text.endswith(")") and len(_split_top_level(text[1:-1], ")")) == 1:
+        text = text[1:-1].strip()
+    return text
+
+
+def _requirement_parts(text: str) -> List[str]:
+    """Split a clause into its ANDed requirements.
+
+    ";", " and " and " & " separate requirements. A comma list is one
+    requirement ("A, B, or C", "either of A, B or C") unless an item has
+    its own "or", as in "ECE 280L, Math 212 or 219", where each item is a
+    requirement.
+    """
+
+    parts: List[str] = []
+    for clause in _split_top_level(text, ";"):
+        for conjunct in _split_top_level(clause, " and "):
+            for part in _split_top_level(conjunct, " & "):
+                items = [item.strip() for item in _split_top_level(part, ",")]
+                if (
+                    len(items) > 1
+                    and not _ALTERNATIVES_RE.search(part)
+                    and any(re.search(r"\S\s+or\b", item) for item in items)
+                ):
+                    parts.extend(items)
+                else:
+                    parts.append(part)
+    return [stripped for stripped in (part.strip(" ,;") for part in parts) if stripped]
+
+
+def _parse_clause(text: str) -> Tuple[List[List[str]], List[str]]:
+    """Parse one requirement clause into AND-of-OR course groups plus notes.
+
+    Requirements are split by `_requirement_parts`. Within a part, "or" /
+    "one of" makes the listed courses alternatives, otherwise a comma list
+    is a list of required courses. Bare numbers inherit the last subject
+    seen, so "Chemistry 20, 21, or 101DL" is CHEM 20 | CHEM 21 | CHEM 101DL;
+    a number after any other word ("Neuroscience 101", "any 200-level")
+    is not a course reference and clears the inherited subject.
+    """
+
+    text = _ASIDE_RE.sub("", text)
+    text = _SUBJECT_NAME_RE.sub(lambda m: _SUBJECT_BY_LOWER[m.group(0).lower()], text)
+    groups: List[List[str]] = []
+    notes: List[str] = []
+    subject: Optional[str] = None
+
+    for part in _requirement_parts(text):
+        codes: List[str] = []
+        # Text outside course references, for the non-course notes.
+        leftover: List[str] = []
+        last = 0
+        for match in _REF_RE.finditer(part):
+            word, number = match.group(1), match.group(2)
+            if word and _SUBJECT_CODE_RE.fullmatch(word):
+                subject = word
+            elif word is not None and word.lower() not in _CONNECTOR_WORDS:
+                subject = None
+                continue
+            leftover.append(part[last:match.start()])
+            last = match.end()
+            if subject is None:
+                continue
+            code = normalize_course_code(f"{subject} {number}")
+            if code and code not in codes:
+                codes.append(code)
+        leftover.append(part[last:])
+
+        words = [w for w in re.findall(r"[A-Za-z]+", " ".join(leftover)) if w.lower() not in _CONNECTOR_WORDS]
+        if words:
+            notes.append(re.sub(r"^or\s+", "", _unwrap(part)))
+
+        if not codes:
+            continue
+        if re.search(r"\bor\b", part, re.IGNORECASE) or _ALTERNATIVES_RE.search(part):
+            groups.append(codes)
+        else:
+            groups.extend([code] for code in codes)
+    return groups, notes
+
+
+def parse_requirements(description: str) -> Tuple[List[List[str]], List[List[str]], List[str]]:
+    """Extract (prereqs, coreqs, notes) from a course description."""
+
+    prereqs: List[List[str]] = []
+    coreqs: List[List[str]] = []
+    notes: List[str] = []
+    labels = list(_LABEL_RE.finditer(description))
+    for i, label in enumerate(labels):
+        end = labels[i + 1].start() if i + 1 < len(labels) else len(description)
+        clause = description[label.end():end]
+        # The clause runs to the end of its sentence.
+        clause = re.split(r"\.(?:\s|$)", clause, maxsplit=1)[0].strip(" ,;")
+        # "A and co-/prerequisite: B": the "and" belongs to neither clause.
+        clause = re.sub(r"\s+(?:and|or)$", "", clause, flags=re.IGNORECASE)
+        groups, clause_notes = _parse_clause(clause)
+        # "Corequisite", "Co-requisite or prerequisite" and "Co-/prerequisite"
+        # courses may all be taken alongside the course.
+        if label.group(1).lower().startswith("co"):
+            coreqs.extend(groups)
+        else:
+            prereqs.extend(groups)
+        notes.extend(clause_notes)
+    return prereqs, coreqs, notes
+
+
+def parse_term(raw: Optional[str]) -> Tuple[str, Optional[int]]:
+    """ "Spring 2026" -> ("Spring", 2026); defaults to the fall term."""
+
+    text = raw or ""
+    season = next((s for s in SEASONS if s.lower() in text.lower()), "Fall")
+    year = re.search(r"\b(20\d{2})\b", text)
+    return season, int(year.group(1)) if year else None
+
+
+def _term_label(season: str, year: Optional[int], index: int) -> str:
+    return f"{season} {year}" if year is not None else f"{season} (semester {index + 1})"
+
+
+def _next_term(season: str, year: Optional[int]) -> Tuple[str, Optional[int]]:
+    if season == "Fall":
+        return "Spring", (year + 1) if year is not None else None
+    return "Fall", year
+
+
+@dataclass
+class SemesterPlan:
+    terms: List[Tuple[str, List[str]]]
+    unscheduled: List[str]
+
+
+class PrereqGraph:
+    """Prerequisite DAG over the catalog courses, built at ingest time.
+
+    Nodes are catalog courses; edges come from the "Prerequisite:" /
+    "Corequisite:" prose of their descriptions. Courses referenced but not
+    in the catalog (e.g. MATH 216) are leaves with no known prerequisites
+    that can be taken in any term. All queries are plain graph walks: no
+    embeddings and no LLM.
+    """
+
+    def __init__(self, courses: Dict[str, CourseNode]) -> None:
+        self.courses = courses
+        self._by_number: Dict[str, str] = {}
+        for code in courses:
+            parts = parse_course_code(code)
+            if parts is not None:
+                self._by_number.setdefault(parts[0] + parts[1], code)
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Document]) -> "PrereqGraph":
+        courses: Dict[str, CourseNode] = {}
+        for doc in docs:
+            code = normalize_course_code(doc.code or "")
+            if code is None or code in courses:
+                continue
+            prereqs, coreqs, notes = parse_requirements(doc.text)
+            major = doc.major
+            if major in (None, "ALL"):
+                major = SUBJECT_MAJORS.get(code.split()[0], major)
+            courses[code] = CourseNode(
+                code=code,
+                title=doc.title,
+                major=major,
+                offered=parse_offered(doc.metadata.get("offered")),
+                prereqs=prereqs,
+                coreqs=coreqs,
+                notes=notes,
+            )
+        return cls(courses)
+
+    @classmethod
+    def load(cls, persist_dir: Path) -> Optional["PrereqGraph"]:
+        path = persist_dir / PREREQ_GRAPH_NAME
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return cls({code: CourseNode(**node) for code, node in raw.get("courses", {}).items()})
+
+    def save(self, persist_dir: Path) -> None:
+        path = persist_dir / PREREQ_GRAPH_NAME
+        tmp = path.with_suffix(".tmp")
+        payload = {"courses": {code: asdict(node) for code, node in sorted(self.courses.items())}}
+        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def resolve(self, raw: str) -> Optional[str]:
+        """Graph code for a loosely written course code ("ece280" -> "ECE 280L")."""
+
+        code = normalize_course_code(raw)
+        if code is None:
+            return None
+        if code in self.courses:
+            return code
+        parts = parse_course_code(code)
+        return self._by_number.get(parts[0] + parts[1], code) if parts else code
+
+    def mentioned_in(self, text: str) -> List[str]:
+        found: List[str] = []
+        for match in COURSE_CODE_RE.finditer(text):
+            code = self.resolve(match.group(0))
+            if code in self.courses and code not in found:
+                found.append(code)
+        return found
+
+    def completed_set(self, completed: Iterable[str]) -> Set[str]:
+        """Resolve a profile's completed-course strings to graph codes."""
+
+        done: Set[str] = set()
+        for raw in completed:
+            code = self.resolve(raw)
+            if code:
+                done.add(code)
+        return done
+
+    @staticmethod
+    def _satisfied(groups: List[List[str]], done: Set[str]) -> bool:
+        return all(any(code in done for code in group) for group in groups)
+
+    def _offered_in(self, code: str, season: Optional[str]) -> bool:
+        node = self.courses.get(code)
+        return season is None or node is None or not node.offered or season in node.offered
+
+    def eligible(
+        self,
+        completed: Iterable[str],
+        season: Optional[str] = None,
+        major: Optional[str] = None,
+    ) -> List[str]:
+        """Courses whose prerequisites are all met (corequisites may be taken alongside)."""
+
+        done = self.completed_set(completed)
+        return sorted(
+            code
+            for code, node in self.courses.items()
+            if code not in done
+            and (major is None or node.major == major)
+            and self._satisfied(node.prereqs, done)
+            and self._offered_in(code, season)
+        )
+
+    def chain(self, target: str, completed: Iterable[str] = ()) -> Optional[List[str]]:
+        """Shortest sequence of courses to take to reach `target`, in prerequisite order.
+
+        For every OR-group the alternative needing the fewest additional
+        courses is chosen. Returns None if `target` is unreachable (cycle).
+        """
+
+        code = self.resolve(target)
+        if code is None:
+            return None
+        memo: Dict[str, Optional[List[str]]] = {}
+        return self._chain(code, self.completed_set(completed), memo, set())
+
+    def _chain(
+        self,
+        code: str,
+        done: Set[str],
+        memo: Dict[str, Optional[List[str]]],
+        visiting: Set[str],
+    ) -> Optional[List[str]]:
+        if code in done:
+            return []
+        if code in memo:
+            return memo[code]
+        if code in visiting:
+            return None
+
+        visiting.add(code)
+        node = self.courses.get(code)
+        sequence: List[str] = []
+        for group in (node.prereqs + node.coreqs) if node else []:
+            options = [self._chain(alt, done, memo, visiting) for alt in group]
+            best = min((o for o in options if o is not None), key=len, default=None)
+            if best is None:
+                visiting.discard(code)
+                memo[code] = None
+                return None
+            sequence.extend(c for c in best if c not in sequence)
+        visiting.discard(code)
+        sequence.append(code)
+        memo[code] = sequence
+        return sequence
+
+    def plan(
+        self,
+        targets: Iterable[str],
+        completed: Iterable[str] = (),
+        start_term: Optional[str] = None,
+        max_per_term: int = 4,
+        max_terms: int = 8,
+    ) -> SemesterPlan:
+        """Topologically ordered semester plan reaching every target.
+
+        Each term takes up to `max_per_term` courses whose prerequisites
+        were finished in earlier terms (corequisites: same term is fine)
+        and that are typically offered in that season. Courses on the
+        longest remaining prerequisite path are scheduled first.
+        """
+
+        done = self.completed_set(completed)
+        needed: List[str] = []
+        for target in targets:
+            sequence = self.chain(target, done)
+            if sequence:
+                needed.extend(c for c in sequence if c not in needed)
+
+        dependents: Dict[str, Set[str]] = {code: set() for code in needed}
+        for code in needed:
+            node = self.courses.get(code)
+            for group in node.prereqs if node else []:
+                for alt in group:
+                    if alt in dependents:
+                        dependents[alt].add(code)
+
+        depth: Dict[str, int] = {}
+
+        def path_length(code: str) -> int:
+            if code not in depth:
+                depth[code] = 0
+                depth[code] = 1 + max((path_length(d) for d in dependents[code]), default=0)
+            return depth[code]
+
+        season, year = parse_term(start_term)
+        remaining = list(needed)
+        terms: List[Tuple[str, List[str]]] = []
+        for index in range(max_terms):
+            if not remaining:
+                break
+            this_term: List[str] = []
+            candidates = sorted(remaining, key=lambda c: (-path_length(c), needed.index(c)))
+            for code in candidates:
+                if len(this_term) >= max_per_term:
+                    break
+                node = self.courses.get(code)
+                if node is not None:
+                    if not self._satisfied(node.prereqs, done):
+                        continue
+                    if not self._satisfied(node.coreqs, done | set(this_term)):
+                        continue
+                if not self._offered_in(code, season):
+                    continue
+                this_term.append(code)
+            terms.append((_term_label(season, year, index), this_term))
+            done.update(this_term)
+            remaining = [c for c in remaining if c not in this_term]
+            season, year = _next_term(season, year)
+
+        # Trailing empty terms add nothing.
+        while terms and not terms[-1][1]:
+            terms.pop()
+        return SemesterPlan(terms=terms, unscheduled=remaining)
+
+    def describe(self, code: str) -> str:
+        node = self.courses.get(code)
+        if node is None:
+            return code
+        parts = [" or ".join(group) for group in node.prereqs]
+        text = f"{code} requires: " + ("; ".join(parts) if parts else "no course prerequisites")
+        if node.coreqs:
+            text += " | with/before: " + "; ".join(" or ".join(group) for group in node.coreqs)
+        if node.offered:
+            text += f" | offered: {'/'.join(node.offered)}"
+        if node.notes:
+            text += f" | notes: {'; '.join(node.notes)}"
+        return text
+
+
+def planning_context(
+    graph: PrereqGraph,
+    question: str,
+    completed: Iterable[str],
+    semester: Optional[str] = None,
+    major: Optional[str] = None,
+    max_eligible: int = 12,
+) -> Optional[str]:
+    """Compact, deterministic prerequisite analysis for the answer prompt.
+
+    Covers the courses named in the question (requirements, shortest chain
+    and a semester plan) and the student's currently eligible courses in
+    their major. Returns None when there is nothing useful to say.
+    """
+
+    completed = list(completed)
+    targets = graph.mentioned_in(question)
+    done = sorted(graph.completed_set(completed))
+    season, _ = parse_term(semester)
+    lines: List[str] = []
+
+    if done:
+        lines.append(f"Completed: {', '.join(done)}")
+    for target in targets:
+        lines.append(graph.describe(target))
+        sequence = graph.chain(target, completed)
+        if sequence is None:
+            lines.append(f"No prerequisite path found to {target}.")
+        elif not sequence:
+            lines.append(f"{target}: already completed.")
+        else:
+            lines.append(f"Shortest prerequisite chain to {target}: {' -> '.join(sequence)}")
+
+    if targets:
+        plan = graph.plan(targets, completed, start_term=semester)
+        if plan.terms:
+            lines.append("Semester plan:")
+            lines.extend(f"  {label}: {', '.join(courses) or '(nothing available)'}" for label, courses in plan.terms)
+        if plan.unscheduled:
+            lines.append(f"Could not schedule: {', '.join(plan.unscheduled)}")
+
+    eligible = graph.eligible(completed, season=season if semester else None, major=major)
+    if eligible and (done or major):
+        shown = eligible[:max_eligible]
+        more = f" (+{len(eligible) - len(shown)} more)" if len(eligible) > len(shown) else ""
+        term = f" for {season}" if semester else ""
+        lines.append(f"Eligible now{term}: {', '.join(shown)}{more}")
+
+    if not lines:
+        return None
+    return "\n".join(lines)
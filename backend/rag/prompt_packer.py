@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models import ChatMessage
+from .embeddings import EmbeddingBackend
+from .schema import Document
+
+
+# Chat formats add a few tokens around every message (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_WORD_RE = re.compile(r"\S+")
+
+
+class TokenCounter:
+    """Counts prompt tokens with the embedding model's tokenizer, cached per text.
+
+    Without a tokenizer it estimates 4 tokens per 3 words. `tokenizer_factory`
+    defers getting the tokenizer to the first count.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any = None,
+        cache_size: int = 4096,
+        tokenizer_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self._tokenizer = tokenizer
+        self._tokenizer_factory = tokenizer_factory
+        self.count = lru_cache(maxsize=cache_size)(self._count)  # type: ignore[method-assign]
+
+    def _resolve(self) -> Any:
+        if self._tokenizer_factory is not None:
+            self._tokenizer = self._tokenizer_factory()
+            self._tokenizer_factory = None
+        return self._tokenizer
+
+    @property
+    def uses_tokenizer(self) -> bool:
+        return self._resolve() is not None
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokenizer = self._resolve()
+        if tokenizer is not None:
+            # `tokenize` (unlike `encode`) does not warn past the model's
+            # 512-token input limit.
+            return len(tokenizer.tokenize(text))
+        return (len(_WORD_RE.findall(text)) * 4 + 2) // 3
+
+    def message(self, text: str) -> int:
+        return self.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+
+def select_diverse(
+    vectors: np.ndarray,
+    mmr_lambda: float = 0.7,
+    duplicate_threshold: float = 0.9,
+    keep_first: int = 0,
+) -> Tuple[List[int], List[int]]:
+    """Order rows by maximal marginal relevance; return `(order, duplicates)`.
+
+    Row i (retrieval order) has relevance 1 - i/n. Rows whose max cosine to a
+    picked row reaches `duplicate_threshold` are dropped; the first
+    `keep_first` rows keep their positions.
+    """
+
+    n = len(vectors)
+    if n == 0:
+        return [], []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    similarity = unit @ unit.T
+    relevance = 1.0 - np.arange(n) / n
+
+    order = list(range(min(keep_first, n)))
+    duplicates: List[int] = []
+    remaining = list(range(len(order), n))
+    while remaining:
+        if order:
+            redundancy = similarity[np.ix_(remaining, order)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        for i in [r for r, red in zip(remaining, redundancy) if red >= duplicate_threshold]:
+            duplicates.append(i)
+        candidates = [(r, red) for r, red in zip(remaining, redundancy) if red < duplicate_threshold]
+        if not candidates:
+            break
+        best, _ = max(candidates, key=lambda item: mmr_lambda * relevance[item[0]] - (1 - mmr_lambda) * item[1])
+        order.append(best)
+        remaining = [r for r, _ in candidates if r != best]
+    return order, sorted(duplicates)
+
+
+@dataclass
+class PackedPrompt:
+    """What fits in the prompt, and what was left out."""
+
+    docs: List[Document]
+    chunks: List[str]
+    fewshot_docs: List[Document]
+    history: List[ChatMessage]
+    include_profile: bool
+    budget: int
+    tokens_used: int = 0
+    tokens_dropped: int = 0
+    tokens_deduplicated: int = 0
+    duplicates_removed: int = 0
+    # section -> number of items dropped for the budget
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "used": self.tokens_used,
+            "dropped": self.tokens_dropped,
+            "deduplicated": self.tokens_deduplicated,
+            "duplicates_removed": self.duplicates_removed,
+            "dropped_items": self.dropped,
+        }
+
+
+class PromptPacker:
+    """Fits retrieved context into a token budget, most important first.
+
+    After the required messages, the budget goes to the student profile,
+    deduplicated excerpts in MMR order, few-shot examples, then history from
+    the newest message back. Items that do not fit are dropped whole.
+    """
+
+    def __init__(
+        self,
+        counter: TokenCounter,
+        budget: int = 3000,
+        embedding_backend: Optional[EmbeddingBackend] = None,
+        duplicate_threshold: float = 0.9,
+        mmr_lambda: float = 0.7,
+    ) -> None:
+        self._counter = counter
+        self._budget = budget
+        self._embeddings = embedding_backend
+        self._duplicate_threshold = duplicate_threshold
+        self._mmr_lambda = mmr_lambda
+
+    @property
+    def counter(self) -> TokenCounter:
+        return self._counter
+
+    async def _diverse_order(self, docs: Sequence[Document], keep_first: int) -> Tuple[List[int], List[int]]:
+        if len(docs) < 2:
+            return list(range(len(docs))), []
+        # Vector search results carry their stored vectors. BM25-only hits and
+        # pinned catalog courses do not; they are embedded on their indexed
+        # text, so these are embedding-cache hits after ingestion.
+        vectors: List[Optional[Sequence[float]]] = [d.embedding for d in docs]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            if self._embeddings is None:
+                return list(range(len(docs))), []
+            computed = await self._embeddings.embed_documents([docs[i].text for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return select_diverse(
+            np.asarray(vectors, dtype=np.float32),
+            mmr_lambda=self._mmr_lambda,
+            duplicate_threshold=self._duplicate_threshold,
+            keep_first=keep_first,
+        )
+
+    async def pack(
+        self,
+        required: Sequence[str],
+        profile: str,
+        docs: Sequence[Document],
+        chunks: Sequence[str],
+        fewshot_docs: Sequence[Document],
+        history: Sequence[ChatMessage],
+        pinned: int = 0,
+    ) -> PackedPrompt:
+        """Choose the prompt contents.
+
+        `required` are the contents of messages that are always sent,
+        `chunks` the prompt text of each of `docs`, and `pinned` the number
+        of leading docs that are pinned catalog courses.
+        """
+
+        count = self._counter.count
+        order, duplicates = await self._diverse_order(docs, keep_first=pinned)
+        packed = PackedPrompt(
+            docs=[],
+            chunks=[],
+            fewshot_docs=[],
+            history=[],
+            include_profile=False,
+            budget=self._budget,
+            duplicates_removed=len(duplicates),
+            tokens_deduplicated=sum(count(chunks[i]) for i in duplicates),
+        )
+
+        used = sum(self._counter.message(text) for text in required)
+        dropped = 0
+
+        def fits(cost: int) -> bool:
+            return used + cost <= self._budget
+
+        # Profile: one message.
+        cost = self._counter.message(profile)
+        if fits(cost):
+            used += cost
+            packed.include_profile = True
+        else:
+            dropped += cost
+            packed.dropped["profile"] = 1
+
+        # Excerpts share one message; "[i] " adds a couple of tokens each.
+        for i in order:
+            cost = count(chunks[i]) + 3
+            if fits(cost):
+                used += cost
+                packed.docs.append(docs[i])
+                packed.chunks.append(chunks[i])
+            else:
+                dropped += cost
+                packed.dropped["chunks"] = packed.dropped.get("chunks", 0) + 1
+
+        for doc in fewshot_docs:
+            cost = count(doc.text) + 4
+            if fits(cost):
+                used += cost
+                packed.fewshot_docs.append(doc)
+            else:
+                dropped += cost
+                packed.dropped["fewshot"] = packed.dropped.get("fewshot", 0) + 1
+
+        # History, newest first. Once a message does not fit, older ones are
+        # dropped too, so the kept turns are contiguous.
+        kept: List[ChatMessage] = []
+        full = False
+        for message in reversed(history):
+            cost = self._counter.message(message.content)
+            if not full and fits(cost):
+                used += cost
+                kept.append(message)
+            else:
+                full = True
+                dropped += cost
+                packed.dropped["history"] = packed.dropped.get("history", 0) + 1
+        packed.history = kept[::-1]
+
+        packed.tokens_used = used
+        packed.tokens_dropped = dropped
+        return packed
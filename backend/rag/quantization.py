@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# Storage precisions for NumpyVectorStore. int8 keeps one float32 scale per
+# vector (symmetric, max-abs), so a 384-d MiniLM vector costs 388 bytes
+# instead of 1536.
+VECTOR_DTYPES = ("float32", "float16", "int8")
+
+_NUMPY_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Rows scored per block when the stored matrix is not float32: each block
+# is widened to float32 for BLAS, so temporary memory stays at
+# block_rows * dim * 4 bytes whatever the corpus size.
+DEFAULT_BLOCK_ROWS = 16384
+
+
+def numpy_dtype(dtype: str) -> np.dtype:
+    if dtype not in _NUMPY_DTYPES:
+        raise ValueError(f"Unknown vector dtype {dtype!r}; expected one of {VECTOR_DTYPES}")
+    return np.dtype(_NUMPY_DTYPES[dtype])
+
+
+@dataclass
+class QuantizedMatrix:
+    """Row vectors at a storage precision, plus per-row scales for int8.
+
+    `data` may be a read-only `np.memmap`; nothing here writes to it.
+    """
+
+    dtype: str
+    data: np.ndarray
+    # (rows,) float32, only for int8: row i is data[i] * scales[i].
+    scales: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.data.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def take(self, rows: Sequence[int]) -> "QuantizedMatrix":
+        """Copy of the selected rows (still quantized)."""
+
+        index = np.asarray(rows, dtype=np.int64)
+        scales = np.array(self.scales[index]) if self.scales is not None else None
+        return QuantizedMatrix(self.dtype, np.array(self.data[index]), scales)
+
+    def dequantize(self) -> np.ndarray:
+        matrix = np.asarray(self.data, dtype=np.float32)
+        if self.scales is not None:
+            matrix = matrix * self.scales[:, None]
+        return matrix
+
+    def score(self, queries: np.ndarray, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """Dot products `(len(queries), len(self))` against float32 `queries`.
+
+        float32 is a single matmul. float16 / int8 rows are widened block by
+        block, so the full float32 matrix never exists. int8 scales are
+        applied to the dot products, not to the stored rows.
+        """
+
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.dtype == "float32":
+            return queries @ self.data.T
+
+        scores = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), block_rows):
+            block = np.asarray(self.data[start : start + block_rows], dtype=np.float32)
+            scores[:, start : start + block.shape[0]] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales[None, :]
+        return scores
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> QuantizedMatrix:
+    """Quantize float32 row vectors to `dtype` (see `VECTOR_DTYPES`)."""
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    target = numpy_dtype(dtype)
+    if dtype != "int8":
+        return QuantizedMatrix(dtype, vectors.astype(target))
+
+    max_abs = np.abs(vectors).max(axis=1) if vectors.size else np.zeros(len(vectors), dtype=np.float32)
+    scales = (max_abs / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return QuantizedMatrix(dtype, data, scales)
+
+
+def concat(matrices: Sequence[QuantizedMatrix]) -> QuantizedMatrix:
+    """Stack matrices of the same dtype."""
+
+    dtype = matrices[0].dtype
+    data = np.concatenate([np.asarray(m.data) for m in matrices])
+    scales = None
+    if dtype == "int8":
+        scales = np.concatenate([np.asarray(m.scales) for m in matrices]).astype(np.float32)
+    return QuantizedMatrix(dtype, data, scales)
@@ -1,38 +1,186 @@
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Sequence
 
+from ..metrics import observe_stage
 from ..models import PrattProfile
+from ..retrieval.simple_retriever import BM25Index
 from .schema import Document, normalize_major
 from .embeddings import EmbeddingBackend
-from .vector_store import VectorStore
+from .executor import get_stage_executor
+from .vector_store import AnyVectorStore, SearchSpec
+
+
+def build_profile_summary(profile: Optional[PrattProfile]) -> str:
+    if not profile:
+        return ""
+
+    parts = []
+    if profile.major:
+        parts.append(f"Major: {profile.major}")
+    if profile.classYear:
+        parts.append(f"Class year: {profile.classYear}")
+    if profile.semester:
+        parts.append(f"Current/target semester: {profile.semester}")
+    if profile.currentCourses:
+        parts.append(f"Current courses: {', '.join(profile.currentCourses)}")
+    if profile.completedCourses:
+        parts.append(
+            f"Completed / prereq courses: {', '.join(profile.completedCourses)}"
+        )
+
+    return " | ".join(parts)
+
+
+def build_query_text(question: str, pratt_profile: Optional[PrattProfile]) -> str:
+    """Prepend the profile summary to the question so the search is profile-aware."""
+
+    profile_summary = build_profile_summary(pratt_profile)
+    if profile_summary:
+        return profile_summary + "\n\nQuestion: " + question
+    return question
+
+
+# Document types each intent is biased towards. Intents not listed here
+# (e.g. "other") search across all types.
+INTENT_DOC_TYPES: Dict[str, List[str]] = {
+    "study_abroad_transfer": ["policy", "handbook_requirement", "other"],
+    "overload_registration": ["policy", "handbook_requirement", "other"],
+    "major_requirements": ["handbook_requirement", "course_description"],
+    "prerequisites_sequencing": ["handbook_requirement", "course_description"],
+}
+
+
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+
+
+def _add_elapsed(timings: Optional[Dict[str, float]], stage: str, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    observe_stage(f"retrieval_{stage}", elapsed)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + elapsed * 1000.0
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int = 60) -> List[Document]:
+    """Fuse ranked lists by summing 1 / (k + rank) per document ID.
+
+    Rank-based, so BM25 and cosine scores never need to be on one scale.
+    Ties keep the order in which documents were first seen.
+    """
+
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc.id, doc)
+    order = sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+    return [docs[doc_id] for doc_id in order]
+
+
+@dataclass
+class QueryContext:
+    """A request-scoped query: profile-aware text plus its embedding.
+
+    Built once per chat turn by `Retriever.prepare_query` and passed to every
+    `retrieve` call (main context, few-shot examples, major-filter fallback)
+    so the question is embedded exactly once. `embedding` is None in
+    `bm25` mode, where nothing is embedded. `question` is the raw question,
+    which is what BM25 matches on.
+    """
+
+    text: str
+    embedding: Optional[List[float]]
+    question: str = ""
+
+
+@dataclass
+class RetrievalRequest:
+    """One search for `Retriever.retrieve_many` (same fields as `retrieve`)."""
+
+    question: str
+    pratt_profile: Optional[PrattProfile] = None
+    intent: Optional[str] = None
+    k: int = 6
+    type_filter: Optional[str] = None
+    query: Optional[QueryContext] = None
 
 
 class Retriever:
-    def __init__(self, store: VectorStore, embedding_backend: EmbeddingBackend) -> None:
+    """Profile- and intent-aware search over the ingested documents.
+
+    `mode` selects the ranking:
+
+    - `vector`: MiniLM embeddings + Chroma (the original behaviour);
+    - `bm25`: the lexical `BM25Index` only; needs no embedding model;
+    - `hybrid`: both, fused with reciprocal rank fusion, so exact tokens
+      such as "ECE 280L" that MiniLM handles poorly still rank.
+
+    The BM25 index is built lazily from the vector store's documents and
+    rebuilt when the store's index version changes (i.e. after ingestion).
+    """
+
+    def __init__(
+        self,
+        store: AnyVectorStore,
+        embedding_backend: EmbeddingBackend,
+        mode: str = "vector",
+        rrf_k: int = 60,
+        hybrid_candidates: int = 4,
+    ) -> None:
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {RETRIEVAL_MODES}")
         self._store = store
         self._embeddings = embedding_backend
+        self._mode = mode
+        self._rrf_k = rrf_k
+        # Each ranking contributes up to k * hybrid_candidates documents.
+        self._hybrid_candidates = max(1, hybrid_candidates)
+        self._bm25: Optional[BM25Index] = None
+        self._bm25_version: Optional[str] = None
+        self._bm25_lock = asyncio.Lock()
 
-    async def retrieve(
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    async def lexical_index(self) -> BM25Index:
+        """The BM25 index over the current store contents (built on demand)."""
+
+        version = self._store.index_version()
+        if self._bm25 is not None and self._bm25_version == version:
+            return self._bm25
+        async with self._bm25_lock:
+            if self._bm25 is None or self._bm25_version != version:
+                docs = await self._store.all_documents()
+                # Index construction is CPU-bound; keep it off the event loop.
+                self._bm25 = await get_stage_executor().run(BM25Index, docs)
+                self._bm25_version = version
+        return self._bm25
+
+    async def prepare_query(
         self,
         question: str,
         pratt_profile: Optional[PrattProfile],
+    ) -> QueryContext:
+        """Build the profile-aware query text and embed it once."""
+
+        text = build_query_text(question, pratt_profile)
+        embedding: Optional[List[float]] = None
+        if self._mode != "bm25":
+            embedding = await self._embeddings.embed_query(text)
+        return QueryContext(text=text, embedding=embedding, question=question)
+
+    @staticmethod
+    def build_where(
+        pratt_profile: Optional[PrattProfile],
         intent: Optional[str],
-        k: int = 6,
         type_filter: Optional[str] = None,
-    ) -> List[Document]:
-        """Retrieve context documents for a question.
-
-        - Uses the student's PrattProfile (major/year/semester/courses) to
-          build a natural-language profile summary that is prepended to the
-          question before embedding. This steers similarity search toward
-          course and handbook text relevant to that specific student.
-        - Normalizes the profile major to our canonical codes (ECE/BME/ME/
-          CEE_ENV/CS) before building a `where` filter over metadata. If the
-          major-constrained query returns no results, it automatically retries
-          with the major filter removed so we never end up with "no chunks"
-          just because of a mismatched label.
-        """
+    ) -> Dict[str, Any]:
+        """Build the Chroma `where` filter for a profile / intent / type."""
 
         where: Dict[str, Any] = {}
 
@@ -52,11 +200,8 @@ class Retriever:
         type_clause: Optional[Dict[str, Any]] = None
         if type_filter:
             type_clause = {"type": type_filter}
-        else:
-            if intent == "study_abroad_transfer" or intent == "overload_registration":
-                type_clause = {"type": {"$in": ["policy", "handbook_requirement", "other"]}}
-            elif intent == "major_requirements" or intent == "prerequisites_sequencing":
-                type_clause = {"type": {"$in": ["handbook_requirement", "course_description"]}}
+        elif intent in INTENT_DOC_TYPES:
+            type_clause = {"type": {"$in": INTENT_DOC_TYPES[intent]}}
 
         # Chroma expects a single logical operator at the top level. Combine
         # major and type filters using an explicit $and when both are present.
@@ -67,50 +212,140 @@ class Retriever:
         elif type_clause:
             where.update(type_clause)
 
-        # --- Build profile-aware query text ---
-        def build_profile_summary(profile: Optional[PrattProfile]) -> str:
-            if not profile:
-                return ""
-
-            parts = []
-            if profile.major:
-                parts.append(f"Major: {profile.major}")
-            if profile.classYear:
-                parts.append(f"Class year: {profile.classYear}")
-            if profile.semester:
-                parts.append(f"Current/target semester: {profile.semester}")
-            if profile.currentCourses:
-                parts.append(f"Current courses: {', '.join(profile.currentCourses)}")
-            if profile.completedCourses:
-                parts.append(
-                    f"Completed / prereq courses: {', '.join(profile.completedCourses)}"
-                )
-
-            return " | ".join(parts)
-
-        profile_summary = build_profile_summary(pratt_profile)
-        if profile_summary:
-            query_text = profile_summary + "\n\nQuestion: " + question
-        else:
-            query_text = question
+        return where
 
-        # --- First pass: with filters (if any) ---
-        docs = await self._store.similarity_search(
-            embedding_backend=self._embeddings,
-            query=query_text,
+    async def retrieve(
+        self,
+        question: str,
+        pratt_profile: Optional[PrattProfile],
+        intent: Optional[str],
+        k: int = 6,
+        type_filter: Optional[str] = None,
+        query: Optional[QueryContext] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[Document]:
+        """Retrieve context documents for a question.
+
+        - Uses the student's PrattProfile (major/year/semester/courses) to
+          build a natural-language profile summary that is prepended to the
+          question before embedding. This steers similarity search toward
+          course and handbook text relevant to that specific student.
+        - Normalizes the profile major to our canonical codes (ECE/BME/ME/
+          CEE_ENV/CS) before building a `where` filter over metadata. If the
+          major-constrained query returns no results, it automatically retries
+          with the major filter removed so we never end up with "no chunks"
+          just because of a mismatched label.
+        - Reuses `query` (from `prepare_query`) when given; otherwise the
+          question is embedded here.
+        """
+
+        request = RetrievalRequest(
+            question=question,
+            pratt_profile=pratt_profile,
+            intent=intent,
             k=k,
-            where=where or None,
+            type_filter=type_filter,
+            query=query,
+        )
+        return (await self.retrieve_many([request], timings=timings))[0]
+
+    async def retrieve_many(
+        self,
+        requests: Sequence[RetrievalRequest],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[List[Document]]:
+        """`retrieve` for several requests at once, results in request order.
+
+        Queries that are not prepared yet are embedded concurrently (so the
+        query batcher can coalesce them), and all vector searches go through
+        one `VectorStore.similarity_search_many` call, which issues a single
+        Chroma query per distinct filter. The major-filter fallback is
+        batched the same way.
+
+        With `timings`, the milliseconds spent embedding, searching and in
+        the fallback search are added to its `embed`, `search` and
+        `fallback` entries. They are always recorded in the
+        `retrieval_*` stages of `rag_stage_duration_seconds`.
+        """
+
+        start = time.perf_counter()
+        queries: List[Optional[QueryContext]] = [r.query for r in requests]
+        missing = [i for i, q in enumerate(queries) if q is None]
+        prepared = await asyncio.gather(
+            *(self.prepare_query(requests[i].question, requests[i].pratt_profile) for i in missing)
         )
+        for i, query in zip(missing, prepared):
+            queries[i] = query
+        ready: List[QueryContext] = [q for q in queries if q is not None]
+        if missing:
+            _add_elapsed(timings, "embed", start)
+
+        wheres = [self.build_where(r.pratt_profile, r.intent, r.type_filter) for r in requests]
+        ks = [r.k for r in requests]
+
+        # --- First pass: with filters (if any) ---
+        start = time.perf_counter()
+        results = await self._search_many(ready, ks, [w or None for w in wheres])
+        _add_elapsed(timings, "search", start)
 
         # If an over-strict major filter yields nothing, retry without major
-        # so we always return some context chunks.
-        if not docs and where.get("major") is not None:
-            fallback_where = {k: v for k, v in where.items() if k != "major"}
-            docs = await self._store.similarity_search(
-                embedding_backend=self._embeddings,
-                query=query_text,
-                k=k,
-                where=fallback_where or None,
-            )
-
-        return docs
+        # so we always return some context chunks. The major may sit inside
+        # an `$and`, so the filter is rebuilt without the profile.
+        relaxed = [self.build_where(None, r.intent, r.type_filter) for r in requests]
+        retry = [i for i, docs in enumerate(results) if not docs and relaxed[i] != wheres[i]]
+        if retry:
+            start = time.perf_counter()
+            fallback_wheres = [relaxed[i] or None for i in retry]
+            fallback = await self._search_many([ready[i] for i in retry], [ks[i] for i in retry], fallback_wheres)
+            for i, docs in zip(retry, fallback):
+                results[i] = docs
+            _add_elapsed(timings, "fallback", start)
+
+        return results
+
+    async def _search_many(
+        self,
+        queries: List[QueryContext],
+        ks: List[int],
+        wheres: List[Optional[Dict[str, Any]]],
+    ) -> List[List[Document]]:
+        hybrid = self._mode == "hybrid"
+        fetch = [k * self._hybrid_candidates if hybrid else k for k in ks]
+        vector = [i for i, q in enumerate(queries) if self._mode != "bm25" and q.embedding is not None]
+        lexical = [i for i in range(len(queries)) if hybrid or i not in vector]
+
+        async def vector_part() -> List[List[Document]]:
+            if not vector:
+                return []
+            specs = [
+                SearchSpec(k=fetch[i], where=wheres[i], query=queries[i].text, query_embedding=queries[i].embedding)
+                for i in vector
+            ]
+            return await self._store.similarity_search_many(self._embeddings, specs)
+
+        async def lexical_part() -> List[List[Document]]:
+            return [await self._lexical_search(queries[i], fetch[i], wheres[i]) for i in lexical]
+
+        vector_found, lexical_found = await asyncio.gather(vector_part(), lexical_part())
+        vector_docs = dict(zip(vector, vector_found))
+        lexical_docs = dict(zip(lexical, lexical_found))
+
+        results: List[List[Document]] = []
+        for i, k in enumerate(ks):
+            if i in vector_docs and i in lexical_docs:
+                results.append(reciprocal_rank_fusion([vector_docs[i], lexical_docs[i]], k=self._rrf_k)[:k])
+            else:
+                results.append((vector_docs.get(i) or lexical_docs.get(i) or [])[:k])
+        return results
+
+    async def _lexical_search(
+        self,
+        query: QueryContext,
+        k: int,
+        where: Optional[Dict[str, Any]],
+    ) -> List[Document]:
+        index = await self.lexical_index()
+        # Posting-list scoring only touches documents sharing a query token,
+        # so this runs inline rather than on a worker thread.
+        hits = index.search(query.question or query.text, k=k, where=where)
+        return [doc for doc, _ in hits]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Literal
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Literal
+
+import numpy as np
 
 
 # Canonical major codes used for metadata filtering
@@ -17,6 +19,9 @@ class Document:
   title: Optional[str]
   text: str
   metadata: Dict[str, Any]
+  # The stored vector (float32 array), on vector search results only (the
+  # prompt packer's MMR reuses it instead of embedding the text again).
+  embedding: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
 
   def to_metadata(self) -> Dict[str, Any]:
     base = {
@@ -1,73 +1,282 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Sequence, Union
 
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+import numpy as np
 
+from ..metrics import stage_timer
 from .schema import Document
 from .embeddings import EmbeddingBackend
+from .executor import StageExecutor, get_stage_executor
+
+if TYPE_CHECKING:
+    from .numpy_store import NumpyVectorStore
+
+
+# "chroma": persistent Chroma collection (HNSW); "numpy": exact search over a
+# memory-mapped matrix (see backend/rag/numpy_store.py).
+VECTOR_STORE_BACKENDS = ("chroma", "numpy")
+
+# The numpy index lives in a subdirectory of the Chroma persist dir, with its
+# own ingest manifest, so both backends can be built side by side.
+NUMPY_INDEX_DIR = "numpy_index"
+
+
+@dataclass
+class SearchSpec:
+    """One search for `VectorStore.similarity_search_many`."""
+
+    k: int
+    where: Optional[Dict[str, Any]] = None
+    # Text to embed when `query_embedding` is not given.
+    query: str = ""
+    query_embedding: Optional[List[float]] = None
 
 
 class VectorStore:
-    """Thin wrapper around a persistent Chroma collection."""
+    """Thin wrapper around a persistent Chroma collection.
+
+    Chroma's client is synchronous, so reads and writes are dispatched to the
+    shared `StageExecutor` to keep the event loop free.
 
-    def __init__(self, persist_dir: Path, collection_name: str = "pratt_rag") -> None:
+    `chromadb` is imported and the persistent client opened on first use
+    (normally on an executor thread), not in the constructor.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Path,
+        collection_name: str = "pratt_rag",
+        executor: Optional[StageExecutor] = None,
+    ) -> None:
         self._persist_dir = persist_dir
-        self._client = chromadb.PersistentClient(
-            path=str(persist_dir),
-            settings=ChromaSettings(anonymized_telemetry=False),
-        )
-        self._collection = self._client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"},
-        )
+        self._collection_name = collection_name
+        self._executor = executor or get_stage_executor()
+        self._client: Any = None
+        self._open_collection: Any = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def _collection(self) -> Any:
+        if self._open_collection is None:
+            with self._open_lock:
+                if self._open_collection is None:
+                    import chromadb
+                    from chromadb.config import Settings as ChromaSettings
+
+                    self._client = chromadb.PersistentClient(
+                        path=str(self._persist_dir),
+                        settings=ChromaSettings(anonymized_telemetry=False),
+                    )
+                    self._open_collection = self._client.get_or_create_collection(
+                        name=self._collection_name,
+                        metadata={"hnsw:space": "cosine"},
+                    )
+        return self._open_collection
+
+    @property
+    def loaded(self) -> bool:
+        return self._open_collection is not None
+
+    async def open(self) -> None:
+        """Open the collection on the executor (startup warmup)."""
+
+        await self._executor.run(lambda: self._collection)
+
+    @property
+    def persist_dir(self) -> Path:
+        return self._persist_dir
+
+    @property
+    def _version_path(self) -> Path:
+        return self._persist_dir / "index_version"
+
+    def index_version(self) -> str:
+        """Opaque marker that changes every time the index is (re-)ingested.
+
+        Caches derived from search results (e.g. the answer cache) compare it
+        to know when to drop their entries. It is a cheap stat-only check.
+        """
+
+        try:
+            return str(self._version_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return ""
+
+    def bump_index_version(self) -> None:
+        self._version_path.write_text(str(time.time_ns()))
 
     async def add_documents(self, docs: List[Document], embeddings: List[List[float]]) -> None:
         ids = [d.id for d in docs]
         texts = [d.text for d in docs]
         metadatas = [d.to_metadata() for d in docs]
 
-        self._collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        await self._executor.run(
+            lambda: self._collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        )
+
+    async def upsert_documents(self, docs: List[Document], embeddings: List[List[float]]) -> None:
+        """Insert or replace documents by ID (idempotent re-ingestion)."""
+
+        if not docs:
+            return
+        ids = [d.id for d in docs]
+        texts = [d.text for d in docs]
+        metadatas = [d.to_metadata() for d in docs]
+
+        await self._executor.run(
+            lambda: self._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        )
+
+    async def delete_documents(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        await self._executor.run(lambda: self._collection.delete(ids=ids))
 
     async def similarity_search(
         self,
-        embedding_backend: EmbeddingBackend,
+        embedding_backend: Optional[EmbeddingBackend],
         query: str,
         k: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Document]:
-        # Embed the query using the same backend used at ingestion time
-        q_embedding = await embedding_backend.embed_query(query)
+        spec = SearchSpec(k=k, where=where, query=query, query_embedding=query_embedding)
+        return (await self.similarity_search_many(embedding_backend, [spec]))[0]
 
-        results = self._collection.query(
-            query_embeddings=[q_embedding],
-            n_results=k,
-            where=where or {},
-        )
+    async def similarity_search_many(
+        self,
+        embedding_backend: Optional[EmbeddingBackend],
+        specs: Sequence[SearchSpec],
+    ) -> List[List[Document]]:
+        """Run several searches with as few Chroma calls as possible.
+
+        Chroma applies one `where` filter per `query` call but accepts many
+        query embeddings, so specs are grouped by identical filter and each
+        group is a single call with `n_results` = the group's largest `k`.
+        Results come back in spec order, each cut to its own `k`. Specs
+        without an embedding are embedded together in one batch.
+        """
+
+        embeddings: List[Optional[List[float]]] = [s.query_embedding for s in specs]
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+        if missing:
+            # Embed with the same backend used at ingestion time, unless the
+            # caller already did (see Retriever.prepare_query).
+            assert embedding_backend is not None, "an embedding backend is needed for specs without embeddings"
+            computed = await embedding_backend.embed_documents([specs[i].query for i in missing])
+            for i, vector in zip(missing, computed):
+                embeddings[i] = vector
+
+        groups: Dict[str, List[int]] = {}
+        for i, spec in enumerate(specs):
+            groups.setdefault(_where_key(spec.where), []).append(i)
+
+        results: List[List[Document]] = [[] for _ in specs]
+
+        async def run_group(indices: List[int]) -> None:
+            where = specs[indices[0]].where
+            n_results = max(specs[i].k for i in indices)
+
+            def query() -> Dict[str, Any]:
+                # Timed on the worker thread, so executor queueing is excluded.
+                with stage_timer("vector_query"):
+                    return self._collection.query(
+                        query_embeddings=[embeddings[i] for i in indices],
+                        n_results=n_results,
+                        where=where or {},
+                        include=["documents", "metadatas", "embeddings"],
+                    )
+
+            raw = await self._executor.run(query)
+            for row, i in enumerate(indices):
+                ids = raw.get("ids", [[]])[row]
+                texts = raw.get("documents", [[]])[row]
+                metadatas = raw.get("metadatas", [[]])[row]
+                # Lists or numpy arrays, depending on the Chroma version.
+                embedded = raw.get("embeddings")
+                vectors = embedded[row] if embedded is not None else [None] * len(ids)
+                docs = [
+                    _to_document(doc_id, text, metadata, vector)
+                    for doc_id, text, metadata, vector in zip(ids, texts, metadatas, vectors)
+                ]
+                results[i] = docs[: specs[i].k]
+
+        await asyncio.gather(*(run_group(indices) for indices in groups.values()))
+        return results
+
+    async def all_documents(self) -> List[Document]:
+        """Every document in the collection (used to build the BM25 index)."""
 
-        docs: List[Document] = []
-        ids = results.get("ids", [[]])[0]
-        texts = results.get("documents", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-
-        for doc_id, text, metadata in zip(ids, texts, metadatas):
-            metadata = metadata or {}
-            docs.append(
-                Document(
-                    id=str(doc_id),
-                    major=metadata.get("major"),
-                    type=metadata.get("type", "unknown"),
-                    code=metadata.get("code"),
-                    title=metadata.get("title"),
-                    text=text,
-                    metadata={
-                        k: v
-                        for k, v in metadata.items()
-                        if k not in {"major", "type", "code", "title"}
-                    },
-                )
+        results = await self._executor.run(
+            lambda: self._collection.get(include=["documents", "metadatas"])
+        )
+        return [
+            _to_document(doc_id, text, metadata)
+            for doc_id, text, metadata in zip(
+                results.get("ids", []),
+                results.get("documents", []),
+                results.get("metadatas", []),
             )
+        ]
+
+
+AnyVectorStore = Union[VectorStore, "NumpyVectorStore"]
+
+
+def vector_store_dir(backend: str, persist_dir: Path) -> Path:
+    """Directory holding `backend`'s index, manifest and index version."""
+
+    if backend not in VECTOR_STORE_BACKENDS:
+        raise ValueError(f"Unknown vector store backend {backend!r}; expected one of {VECTOR_STORE_BACKENDS}")
+    return persist_dir / NUMPY_INDEX_DIR if backend == "numpy" else persist_dir
+
+
+def create_vector_store(
+    backend: str,
+    persist_dir: Path,
+    executor: Optional[StageExecutor] = None,
+    dtype: str = "float32",
+) -> AnyVectorStore:
+    """Open the configured vector store backend (`VECTOR_STORE_BACKEND`).
+
+    `dtype` is the numpy backend's storage precision; Chroma always stores
+    float32.
+    """
+
+    store_dir = vector_store_dir(backend, persist_dir)
+    if backend == "numpy":
+        from .numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore(persist_dir=store_dir, executor=executor, dtype=dtype)
+    return VectorStore(persist_dir=store_dir, executor=executor)
+
+
+def _where_key(where: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(where, sort_keys=True, default=str) if where else ""
+
 
-        return docs
+def _to_document(
+    doc_id: Any, text: str, metadata: Optional[Dict[str, Any]], embedding: Optional[Sequence[float]] = None
+) -> Document:
+    metadata = metadata or {}
+    return Document(
+        id=str(doc_id),
+        major=metadata.get("major"),
+        type=metadata.get("type", "unknown"),
+        code=metadata.get("code"),
+        title=metadata.get("title"),
+        text=text,
+        metadata={
+            k: v
+            for k, v in metadata.items()
+            if k not in {"major", "type", "code", "title"}
+        },
+        embedding=np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+    )
@@ -1,10 +1,29 @@
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
-
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, List, Optional, Dict, Any, Sequence, Tuple, TypeVar
+
+from .answer_cache import AnswerCache, AnswerKey
+from .intent_classifier import LocalIntentClassifier
+from .metrics import observe_stage
 from .openrouter_client import OpenRouterClient
-from .models import ChatRequest, ChatResponse, IntentResult, PrattProfile, SourceChunk
-from .rag.retriever import Retriever
+from .models import ChatMessage, ChatRequest, ChatResponse, IntentResult, PrattProfile, ResponseVerbosity, SourceChunk
+from .rag.catalog import CourseCatalog, course_chunk
+from .rag.prereqs import PrereqGraph, planning_context
+from .rag.prompt_packer import PromptPacker
+from .rag.retriever import INTENT_DOC_TYPES, QueryContext, Retriever
+from .rag.schema import Document, normalize_major
+from .session_store import SessionStore, SessionSummarizer, UnknownSessionError, new_message
+
+
+T = TypeVar("T")
+
+
+# Conversation messages sent with each turn (before token budgeting).
+HISTORY_MESSAGES = 6
 
 
 INTENT_LABELS = [
@@ -16,13 +35,28 @@ INTENT_LABELS = [
 ]
 
 
-async def classify_intent(llm: OpenRouterClient, question: str) -> IntentResult:
-    """Use the LLM to classify a question into one of a few labels.
-
-    This is a small, cheap call that returns just the label and a rough
-    confidence score based on how strongly the model expressed its choice.
+async def classify_intent(
+    llm: OpenRouterClient,
+    question: str,
+    local_classifier: Optional[LocalIntentClassifier] = None,
+    threshold: float = 0.6,
+    embedding: Optional[Sequence[float]] = None,
+) -> IntentResult:
+    """Classify a question into one of a few labels.
+
+    When a `local_classifier` is given, it is tried first (on `embedding`,
+    the turn's query embedding, when given) and its result is returned if
+    its confidence is at least `threshold`, saving a network round trip. Otherwise this falls back to a small, cheap LLM call that
+    returns just the label. That result has `source="llm"` and no
+    confidence: the model gives no calibrated score, so thresholds on
+    `confidence` must not be applied to it.
     """
 
+    if local_classifier is not None:
+        local = await local_classifier.classify(question, embedding=embedding)
+        if local.confidence is not None and local.confidence >= threshold:
+            return local
+
     system_prompt = (
         "You are an intent classification assistant for a Duke Pratt School of Engineering "
         "advising chatbot. Classify the student's question into exactly ONE of these labels: "
@@ -39,8 +73,7 @@ async def classify_intent(llm: OpenRouterClient, question: str) -> IntentResult:
     label = raw.strip().split()[0]
     if label not in INTENT_LABELS:
         label = "other"
-    # Confidence is heuristic here; could be improved later.
-    return IntentResult(intent=label, confidence=0.7)
+    return IntentResult(intent=label, source="llm")
 
 
 async def retrieve_context(
@@ -49,6 +82,8 @@ async def retrieve_context(
     pratt_profile: Optional[PrattProfile],
     intent: str,
     k: int = 5,
+    query: Optional[QueryContext] = None,
+    timings: Optional[Dict[str, float]] = None,
 ):
     """Retrieve RAG context documents for a question using the real vector store."""
 
@@ -57,6 +92,8 @@ async def retrieve_context(
         pratt_profile=pratt_profile,
         intent=intent,
         k=k,
+        query=query,
+        timings=timings,
     )
 
     return docs
@@ -67,6 +104,8 @@ async def retrieve_fewshot_examples(
     question: str,
     pratt_profile: Optional[PrattProfile],
     k: int = 2,
+    query: Optional[QueryContext] = None,
+    timings: Optional[Dict[str, float]] = None,
 ):
     """Retrieve few-shot example chunks to guide answer style/structure.
 
@@ -80,41 +119,56 @@ async def retrieve_fewshot_examples(
         intent=None,
         k=k,
         type_filter="fewshot_example",
+        query=query,
+        timings=timings,
     )
 
     return docs
 
 
-async def generate_answer(
-    llm: OpenRouterClient,
+def profile_summary_text(profile: Optional[PrattProfile]) -> str:
+    """The student-profile system message of the answer prompt."""
+
+    if not profile:
+        return "Pratt student profile is not provided."
+    return (
+        "Pratt student profile:\n"
+        f"- Major: {profile.major or 'unspecified'}\n"
+        f"- Class year: {profile.classYear or 'unspecified'}\n"
+        f"- Current / target semester: {profile.semester or 'unspecified'}\n"
+        f"- Current courses: {', '.join(profile.currentCourses) or 'unspecified'}\n"
+        f"- Completed core / prereqs: {', '.join(profile.completedCourses) or 'unspecified'}\n"
+    )
+
+
+def build_answer_messages(
     request: ChatRequest,
     retrieved_chunks: List[str],
     intent: str,
     fewshot_chunks: Optional[List[str]] = None,
-) -> ChatResponse:
-    """Call the LLM with a RAG-style prompt to generate an answer.
+    planning_context: Optional[str] = None,
+    history: Optional[List[ChatMessage]] = None,
+    include_profile: bool = True,
+    summary: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Build the RAG-style prompt used to generate an answer.
 
     The prompt includes:
     - System description of the assistant
     - PrattProfile summary
+    - Deterministic prerequisite analysis, when available
     - Retrieved handbook/course context
     - Retrieved few-shot example patterns
+    - Summary of the earlier conversation (server-side sessions)
     - Recent conversation history
     - Current question and intent
+
+    `history` replaces the last `HISTORY_MESSAGES` of `request.history`
+    (the prompt packer passes what fit its budget); `include_profile=False`
+    leaves the profile out.
     """
 
-    profile = request.prattProfile
-    if profile:
-        profile_summary = (
-            "Pratt student profile:\n"
-            f"- Major: {profile.major or 'unspecified'}\n"
-            f"- Class year: {profile.classYear or 'unspecified'}\n"
-            f"- Current / target semester: {profile.semester or 'unspecified'}\n"
-            f"- Current courses: {', '.join(profile.currentCourses) or 'unspecified'}\n"
-            f"- Completed core / prereqs: {', '.join(profile.completedCourses) or 'unspecified'}\n"
-        )
-    else:
-        profile_summary = "Pratt student profile is not provided."
+    profile_summary = profile_summary_text(request.prattProfile)
 
     handbook_block = "\n\n".join(
         f"[{i+1}] {chunk}" for i, chunk in enumerate(retrieved_chunks)
@@ -138,23 +192,39 @@ async def generate_answer(
 
     # Map recent history into chat messages (for conversational memory)
     history_messages: List[Dict[str, Any]] = []
-    for msg in (request.history or [])[-6:]:
+    for msg in history if history is not None else (request.history or [])[-HISTORY_MESSAGES:]:
         role = msg.role
         if role not in {"user", "assistant"}:
             continue
         history_messages.append({"role": role, "content": msg.content})
 
-    messages: List[Dict[str, Any]] = [
-        {"role": "system", "content": system_prompt},
-        {"role": "system", "content": profile_summary},
+    messages: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
+    if include_profile:
+        messages.append({"role": "system", "content": profile_summary})
+
+    if planning_context:
+        messages.append(
+            {
+                "role": "system",
+                "content": (
+                    "Prerequisite analysis parsed automatically from the catalog's course "
+                    "descriptions. Use it as a starting point for sequencing questions, but "
+                    "check it against the course excerpts, which take precedence where they "
+                    "disagree, and tell the student to confirm eligibility with their advisor "
+                    "or DukeHub:\n\n" + planning_context
+                ),
+            }
+        )
+
+    messages.append(
         {
             "role": "system",
             "content": (
                 "Here are relevant handbook/course excerpts that may help answer the student's question. "
                 "Treat them as context, not verbatim policy:\n\n" + handbook_block
             ),
-        },
-    ]
+        }
+    )
 
     if fewshot_block:
         messages.append(
@@ -168,6 +238,11 @@ async def generate_answer(
             }
         )
 
+    if summary:
+        messages.append(
+            {"role": "system", "content": "Summary of the earlier conversation with this student:\n\n" + summary}
+        )
+
     messages.extend(history_messages)
 
     messages.append(
@@ -180,13 +255,676 @@ async def generate_answer(
         }
     )
 
+    return messages
+
+
+async def generate_answer(
+    llm: OpenRouterClient,
+    request: ChatRequest,
+    retrieved_chunks: List[str],
+    intent: str,
+    fewshot_chunks: Optional[List[str]] = None,
+    planning_context: Optional[str] = None,
+    include_prompt: bool = False,
+    history: Optional[List[ChatMessage]] = None,
+    include_profile: bool = True,
+    summary: Optional[str] = None,
+) -> ChatResponse:
+    """Call the LLM with a RAG-style prompt to generate an answer.
+
+    The prompt is returned in `metadata["prompt_messages"]` only when
+    `include_prompt` is set (debug responses).
+    """
+
+    messages = build_answer_messages(
+        request, retrieved_chunks, intent, fewshot_chunks, planning_context, history, include_profile, summary
+    )
     reply = await llm.chat(messages, temperature=0.2)
 
+    metadata: Dict[str, Any] = {"intent": intent}
+    if include_prompt:
+        metadata["prompt_messages"] = messages
     return ChatResponse(
         reply=reply.strip(),
         retrieved_chunks=retrieved_chunks,
-        metadata={
-            "intent": intent,
-            "prompt_messages": messages,
+        metadata=metadata,
+    )
+
+
+async def summarize_conversation(llm: OpenRouterClient, summary: str, messages: List[ChatMessage]) -> str:
+    """Fold `messages` into the rolling conversation `summary` (one small LLM call)."""
+
+    transcript = "\n\n".join(f"{m.role}: {m.content}" for m in messages)
+    prompt = [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a conversation between a Duke Pratt engineering "
+                "student and an advising assistant. Update the summary with the new messages. Keep "
+                "facts about the student (major, year, courses taken or planned, constraints), the "
+                "questions asked and the advice given. Drop pleasantries. At most 150 words, plain text."
+            ),
         },
+        {
+            "role": "user",
+            "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}",
+        },
+    ]
+    return (await llm.chat(prompt, temperature=0.0)).strip()
+
+
+def document_chunks(docs: List[Document]) -> List[str]:
+    """Prompt text for each document; course rows get their code and title."""
+
+    return [course_chunk(d) if d.code else d.text for d in docs]
+
+
+def docs_to_sources(docs: List[Document], include_text: bool = True) -> List[SourceChunk]:
+    """Map retrieved Documents to the provenance objects sent to the frontend.
+
+    Each document appears once (by ID), in first-seen order.
+    """
+
+    sources: List[SourceChunk] = []
+    seen = set()
+    for d in docs:
+        if d.id in seen:
+            continue
+        seen.add(d.id)
+        meta = d.metadata or {}
+        sources.append(
+            SourceChunk(
+                id=d.id,
+                text=d.text if include_text else None,
+                source_file=meta.get("source_file"),
+                page=meta.get("page"),
+                chunk_index=meta.get("chunk_index"),
+                type=meta.get("type") or d.type,
+            )
+        )
+    return sources
+
+
+def shape_response(
+    response: ChatResponse,
+    docs: List[Document],
+    verbosity: ResponseVerbosity,
+) -> ChatResponse:
+    """Fill in `sources` / `retrieved_chunks` for the requested verbosity.
+
+    `sources` already carries each document's text, so the prompt-formatted
+    `retrieved_chunks` are only kept for debug responses, and minimal
+    responses list source provenance without texts.
+    """
+
+    response.sources = docs_to_sources(docs, include_text=verbosity != "minimal")
+    if verbosity != "debug":
+        response.retrieved_chunks = []
+    return response
+
+
+class StageTimer:
+    """Collects wall-clock durations (in ms) for named pipeline stages.
+
+    Every stage is also exported to `rag_stage_duration_seconds` (see
+    backend/metrics.py) under its own name; `finish` exports `total`.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.timings_ms: Dict[str, float] = {}
+
+    async def time(self, stage: str, awaitable: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        observe_stage(stage, seconds)
+        self.timings_ms[stage] = round(seconds * 1000.0, 2)
+
+    def finish(self) -> Dict[str, float]:
+        self.record("total", time.perf_counter() - self._start)
+        return self.timings_ms
+
+
+async def _cancel(*tasks: "asyncio.Task[Any]") -> None:
+    pending = [t for t in tasks if not t.done()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+@dataclass
+class ChatContext:
+    """Everything retrieved for one chat turn, ready for answer generation."""
+
+    intent: IntentResult
+    query: QueryContext
+    docs: List[Document]
+    fewshot_docs: List[Document]
+    speculative_used: bool
+    timer: StageTimer
+    # Course codes pinned from the catalog (they lead `docs`).
+    pinned_codes: List[str] = field(default_factory=list)
+    # Deterministic prerequisite analysis (see `rag.prereqs.planning_context`).
+    planning: Optional[str] = None
+    # Set by the prompt packer: the history messages and profile that fit
+    # the token budget (None = the default last `HISTORY_MESSAGES`), and its
+    # token accounting.
+    history: Optional[List[ChatMessage]] = None
+    include_profile: bool = True
+    prompt_tokens: Optional[Dict[str, Any]] = None
+    # Rolling summary of the earlier turns of a server-side session.
+    summary: Optional[str] = None
+    # Retriever stage ms ("embed", "search", "fallback") summed over the
+    # turn's concurrent retrievals; reported for debug requests.
+    retrieval_timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def retrieved_chunks(self) -> List[str]:
+        return document_chunks(self.docs)
+
+    @property
+    def fewshot_chunks(self) -> List[str]:
+        return [d.text for d in self.fewshot_docs]
+
+    def response_metadata(self, verbosity: ResponseVerbosity = "standard") -> Dict[str, Any]:
+        """Metadata shared by the JSON and streaming chat endpoints."""
+
+        metadata: Dict[str, Any] = {
+            "intent": self.intent.intent,
+            "intent_source": self.intent.source,
+            "using_model": True,
+            "speculative_retrieval_used": self.speculative_used,
+        }
+        if self.intent.confidence is not None:
+            metadata["intent_confidence"] = self.intent.confidence
+        if self.pinned_codes:
+            metadata["pinned_courses"] = self.pinned_codes
+        if self.planning:
+            metadata["planning_context_used"] = True
+        if self.fewshot_docs and verbosity != "minimal":
+            # Hard-cap what we expose so the frontend dropdown only
+            # shows the top 2 few-shot examples actually used.
+            metadata["fewshot_chunks"] = self.fewshot_chunks[:2]
+        if self.prompt_tokens is not None:
+            metadata["prompt_tokens"] = self.prompt_tokens
+        if verbosity == "debug":
+            metadata["retrieval_timings_ms"] = {k: round(v, 2) for k, v in self.retrieval_timings_ms.items()}
+        return metadata
+
+    def answer_messages(self, request: ChatRequest) -> List[Dict[str, Any]]:
+        return build_answer_messages(
+            request,
+            self.retrieved_chunks,
+            intent=self.intent.intent,
+            fewshot_chunks=self.fewshot_chunks,
+            planning_context=self.planning,
+            history=self.history,
+            include_profile=self.include_profile,
+            summary=self.summary,
+        )
+
+
+async def prepare_chat_context(
+    llm: OpenRouterClient,
+    retriever: Retriever,
+    request: ChatRequest,
+    k: int = 5,
+    fewshot_k: int = 2,
+    overfetch: int = 3,
+    intent_classifier: Optional[LocalIntentClassifier] = None,
+    intent_threshold: float = 0.6,
+    catalog: Optional[CourseCatalog] = None,
+    max_pinned: int = 6,
+    prereq_graph: Optional[PrereqGraph] = None,
+    planning_max_excerpts: int = 2,
+    packer: Optional[PromptPacker] = None,
+    summary: Optional[str] = None,
+) -> ChatContext:
+    """Classify intent and retrieve context for one turn, overlapping stages.
+
+    The profile-aware question is embedded once; the local intent
+    classifier reuses that embedding. Intent classification may still be an
+    LLM round trip (when the local classifier is unsure or disabled), but
+    only the *type* filter of the main retrieval depends on it. So while the
+    intent call is in flight we:
+
+    - fetch few-shot examples (intent-independent), and
+    - speculatively fetch `k * overfetch` context documents filtered by major
+      only.
+
+    When the intent arrives, the speculative results are narrowed to the
+    intent's document types. If that leaves fewer than `k` documents, a
+    targeted query is issued with the shared embedding; if the speculative
+    query has not even finished by then, it is cancelled in favour of the
+    targeted one.
+
+    With a `catalog`, courses named in the question or listed in the
+    profile are looked up directly (no vector query) and pinned ahead of
+    the retrieved documents, up to `max_pinned`.
+
+    For `prerequisites_sequencing` turns with a `prereq_graph`, the
+    deterministic prerequisite analysis is computed and the retrieved
+    excerpts are cut to `planning_max_excerpts`, since the analysis answers
+    the sequencing part more compactly than long handbook text.
+
+    With a `packer`, the excerpts, few-shot examples, history and profile
+    are then fitted to its token budget (see `PromptPacker.pack`).
+    `summary` is a server-side session's summary of the earlier turns.
+    """
+
+    timer = StageTimer()
+    retrieval_timings: Dict[str, float] = {}
+    question = request.message
+    profile = request.prattProfile
+    pinned = catalog.pinned_for(question, profile, limit=max_pinned) if catalog is not None else []
+
+    def start_intent(embedding: Optional[Sequence[float]]) -> "asyncio.Task[IntentResult]":
+        task = asyncio.create_task(
+            timer.time(
+                "classify_intent",
+                classify_intent(
+                    llm, question, local_classifier=intent_classifier, threshold=intent_threshold, embedding=embedding
+                ),
+            )
+        )
+        tasks.append(task)
+        return task
+
+    tasks: List["asyncio.Task[Any]"] = []
+    try:
+        # An LLM-only classification overlaps with the embedding; the local
+        # classifier reuses the query embedding instead of computing its own.
+        intent_task = start_intent(None) if intent_classifier is None else None
+        query = await timer.time("embed_query", retriever.prepare_query(question, profile))
+        if intent_task is None:
+            intent_task = start_intent(query.embedding)
+
+        fewshot_task = asyncio.create_task(
+            timer.time(
+                "retrieve_fewshot",
+                retrieve_fewshot_examples(
+                    retriever, question, profile, k=fewshot_k, query=query, timings=retrieval_timings
+                ),
+            )
+        )
+        speculative_task = asyncio.create_task(
+            timer.time(
+                "retrieve_speculative",
+                retrieve_context(
+                    retriever,
+                    question,
+                    profile,
+                    intent="other",
+                    k=k * overfetch,
+                    query=query,
+                    timings=retrieval_timings,
+                ),
+            )
+        )
+        tasks.extend([fewshot_task, speculative_task])
+
+        intent_result = await intent_task
+        allowed_types = INTENT_DOC_TYPES.get(intent_result.intent)
+
+        docs: List[Document] = []
+        speculative_used = False
+        if allowed_types is None:
+            docs = (await speculative_task)[:k]
+            speculative_used = True
+        elif speculative_task.done():
+            narrowed = [d for d in speculative_task.result() if d.type in allowed_types]
+            if len(narrowed) >= k:
+                docs = narrowed[:k]
+                speculative_used = True
+        else:
+            await _cancel(speculative_task)
+
+        if not speculative_used:
+            docs = await timer.time(
+                "retrieve_context",
+                retrieve_context(
+                    retriever,
+                    question,
+                    profile,
+                    intent=intent_result.intent,
+                    k=k,
+                    query=query,
+                    timings=retrieval_timings,
+                ),
+            )
+
+        fewshot_docs = await fewshot_task
+    finally:
+        await _cancel(*tasks)
+
+    planning: Optional[str] = None
+    if prereq_graph is not None and intent_result.intent == "prerequisites_sequencing":
+        planning = planning_context(
+            prereq_graph,
+            question,
+            completed=profile.completedCourses if profile else [],
+            semester=profile.semester if profile else None,
+            major=normalize_major(profile.major) if profile else None,
+        )
+        if planning:
+            docs = docs[:planning_max_excerpts]
+
+    pinned_ids = {d.id for d in pinned}
+    ctx = ChatContext(
+        intent=intent_result,
+        query=query,
+        docs=pinned + [d for d in docs if d.id not in pinned_ids],
+        fewshot_docs=fewshot_docs,
+        speculative_used=speculative_used,
+        timer=timer,
+        pinned_codes=[d.code for d in pinned if d.code],
+        planning=planning,
+        summary=summary or None,
+        retrieval_timings_ms=retrieval_timings,
+    )
+    if packer is not None:
+        await timer.time("pack_prompt", _pack_context(packer, request, ctx, pinned=len(pinned)))
+    return ctx
+
+
+async def _pack_context(packer: PromptPacker, request: ChatRequest, ctx: ChatContext, pinned: int) -> None:
+    # The messages that are always sent: the prompt with no excerpts,
+    # examples, history or profile.
+    required = [
+        m["content"]
+        for m in build_answer_messages(
+            request,
+            [],
+            ctx.intent.intent,
+            planning_context=ctx.planning,
+            history=[],
+            include_profile=False,
+            summary=ctx.summary,
+        )
+    ]
+    history = [m for m in (request.history or [])[-HISTORY_MESSAGES:] if m.role in {"user", "assistant"}]
+    packed = await packer.pack(
+        required,
+        profile_summary_text(request.prattProfile),
+        ctx.docs,
+        ctx.retrieved_chunks,
+        ctx.fewshot_docs,
+        history,
+        pinned=pinned,
+    )
+    kept_ids = {d.id for d in packed.docs}
+    ctx.pinned_codes = [d.code for d in ctx.docs[:pinned] if d.code and d.id in kept_ids]
+    ctx.docs = packed.docs
+    ctx.fewshot_docs = packed.fewshot_docs
+    ctx.history = packed.history
+    ctx.include_profile = packed.include_profile
+    ctx.prompt_tokens = packed.metadata()
+
+
+def _answer_cache_key(request: ChatRequest, ctx: ChatContext) -> Optional[AnswerKey]:
+    """Cache key for this turn, or None if the answer must not be cached.
+
+    Follow-up turns (any prior assistant message in the history) depend on
+    the conversation, not just the question, so they always bypass the cache.
+    So do lexical-only (`bm25`) turns, which have no query embedding.
+    """
+
+    if ctx.query.embedding is None:
+        return None
+    if ctx.summary or any(m.role == "assistant" for m in request.history or []):
+        return None
+    raw_major = request.prattProfile.major if request.prattProfile else None
+    major = normalize_major(raw_major) or raw_major
+    doc_ids = [d.id for d in ctx.docs]
+    if ctx.planning:
+        # The analysis depends on the profile's completed courses and term.
+        doc_ids.append("planning:" + hashlib.sha256(ctx.planning.encode("utf-8")).hexdigest())
+    return AnswerCache.make_key(major, ctx.intent.intent, doc_ids)
+
+
+def _finish_timings(ctx: ChatContext, metadata: Dict[str, Any], request: ChatRequest, include: bool) -> None:
+    timings = ctx.timer.finish()
+    if include or request.verbosity == "debug":
+        metadata["timings_ms"] = timings
+
+
+def load_session(
+    request: ChatRequest, sessions: Optional[SessionStore]
+) -> Tuple[ChatRequest, Optional[str], Optional[Dict[str, Any]]]:
+    """Fill in the history of a server-side session turn.
+
+    Returns the request to answer, the session's summary and the metadata
+    describing the session. A request without a `conversationId` is
+    returned as is; one that carries its own `history` keeps it. Raises
+    `UnknownSessionError` if the ID was not issued by `sessions` (or there
+    is no store), rather than answering without the conversation's context.
+    """
+
+    if not request.conversationId:
+        return request, None, None
+    session = sessions.get(request.conversationId) if sessions is not None else None
+    if session is None:
+        raise UnknownSessionError(request.conversationId)
+    info = {"messages": len(session.messages), "summarized_messages": session.summarized_count}
+    if request.history:
+        return request, None, info
+    return request.model_copy(update={"history": session.messages}), session.summary, info
+
+
+def record_turn(
+    request: ChatRequest,
+    reply: str,
+    sessions: Optional[SessionStore],
+    summarizer: Optional[SessionSummarizer],
+) -> None:
+    """Append a completed turn to its session and schedule summarization.
+
+    A session deleted or expired while the turn ran is left alone.
+    """
+
+    if sessions is None or not request.conversationId:
+        return
+    try:
+        sessions.append(request.conversationId, [new_message("user", request.message), new_message("assistant", reply)])
+    except UnknownSessionError:
+        return
+    if summarizer is not None:
+        summarizer.schedule(request.conversationId)
+
+
+async def run_chat_pipeline(
+    llm: OpenRouterClient,
+    retriever: Retriever,
+    request: ChatRequest,
+    k: int = 5,
+    fewshot_k: int = 2,
+    overfetch: int = 3,
+    intent_classifier: Optional[LocalIntentClassifier] = None,
+    intent_threshold: float = 0.6,
+    answer_cache: Optional[AnswerCache] = None,
+    catalog: Optional[CourseCatalog] = None,
+    max_pinned: int = 6,
+    prereq_graph: Optional[PrereqGraph] = None,
+    planning_max_excerpts: int = 2,
+    packer: Optional[PromptPacker] = None,
+    sessions: Optional[SessionStore] = None,
+    summarizer: Optional[SessionSummarizer] = None,
+    response_timings: bool = False,
+) -> ChatResponse:
+    """Run one chat turn: `prepare_chat_context`, then answer generation.
+
+    If `answer_cache` holds a reply for a near-duplicate question with the
+    same major, intent and retrieved documents, it is returned instead of
+    calling the LLM (`metadata["cached"]`). Stage timings always go to
+    `rag_stage_duration_seconds`; with `response_timings` (or for debug
+    requests) they are also reported in `metadata["timings_ms"]`. Debug
+    requests also get the retriever's breakdown in
+    `metadata["retrieval_timings_ms"]`.
+
+    With `sessions`, a request with a server-issued `conversationId` and no
+    `history` gets the stored history and summary (see `load_session`), and the turn
+    is recorded afterwards; `summarizer` then compacts the session in the
+    background.
+    """
+
+    request, summary, session_info = load_session(request, sessions)
+    ctx = await prepare_chat_context(
+        llm,
+        retriever,
+        request,
+        k=k,
+        fewshot_k=fewshot_k,
+        overfetch=overfetch,
+        intent_classifier=intent_classifier,
+        intent_threshold=intent_threshold,
+        catalog=catalog,
+        max_pinned=max_pinned,
+        prereq_graph=prereq_graph,
+        planning_max_excerpts=planning_max_excerpts,
+        packer=packer,
+        summary=summary,
+    )
+    cache_key = _answer_cache_key(request, ctx) if answer_cache is not None else None
+    cached_reply: Optional[str] = None
+    if answer_cache is not None and cache_key is not None:
+        cached_reply = answer_cache.lookup(cache_key, ctx.query.embedding)
+
+    if cached_reply is not None:
+        response = ChatResponse(
+            reply=cached_reply,
+            retrieved_chunks=ctx.retrieved_chunks,
+            metadata={"intent": ctx.intent.intent},
+        )
+    else:
+        response = await ctx.timer.time(
+            "generate_answer",
+            generate_answer(
+                llm,
+                request,
+                ctx.retrieved_chunks,
+                intent=ctx.intent.intent,
+                fewshot_chunks=ctx.fewshot_chunks,
+                planning_context=ctx.planning,
+                include_prompt=request.verbosity == "debug",
+                history=ctx.history,
+                include_profile=ctx.include_profile,
+                summary=ctx.summary,
+            ),
+        )
+        if answer_cache is not None and cache_key is not None:
+            answer_cache.store(cache_key, ctx.query.embedding, response.reply)
+
+    response.metadata["cached"] = cached_reply is not None
+    shape_response(response, ctx.docs, request.verbosity)
+    for key, value in ctx.response_metadata(request.verbosity).items():
+        response.metadata.setdefault(key, value)
+    if session_info is not None:
+        response.metadata["session"] = session_info
+    record_turn(request, response.reply, sessions, summarizer)
+    _finish_timings(ctx, response.metadata, request, response_timings)
+    return response
+
+
+async def stream_chat_pipeline(
+    llm: OpenRouterClient,
+    retriever: Retriever,
+    request: ChatRequest,
+    k: int = 5,
+    fewshot_k: int = 2,
+    overfetch: int = 3,
+    intent_classifier: Optional[LocalIntentClassifier] = None,
+    intent_threshold: float = 0.6,
+    answer_cache: Optional[AnswerCache] = None,
+    catalog: Optional[CourseCatalog] = None,
+    max_pinned: int = 6,
+    prereq_graph: Optional[PrereqGraph] = None,
+    planning_max_excerpts: int = 2,
+    packer: Optional[PromptPacker] = None,
+    sessions: Optional[SessionStore] = None,
+    summarizer: Optional[SessionSummarizer] = None,
+    response_timings: bool = False,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Streaming variant of `run_chat_pipeline`.
+
+    Yields `(event, data)` pairs: one `"sources"` event as soon as retrieval
+    is done, one `"token"` event per streamed completion delta, and a final
+    `"done"` event carrying the response metadata. Closing the generator
+    (e.g. on client disconnect) closes the upstream OpenRouter stream.
+    Only turns whose reply completed are recorded in the session.
+    """
+
+    request, summary, session_info = load_session(request, sessions)
+    ctx = await prepare_chat_context(
+        llm,
+        retriever,
+        request,
+        k=k,
+        fewshot_k=fewshot_k,
+        overfetch=overfetch,
+        intent_classifier=intent_classifier,
+        intent_threshold=intent_threshold,
+        catalog=catalog,
+        max_pinned=max_pinned,
+        prereq_graph=prereq_graph,
+        planning_max_excerpts=planning_max_excerpts,
+        packer=packer,
+        summary=summary,
     )
+    metadata = ctx.response_metadata(request.verbosity)
+    if session_info is not None:
+        metadata["session"] = session_info
+
+    cache_key = _answer_cache_key(request, ctx) if answer_cache is not None else None
+    cached_reply: Optional[str] = None
+    if answer_cache is not None and cache_key is not None:
+        cached_reply = answer_cache.lookup(cache_key, ctx.query.embedding)
+    metadata["cached"] = cached_reply is not None
+
+    shaped = shape_response(ChatResponse(reply="", retrieved_chunks=ctx.retrieved_chunks), ctx.docs, request.verbosity)
+    yield "sources", {
+        "retrieved_chunks": shaped.retrieved_chunks,
+        "sources": [s.model_dump(exclude_none=True) for s in shaped.sources],
+        "metadata": metadata,
+    }
+
+    if cached_reply is not None:
+        yield "token", {"text": cached_reply}
+        record_turn(request, cached_reply, sessions, summarizer)
+        _finish_timings(ctx, metadata, request, response_timings)
+        yield "done", {"metadata": metadata}
+        return
+
+    messages = ctx.answer_messages(request)
+    if request.verbosity == "debug":
+        metadata["prompt_messages"] = messages
+
+    start = time.perf_counter()
+    first_token_s: Optional[float] = None
+    reply_parts: List[str] = []
+    stream = llm.chat_stream(messages, temperature=0.2)
+    try:
+        async for delta in stream:
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - start
+            reply_parts.append(delta)
+            yield "token", {"text": delta}
+    finally:
+        # Close the upstream HTTP stream promptly if our consumer went away.
+        await stream.aclose()
+
+    # Only complete replies reach this point, so they are safe to cache.
+    reply = "".join(reply_parts).strip()
+    if answer_cache is not None and cache_key is not None:
+        answer_cache.store(cache_key, ctx.query.embedding, reply)
+    record_turn(request, reply, sessions, summarizer)
+
+    ctx.timer.record("generate_answer", time.perf_counter() - start)
+    if first_token_s is not None:
+        ctx.timer.record("first_token", first_token_s)
+    _finish_timings(ctx, metadata, request, response_timings)
+    yield "done", {"metadata": metadata}
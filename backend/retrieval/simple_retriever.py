@@ -1,47 +1,121 @@
 from __future__ import annotations
 
-from typing import List
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from ..rag.catalog import COURSE_CODE_RE
+from ..rag.filters import matches_where
+from ..rag.schema import Document
 
-# Toy in-memory corpus mimicking Pratt handbook excerpts.
-_CORPUS: List[str] = [
-    "ECE majors must complete a set of core courses including EGR 103, MATH 218D or equivalent, PHYSICS 152L, and ECE 110L before taking most upper-level ECE electives.",
-    "Pratt students may request an overload above 5.5 credits only if they have a strong academic record and approval from their academic dean. First-year students are rarely approved for overloads.",
-    "Study abroad courses may count toward Pratt major requirements if pre-approved through the global education office and your director of undergraduate studies. Students should plan ahead to ensure core sequences like math and physics stay on track.",
-    "Mechanical Engineering majors typically complete a sequence of design courses, culminating in a senior capstone. At least two technical electives must be in advanced ME topics.",
-    "Electrical & Computer Engineering students must complete a minimum number of ECE electives at the 3xx level or above, including at least one course with a substantial design component.",
-]
 
+_WORD_RE = re.compile(r"[a-z0-9]+")
 
-def _simple_keyword_score(query: str, text: str) -> float:
-    """Very naive similarity: count overlapping lowercase tokens.
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or "
+    "should that the this to what when which will with".split()
+)
 
-    This is intentionally simple but structured so it can later be replaced by
-    a proper embedding-based similarity function.
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens plus normalized course-code tokens.
+
+    Every course code in the text also yields a joined token, with and
+    without its letter suffix ("ECE 280L" -> "ece280l", "ece280"), so
+    "ece280l", "ECE-280L" and "ECE 280" all hit the same postings.
     """
 
-    q_tokens = set(query.lower().split())
-    t_tokens = set(text.lower().split())
-    if not q_tokens:
-        return 0.0
-    overlap = q_tokens.intersection(t_tokens)
-    return len(overlap) / len(q_tokens)
+    tokens: List[str] = []
+    for match in COURSE_CODE_RE.finditer(text):
+        subject, number, suffix = match.group(1).lower(), match.group(2), match.group(3).lower()
+        tokens.append(subject + number)
+        if suffix:
+            tokens.append(subject + number + suffix)
+    tokens.extend(t for t in _WORD_RE.findall(text.lower()) if t not in _STOPWORDS)
+    return tokens
+
 
+def _index_text(doc: Document) -> str:
+    # Course rows keep their code and title out of `text`; index them too.
+    return " ".join(part for part in (doc.code, doc.title, doc.text) if part)
 
-async def retrieve(question: str, intent: str, k: int = 5) -> List[str]:
-    """Retrieve up to k handbook-like chunks relevant to the question.
 
-    For now this uses a trivial keyword overlap score over a small, hardcoded
-    corpus. In the future, this function will use embeddings and a vector
-    index built from the real Pratt handbooks placed under backend/data.
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring over Documents.
+
+    Postings map each token to `(doc index, term frequency)` pairs, so a
+    query only touches the documents that share at least one token with it.
+    `where` filters use the same Chroma-style syntax as the vector store.
+
+    A document's own course code is also indexed as a separate field: when
+    the query names it, the document gets `code_weight * idf` on top of its
+    BM25 score. Otherwise long handbook chunks that mention "ECE 230L" and
+    "ECE 280L" together outrank the ECE 280L course row itself.
     """
 
-    scored = [(_simple_keyword_score(question, chunk), chunk) for chunk in _CORPUS]
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top_chunks = [c for s, c in scored if s > 0][:k]
+    def __init__(
+        self,
+        docs: Sequence[Document],
+        k1: float = 1.5,
+        b: float = 0.75,
+        code_weight: float = 2.0,
+    ) -> None:
+        self._k1 = k1
+        self._b = b
+        self._code_weight = code_weight
+        self._docs: List[Document] = list(docs)
+        self._metadata: List[Dict[str, Any]] = [d.to_metadata() for d in self._docs]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._code_postings: Dict[str, List[int]] = {}
+        self._lengths: List[int] = []
+
+        for idx, doc in enumerate(self._docs):
+            counts = Counter(tokenize(_index_text(doc)))
+            self._lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self._postings.setdefault(token, []).append((idx, tf))
+            if doc.code:
+                for token in set(tokenize(doc.code)):
+                    self._code_postings.setdefault(token, []).append(idx)
+
+        n = len(self._docs)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf: Dict[str, float] = {
+            token: math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Top-`k` documents for `query` as `(document, score)`, best first."""
+
+        if not self._docs:
+            return []
+
+        k1, b, avg = self._k1, self._b, self._avg_length or 1.0
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf[token]
+            for idx, tf in postings:
+                norm = k1 * (1.0 - b + b * self._lengths[idx] / avg)
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+            for idx in self._code_postings.get(token, ()):
+                scores[idx] += self._code_weight * idf
 
-    # Fallback: if nothing overlaps, just return the first few chunks
-    if not top_chunks:
-        top_chunks = _CORPUS[: min(k, len(_CORPUS))]
+        if where:
+            scores = {idx: s for idx, s in scores.items() if matches_where(self._metadata[idx], where)}
 
-    return top_chunks
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self._docs[idx], score) for idx, score in best]
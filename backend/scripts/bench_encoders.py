@@ -0,0 +1,119 @@
+"""Benchmark the torch / ONNX / ONNX int8 all-MiniLM-L6-v2 encoders on CPU.
+
+Run from the project root, after `python -m backend.scripts.export_onnx_encoder --int8`:
+
+    python -m backend.scripts.bench_encoders --backends torch onnx-int8 --threads 2 --batch-sizes 1 16 64
+
+Each backend runs in its own process, without the embedding cache, and
+reports load time, peak RSS, single-query p50/p95 and texts/s per batch size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from backend.config import get_settings
+from backend.rag.embeddings import DEFAULT_MODEL_NAME
+from backend.rag.encoders import ENCODER_BACKENDS, create_encoder
+from backend.rag.ingest import load_context_documents
+from backend.scripts.bench_utils import percentile
+from backend.scripts.eval_retrieval import EVAL_SET
+
+
+def run_backend(backend: str, model: str, threads: int, batch_sizes: List[int], repeats: int) -> Dict[str, Any]:
+    if threads > 0 and backend == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    settings = get_settings()
+    encoder = create_encoder(
+        backend,
+        model,
+        onnx_dir=Path(settings.embedding_onnx_dir) if settings.embedding_onnx_dir else None,
+        threads=threads,
+    )
+    start = time.perf_counter()
+    encoder.load()
+    load_s = time.perf_counter() - start
+
+    questions = [q["question"] for q in json.loads(Path(EVAL_SET).read_text(encoding="utf-8"))["questions"]]
+    course_docs, handbook_docs = load_context_documents()
+    documents = [d.text for d in course_docs + handbook_docs]
+    encoder.encode(questions[:4])  # warmup
+
+    latencies: List[float] = []
+    for _ in range(repeats):
+        for question in questions:
+            start = time.perf_counter()
+            encoder.encode([question])
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    throughput: Dict[str, float] = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(documents), batch_size):
+            encoder.encode(documents[i : i + batch_size])
+        throughput[str(batch_size)] = round(len(documents) / (time.perf_counter() - start), 1)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        # ru_maxrss is in KB on Linux.
+        "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "query_ms": {"p50": round(percentile(latencies, 50), 3), "p95": round(percentile(latencies, 95), 3)},
+        "texts_per_s": throughput,
+        "documents": len(documents),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=ENCODER_BACKENDS, default=list(ENCODER_BACKENDS))
+    parser.add_argument("--threads", type=int, default=0, help="0 = library default")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.model, args.threads, args.batch_sizes, args.repeats)))
+        return
+
+    env = dict(os.environ)
+    if args.threads > 0:
+        env["OMP_NUM_THREADS"] = str(args.threads)
+    results = []
+    for backend in args.backends:
+        command = [sys.executable, "-m", "backend.scripts.bench_encoders", "--worker", backend]
+        command += ["--model", args.model, "--threads", str(args.threads), "--repeats", str(args.repeats)]
+        command += ["--batch-sizes", *map(str, args.batch_sizes)]
+        out = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    batch_header = " ".join(f"{f'bs={b}/s':>9}" for b in args.batch_sizes)
+    print(f"{results[0]['documents']} documents; latency per single-question encode in ms")
+    print(f"{'backend':>10} {'load s':>7} {'rss MB':>7} {'q p50':>7} {'q p95':>7} {batch_header}")
+    for r in results:
+        rates = " ".join(f"{r['texts_per_s'][str(b)]:>9.1f}" for b in args.batch_sizes)
+        print(
+            f"{r['backend']:>10} {r['load_s']:>7.2f} {r['rss_mb']:>7.0f} "
+            f"{r['query_ms']['p50']:>7.2f} {r['query_ms']['p95']:>7.2f} {rates}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"threads": args.threads, "runs": results}, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
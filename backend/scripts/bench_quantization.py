@@ -0,0 +1,97 @@
+"""Benchmark float32 / float16 / int8 embedding storage in NumpyVectorStore.
+
+Run from the project root:
+
+    python -m backend.scripts.bench_quantization --sizes 1000 10000 100000 --k 5
+
+For each corpus size and storage dtype it prints:
+
+- vector bytes per document in the index, next to the cost of the same
+  vector as a Python list of floats (what `EmbeddingBackend` returns);
+- query latency p50/p99 for a single query (k results, no filter);
+- recall@k against the float32 index, i.e. how many of the float32 top-k
+  results the quantized index also returns.
+
+The corpora are synthetic clustered unit vectors (see
+`bench_vector_backends`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Set
+
+import numpy as np
+
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.quantization import VECTOR_DTYPES
+from backend.scripts.bench_utils import percentile
+from backend.scripts.bench_vector_backends import _corpus, _documents
+
+
+def _list_bytes(vector: np.ndarray) -> int:
+    as_list = vector.tolist()
+    return sys.getsizeof(as_list) + sum(sys.getsizeof(x) for x in as_list)
+
+
+async def bench_size(n: int, args: argparse.Namespace, rng: np.random.Generator) -> None:
+    vectors = _corpus(n, args.dim, rng)
+    docs = _documents(n, rng)
+    picks = rng.integers(0, n, args.queries)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    list_bytes = _list_bytes(vectors[0])
+
+    baseline: List[Set[int]] = []
+    for dtype in VECTOR_DTYPES:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore(persist_dir=Path(tmp), dtype=dtype)
+            await store.add_documents(docs, vectors)
+            store.search_vectors(queries[:1], [args.k], [None])  # page the matrix in
+
+            latencies: List[float] = []
+            found: List[Set[int]] = []
+            for query in queries:
+                start = time.perf_counter()
+                hits = store.search_vectors(query[None, :], [args.k], [None])[0]
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                found.append({row for row, _ in hits})
+
+            if dtype == "float32":
+                baseline = found
+            recall = statistics.mean(len(a & b) / max(1, len(b)) for a, b in zip(found, baseline))
+            stats = await store.memory_stats()
+            print(
+                f"{n:>9} {dtype:>8} {stats['bytes_per_document']:>10} {list_bytes:>10} "
+                f"{percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f} {recall:>8.3f}"
+            )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    print(f"k={args.k}, dim={args.dim}, {args.queries} queries per size; latencies in ms")
+    print(
+        f"{'docs':>9} {'dtype':>8} {'B/doc':>10} {'list B/doc':>10} "
+        f"{'p50':>8} {'p99':>8} {'recall':>8}"
+    )
+    for n in args.sizes:
+        await bench_size(n, args, rng)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark query-embedding latency/throughput with and without micro-batching.
+
+Run from the project root:
+
+    python -m backend.scripts.bench_query_batcher --requests 512 --concurrency 1 4 16 64
+
+For each concurrency level it fires `--requests` distinct questions through
+(a) one `encode` call per query and (b) `QueryBatcher`, and prints p50/p99
+latency and queries/sec. The embedding cache is disabled so every query
+really runs the model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from backend.rag.batcher import QueryBatcher
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.embeddings import DEFAULT_MODEL_NAME, EmbeddingBackend
+
+
+_QUESTIONS = [
+    "What are the ECE core courses?",
+    "Can I take ECE 280L before MATH 218D?",
+    "How do I get an overload approved as a sophomore?",
+    "Will study abroad courses count toward my BME electives?",
+    "Which ME design courses lead up to the senior capstone?",
+    "What are the prerequisites for CEE 429?",
+    "How many technical electives does ME require?",
+    "Is ECE 350L offered in the fall?",
+]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+async def _run(
+    embed: Callable[[str], Awaitable[List[float]]],
+    total: int,
+    concurrency: int,
+) -> dict:
+    latencies: List[float] = []
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for i in counter:
+            text = f"{_QUESTIONS[i % len(_QUESTIONS)]} (#{i})"
+            start = time.perf_counter()
+            await embed(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": statistics.median(latencies) * 1000.0,
+        "p99_ms": _percentile(latencies, 99) * 1000.0,
+        "qps": total / elapsed,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    backend = EmbeddingBackend(
+        cache=EmbeddingCache(DEFAULT_MODEL_NAME, cache_dir=None, max_memory_items=0),
+    )
+    # Warm up the model and allocator before timing anything.
+    await backend.embed_documents(_QUESTIONS)
+
+    async def unbatched(text: str) -> List[float]:
+        return (await backend.embed_documents([text]))[0]
+
+    print(
+        f"{'mode':<10} {'conc':>5} {'p50 ms':>9} {'p99 ms':>9} {'q/s':>9}"
+        f"   (max_batch={args.max_batch_size}, max_wait={args.max_wait_ms}ms)"
+    )
+    for concurrency in args.concurrency:
+        batcher = QueryBatcher(
+            backend.embed_documents,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+        )
+        for mode, embed in (("single", unbatched), ("batched", batcher.submit)):
+            result = await _run(embed, args.requests, concurrency)
+            print(
+                f"{mode:<10} {concurrency:>5} {result['p50_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['qps']:>9.1f}"
+            )
+        print(f"{'':<10} {'':>5} batcher: {batcher.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark BM25, vector and hybrid retrieval over the ingested index.
+
+Run from the project root, after `python -m backend.rag.ingest`:
+
+    python -m backend.scripts.bench_retrieval_modes --k 5 --scale 1 10 100
+
+Prints:
+
+- BM25 index build time and query p50/p99 for the corpus replicated
+  `--scale` times (to see how the inverted index grows), and
+- for each retrieval mode on the real index: query-embedding time,
+  retrieval p50/p99, and how often a question naming a course code gets
+  that course back in its top-k ("code hit@k").
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import re
+import statistics
+import time
+from typing import List
+
+from backend.models import PrattProfile
+from backend.rag.embeddings import EmbeddingBackend
+from backend.rag.ingest import PERSIST_DIR
+from backend.rag.retriever import RETRIEVAL_MODES, Retriever
+from backend.rag.schema import Document
+from backend.rag.vector_store import VectorStore
+from backend.retrieval.simple_retriever import BM25Index
+
+
+_QUESTIONS = [
+    "What does ECE 280L cover?",
+    "Can I take ECE 230L before ECE 280L?",
+    "Is ece110l required before upper-level ECE electives?",
+    "What are the prerequisites for ME 344L?",
+    "Which semester is ECE 350L usually offered?",
+    "What are the ECE core courses?",
+    "How do I get an overload approved as a sophomore?",
+    "Will study abroad courses count toward my major?",
+    "Which ME design courses lead up to the senior capstone?",
+    "How many technical electives does ME require?",
+]
+
+_CODE_RE = re.compile(r"\b([A-Za-z]{2,8})[\s\-]*(\d{2,3}[A-Za-z]{0,2})\b")
+
+
+def _codes(text: str) -> List[str]:
+    return [f"{subject.upper()} {number.upper()}" for subject, number in _CODE_RE.findall(text)]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def _replicate(docs: List[Document], times: int) -> List[Document]:
+    if times <= 1:
+        return docs
+    return [dataclasses.replace(d, id=f"{d.id}#{i}") for i in range(times) for d in docs]
+
+
+def bench_bm25_scaling(docs: List[Document], scales: List[int], k: int, repeats: int) -> None:
+    print("BM25 index scaling")
+    print(f"{'docs':>9} {'build ms':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for scale in scales:
+        corpus = _replicate(docs, scale)
+        start = time.perf_counter()
+        index = BM25Index(corpus)
+        build_ms = (time.perf_counter() - start) * 1000.0
+
+        latencies: List[float] = []
+        for _ in range(repeats):
+            for question in _QUESTIONS:
+                start = time.perf_counter()
+                index.search(question, k=k)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+        print(
+            f"{len(corpus):>9} {build_ms:>10.1f} "
+            f"{_percentile(latencies, 50):>8.3f} {_percentile(latencies, 99):>8.3f}"
+        )
+
+
+async def bench_modes(store: VectorStore, k: int, repeats: int) -> None:
+    embedding_backend = EmbeddingBackend()
+    profile = PrattProfile(major="ECE")
+    corpus_codes = {d.code.upper() for d in await store.all_documents() if d.code}
+
+    print("\nRetrieval modes (real index)")
+    print(f"{'mode':>8} {'embed ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'code hit@k':>11}")
+    for mode in RETRIEVAL_MODES:
+        retriever = Retriever(store, embedding_backend, mode=mode)
+        # Build the BM25 index / warm the model outside the timed loop.
+        await retriever.lexical_index()
+        await retriever.prepare_query("warmup", profile)
+
+        embed_ms: List[float] = []
+        latencies: List[float] = []
+        hits = 0
+        targets = 0
+        for _ in range(repeats):
+            for question in _QUESTIONS:
+                start = time.perf_counter()
+                query = await retriever.prepare_query(question, profile)
+                embed_ms.append((time.perf_counter() - start) * 1000.0)
+
+                start = time.perf_counter()
+                docs = await retriever.retrieve(question, profile, intent="other", k=k, query=query)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+
+                returned = {(d.code or "").upper() for d in docs}
+                for code in _codes(question):
+                    if code in corpus_codes:
+                        targets += 1
+                        hits += code in returned
+
+        hit_rate = f"{hits}/{targets}" if targets else "n/a"
+        print(
+            f"{mode:>8} {statistics.mean(embed_ms):>9.2f} "
+            f"{_percentile(latencies, 50):>8.2f} {_percentile(latencies, 99):>8.2f} {hit_rate:>11}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    store = VectorStore(persist_dir=PERSIST_DIR)
+    docs = await store.all_documents()
+    if not docs:
+        raise SystemExit("The index is empty; run `python -m backend.rag.ingest` first.")
+
+    bench_bm25_scaling(docs, args.scale, args.k, args.repeats)
+    await bench_modes(store, args.k, args.repeats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Helpers shared by the benchmark and evaluation scripts."""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (`pct` in 0-100) of a non-empty sample."""
+
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
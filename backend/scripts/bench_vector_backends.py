@@ -0,0 +1,166 @@
+"""Benchmark the Chroma and NumPy vector store backends on synthetic corpora.
+
+Run from the project root:
+
+    python -m backend.scripts.bench_vector_backends --sizes 100 1000 10000 100000
+    python -m backend.scripts.bench_vector_backends --sizes 1000000 --skip-chroma-above 100000
+
+Each corpus is clustered random unit vectors (MiniLM's 384 dimensions) with
+`major` / `type` metadata drawn like the real index. For each size and backend
+it prints the build time, query p50/p99 (unfiltered, and with the
+major + type filter `Retriever.build_where` produces) and recall@k against a
+brute-force search done here. The numpy backend is exact, so its recall should
+be 1.0 (a sanity check). Chroma's recall shows what HNSW gives up.
+
+A 10^6 x 384 float32 matrix is about 1.5 GB. Chroma inserts at that size take
+a long time, so `--skip-chroma-above` limits which sizes Chroma is built for.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.schema import Document
+from backend.rag.vector_store import AnyVectorStore, VectorStore
+from backend.scripts.bench_utils import percentile
+
+
+_MAJORS = ["ECE", "BME", "ME", "CEE_ENV", "CS", "ALL"]
+_TYPES = ["course_description", "handbook_requirement", "fewshot_example"]
+_FILTER: Dict[str, Any] = {
+    "$and": [
+        {"major": {"$in": ["ECE", "ALL"]}},
+        {"type": {"$in": ["handbook_requirement", "course_description"]}},
+    ]
+}
+# Chroma rejects larger single `add` calls.
+_CHROMA_BATCH = 5000
+
+
+def _corpus(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Real embeddings cluster by topic; uniform random vectors would make
+    # HNSW look worse than it is on this data.
+    centers = rng.standard_normal((max(1, n // 50), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _documents(n: int, rng: np.random.Generator) -> List[Document]:
+    majors = rng.integers(0, len(_MAJORS), n)
+    types = rng.integers(0, len(_TYPES), n)
+    return [
+        Document(id=f"doc-{i}", major=_MAJORS[majors[i]], type=_TYPES[types[i]], code=None, title=None, text="", metadata={})
+        for i in range(n)
+    ]
+
+
+def _exact(vectors: np.ndarray, queries: np.ndarray, k: int, mask: Optional[np.ndarray]) -> List[set]:
+    truth: List[set] = []
+    # A few queries at a time keeps the score matrix small at 10^6 docs.
+    for start in range(0, len(queries), 16):
+        scores = queries[start : start + 16] @ vectors.T
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        truth.extend({f"doc-{i}" for i in row} for row in top)
+    return truth
+
+
+async def _build(backend: str, path: Path, docs: List[Document], vectors: np.ndarray) -> AnyVectorStore:
+    if backend == "numpy":
+        store: AnyVectorStore = NumpyVectorStore(persist_dir=path)
+        await store.add_documents(docs, vectors)
+        return store
+    store = VectorStore(persist_dir=path)
+    for start in range(0, len(docs), _CHROMA_BATCH):
+        end = start + _CHROMA_BATCH
+        await store.add_documents(docs[start:end], vectors[start:end].tolist())
+    return store
+
+
+async def _measure(
+    store: AnyVectorStore,
+    queries: np.ndarray,
+    k: int,
+    where: Optional[Dict[str, Any]],
+    truth: Sequence[set],
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        docs = await store.similarity_search(None, "", k=k, where=where, query_embedding=query.tolist())
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        recalls.append(len({d.id for d in docs} & expected) / max(1, len(expected)))
+    return {
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "recall": statistics.mean(recalls),
+    }
+
+
+async def bench_size(n: int, args: argparse.Namespace, rng: np.random.Generator) -> None:
+    vectors = _corpus(n, args.dim, rng)
+    docs = _documents(n, rng)
+    picks = rng.integers(0, n, args.queries)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    mask = np.array(
+        [d.major in ("ECE", "ALL") and d.type in ("handbook_requirement", "course_description") for d in docs]
+    )
+    truth_all = _exact(vectors, queries, args.k, None)
+    truth_filtered = _exact(vectors, queries, args.k, mask)
+
+    backends = ["numpy"] if n > args.skip_chroma_above else ["chroma", "numpy"]
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            store = await _build(backend, Path(tmp), docs, vectors)
+            build_s = time.perf_counter() - start
+            # One untimed query maps the matrix / loads the HNSW graph.
+            await store.similarity_search(None, "", k=args.k, query_embedding=queries[0].tolist())
+
+            plain = await _measure(store, queries, args.k, None, truth_all)
+            filtered = await _measure(store, queries, args.k, _FILTER, truth_filtered)
+            print(
+                f"{n:>9} {backend:>7} {build_s:>9.2f} "
+                f"{plain['p50']:>8.2f} {plain['p99']:>8.2f} {plain['recall']:>7.3f} "
+                f"{filtered['p50']:>8.2f} {filtered['p99']:>8.2f} {filtered['recall']:>7.3f}"
+            )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    print(f"k={args.k}, {args.queries} queries per size; latencies in ms, build in s")
+    print(
+        f"{'docs':>9} {'backend':>7} {'build s':>9} "
+        f"{'p50':>8} {'p99':>8} {'recall':>7} "
+        f"{'f-p50':>8} {'f-p99':>8} {'f-recall':>7}"
+    )
+    for n in args.sizes:
+        await bench_size(n, args, rng)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-chroma-above", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Check that the ONNX encoders reproduce the torch all-MiniLM-L6-v2 vectors.
+
+Run from the project root, after `python -m backend.scripts.export_onnx_encoder --int8`:
+
+    python -m backend.scripts.check_encoder_parity --backends onnx-int8 --min-cosine 0.98
+
+Prints per-text cosine to torch (min, p1, mean) and neighbor overlap@k on the
+eval questions; exits 1 if any cosine is below `--min-cosine`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from backend.config import get_settings
+from backend.rag.embeddings import DEFAULT_MODEL_NAME
+from backend.rag.encoders import ENCODER_BACKENDS, TorchEncoder, create_encoder
+from backend.rag.ingest import load_context_documents
+from backend.scripts.eval_retrieval import EVAL_SET
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def neighbor_overlap(reference_q: np.ndarray, reference_d: np.ndarray, q: np.ndarray, d: np.ndarray, k: int) -> float:
+    """Mean share of each query's reference top-k documents also in its top-k under (q, d)."""
+
+    k = min(k, reference_d.shape[0])
+    ref_top = np.argsort(-(reference_q @ reference_d.T), axis=1)[:, :k]
+    top = np.argsort(-(q @ d.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=ENCODER_BACKENDS[1:], default=["onnx", "onnx-int8"])
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    course_docs, handbook_docs = load_context_documents()
+    documents: List[str] = [d.text for d in course_docs + handbook_docs]
+    questions: List[str] = [q["question"] for q in json.loads(Path(EVAL_SET).read_text(encoding="utf-8"))["questions"]]
+    texts = documents + questions
+    split = len(documents)
+
+    reference = _normalize(TorchEncoder(args.model).encode(texts))
+    settings = get_settings()
+    onnx_dir = Path(settings.embedding_onnx_dir) if settings.embedding_onnx_dir else None
+
+    print(f"{len(documents)} documents + {len(questions)} questions, model {args.model}")
+    print(f"{'backend':>10} {'min cos':>9} {'p1 cos':>9} {'mean cos':>9} {f'overlap@{args.k}':>11}")
+    ok = True
+    for backend in args.backends:
+        encoder = create_encoder(backend, args.model, onnx_dir=onnx_dir)
+        vectors = _normalize(encoder.encode(texts))
+        cosines = np.sum(reference * vectors, axis=1)
+        overlap = neighbor_overlap(reference[split:], reference[:split], vectors[split:], vectors[:split], args.k)
+        failed = float(cosines.min()) < args.min_cosine
+        ok = ok and not failed
+        print(
+            f"{backend:>10} {cosines.min():>9.5f} {np.percentile(cosines, 1):>9.5f} {cosines.mean():>9.5f} "
+            f"{overlap:>11.3f}{'  BELOW --min-cosine' if failed else ''}"
+        )
+        if failed:
+            worst = int(np.argmin(cosines))
+            print(f"           lowest: {texts[worst][:100]!r}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Check that OpenRouterClient reuses pooled connections.
+
+Run from the project root:
+
+    python -m backend.scripts.check_openrouter_pooling --calls 50 --concurrency 5
+
+Starts a local stub of the OpenRouter chat completions endpoint that counts
+how many TCP connections it accepts, points `OpenRouterClient` at it via
+`OPENROUTER_BASE_URL`, and makes `--calls` requests. With pooling and
+keep-alive the number of connections should stay at or below the
+concurrency level instead of growing with the number of calls. No API key or
+network access is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+
+_REPLY = json.dumps({"choices": [{"message": {"role": "assistant", "content": "ok"}}]}).encode()
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server answering every request with `_REPLY`."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                # Simulate a little model latency so concurrent calls overlap.
+                await asyncio.sleep(0.01)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(_REPLY)}\r\n\r\n".encode()
+                    + _REPLY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    stub = StubServer()
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub-key")
+
+    from backend.config import get_settings
+    from backend.openrouter_client import OpenRouterClient
+
+    get_settings.cache_clear()
+    client = OpenRouterClient()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_call() -> None:
+        async with semaphore:
+            await client.chat([{"role": "user", "content": "ping"}])
+
+    try:
+        await asyncio.gather(*(one_call() for _ in range(args.calls)))
+    finally:
+        await client.aclose()
+        server.close()
+        await server.wait_closed()
+
+    print(f"calls={args.calls} concurrency={args.concurrency}")
+    print(f"requests served={stub.requests} connections opened={stub.connections}")
+    if stub.connections > args.concurrency:
+        print("FAIL: more connections than concurrent calls; connections are not being reused.")
+        return 1
+    print("OK: connections were reused.")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=5)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
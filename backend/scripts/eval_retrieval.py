@@ -0,0 +1,265 @@
+"""Offline retrieval quality and latency benchmark on labeled advising questions.
+
+Run from the project root. It needs no API keys: the index is built from the
+checked-in `ContextDocuments/` with the local MiniLM model.
+
+    python -m backend.scripts.eval_retrieval --output eval-before.json
+    python -m backend.scripts.eval_retrieval --backends chroma numpy numpy:int8 --modes vector bm25 hybrid
+    python -m backend.scripts.eval_retrieval --compare eval-before.json --max-drop 0.02
+
+For each backend (`chroma`, `numpy`, or `numpy:<dtype>`) a fresh index is
+built in a temporary directory with the current loaders and chunking, so a
+change to `_chunk_text` or `EmbeddingBackend` is measured too. Each labeled
+question in `retrieval_eval_set.json` is then run through
+`Retriever.retrieve` with its profile and intent, the way the chat pipeline
+calls it, in each retrieval mode. The script prints and writes as JSON:
+
+- recall@k (share of a question's relevant documents in the top k), hit@k
+  (at least one relevant document in the top k) and MRR (mean reciprocal
+  rank of the first relevant document in the top k);
+- per-stage latency p50/p95 in ms: `embed`, `search`, `fallback` (the
+  major-filter retry; its `calls` count is reported) and `total`.
+
+Relevant documents are given by ID (`expected_ids`, e.g.
+"courses-report.2025-12-05.csv:5" for ECE 280L) or by source file and a
+phrase of their text (`expected_passages`), which survives re-chunking. A
+label that matches no document stops the run.
+
+After the first repeat, query embeddings are embedding-cache hits. Set
+`EMBEDDING_CACHE_ENABLED=false` to time the model on every query.
+
+`--compare` matches runs by backend and mode against an earlier output
+file, prints the deltas and exits with status 1 if recall@k or MRR dropped
+by more than `--max-drop`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from backend.models import PrattProfile
+from backend.rag.embeddings import EmbeddingBackend
+from backend.rag.ingest import load_context_documents
+from backend.rag.retriever import RETRIEVAL_MODES, Retriever
+from backend.rag.schema import Document
+from backend.rag.vector_store import AnyVectorStore, create_vector_store
+from backend.scripts.bench_utils import percentile
+
+
+EVAL_SET = Path(__file__).resolve().parent / "retrieval_eval_set.json"
+
+_STAGES = ("embed", "search", "fallback")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def resolve_labels(questions: List[Dict[str, Any]], docs: List[Document]) -> Dict[str, Set[str]]:
+    """Relevant document IDs per question ID, from `expected_ids` and `expected_passages`."""
+
+    ids = {d.id for d in docs}
+    texts = [(d.id, d.metadata.get("source_file"), _normalize(d.text)) for d in docs]
+    relevant: Dict[str, Set[str]] = {}
+    stale: List[str] = []
+    for item in questions:
+        found: Set[str] = set()
+        for doc_id in item.get("expected_ids", []):
+            if doc_id in ids:
+                found.add(doc_id)
+            else:
+                stale.append(f"{item['id']}: no document {doc_id!r}")
+        for passage in item.get("expected_passages", []):
+            phrase = _normalize(passage["contains"])
+            matches = {doc_id for doc_id, source, text in texts if source == passage["source_file"] and phrase in text}
+            if not matches:
+                stale.append(f"{item['id']}: no {passage['source_file']} text contains {passage['contains']!r}")
+            found |= matches
+        relevant[item["id"]] = found
+    if stale:
+        raise SystemExit("Stale labels in the eval set:\n  " + "\n  ".join(stale))
+    return relevant
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+    return {
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "mean": round(statistics.mean(samples), 3),
+    }
+
+
+async def _build(spec: str, path: Path, docs: List[Document], embeddings: List[List[float]]) -> AnyVectorStore:
+    backend, _, dtype = spec.partition(":")
+    store = create_vector_store(backend, path, dtype=dtype or "float32")
+    await store.upsert_documents(docs, embeddings)
+    return store
+
+
+async def evaluate(
+    retriever: Retriever,
+    questions: List[Dict[str, Any]],
+    relevant: Dict[str, Set[str]],
+    k: int,
+    repeats: int,
+) -> Dict[str, Any]:
+    stage_ms: Dict[str, List[float]] = {stage: [] for stage in _STAGES}
+    total_ms: List[float] = []
+    fallback_calls = 0
+    per_question: List[Dict[str, Any]] = []
+
+    for repeat in range(repeats):
+        for item in questions:
+            profile = PrattProfile(**item.get("profile", {}))
+            timings: Dict[str, float] = {}
+            start = time.perf_counter()
+            docs = await retriever.retrieve(
+                item["question"], profile, intent=item.get("intent", "other"), k=k, timings=timings
+            )
+            total_ms.append((time.perf_counter() - start) * 1000.0)
+            for stage in _STAGES:
+                if stage in timings:
+                    stage_ms[stage].append(timings[stage])
+            fallback_calls += "fallback" in timings
+            if repeat > 0:
+                continue
+
+            returned = [d.id for d in docs]
+            expected = relevant[item["id"]]
+            rank = next((i for i, doc_id in enumerate(returned, start=1) if doc_id in expected), None)
+            per_question.append(
+                {
+                    "id": item["id"],
+                    "recall": len(expected & set(returned)) / len(expected),
+                    "rank": rank,
+                    "returned": returned,
+                }
+            )
+
+    latency = {stage: _latency(stage_ms[stage]) for stage in _STAGES}
+    latency["fallback"]["calls"] = fallback_calls
+    latency["total"] = _latency(total_ms)
+    return {
+        "metrics": {
+            "recall_at_k": round(statistics.mean(q["recall"] for q in per_question), 4),
+            "hit_at_k": round(statistics.mean(q["rank"] is not None for q in per_question), 4),
+            "mrr": round(statistics.mean(1.0 / q["rank"] if q["rank"] else 0.0 for q in per_question), 4),
+        },
+        "latency_ms": latency,
+        "questions": per_question,
+    }
+
+
+def _print_run(run: Dict[str, Any]) -> None:
+    metrics, latency = run["metrics"], run["latency_ms"]
+    print(
+        f"{run['backend']:>13} {run['mode']:>7} "
+        f"{metrics['recall_at_k']:>7.3f} {metrics['hit_at_k']:>6.3f} {metrics['mrr']:>6.3f} "
+        f"{latency['embed']['p50']:>8.2f} {latency['search']['p50']:>8.2f} {latency['search']['p95']:>8.2f} "
+        f"{latency['fallback']['calls']:>6} {latency['total']['p50']:>8.2f} {latency['total']['p95']:>8.2f}"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_drop: float) -> bool:
+    """Print metric deltas against `baseline`; False if quality regressed."""
+
+    previous = {(r["backend"], r["mode"]): r for r in baseline.get("runs", [])}
+    ok = True
+    print(f"\nCompared with {baseline.get('created', 'baseline')} (k={baseline.get('k')})")
+    print(f"{'backend':>13} {'mode':>7} {'d recall':>9} {'d mrr':>8} {'d total p50 ms':>15}")
+    for run in current["runs"]:
+        before = previous.get((run["backend"], run["mode"]))
+        if before is None:
+            print(f"{run['backend']:>13} {run['mode']:>7} (not in baseline)")
+            continue
+        d_recall = run["metrics"]["recall_at_k"] - before["metrics"]["recall_at_k"]
+        d_mrr = run["metrics"]["mrr"] - before["metrics"]["mrr"]
+        d_p50 = run["latency_ms"]["total"]["p50"] - before["latency_ms"]["total"]["p50"]
+        regressed = d_recall < -max_drop or d_mrr < -max_drop
+        ok = ok and not regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{run['backend']:>13} {run['mode']:>7} {d_recall:>+9.3f} {d_mrr:>+8.3f} {d_p50:>+15.2f}{flag}")
+    return ok
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    questions: List[Dict[str, Any]] = json.loads(Path(args.eval_set).read_text(encoding="utf-8"))["questions"]
+    course_docs, handbook_docs = load_context_documents()
+    docs = course_docs + handbook_docs
+    relevant = resolve_labels(questions, docs)
+
+    embedding_backend = EmbeddingBackend()
+    start = time.perf_counter()
+    embeddings = await embedding_backend.embed_documents([d.text for d in docs])
+    embed_docs_s = time.perf_counter() - start
+
+    result: Dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "k": args.k,
+        "repeats": args.repeats,
+        "model": embedding_backend.variant,
+        "documents": len(docs),
+        "questions": len(questions),
+        "embed_documents_s": round(embed_docs_s, 3),
+        "runs": [],
+    }
+
+    print(f"{len(questions)} questions, {len(docs)} documents, k={args.k}, {args.repeats} repeats; latencies in ms")
+    print(
+        f"{'backend':>13} {'mode':>7} {'recall':>7} {'hit':>6} {'mrr':>6} "
+        f"{'embed50':>8} {'search50':>8} {'search95':>8} {'fallbk':>6} {'total50':>8} {'total95':>8}"
+    )
+    for spec in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            store = await _build(spec, Path(tmp), docs, embeddings)
+            build_s = time.perf_counter() - start
+            for mode in args.modes:
+                retriever = Retriever(store, embedding_backend, mode=mode)
+                # Build the BM25 index and load the model outside the timed loop.
+                await retriever.lexical_index()
+                await retriever.prepare_query("warmup", None)
+                run = {"backend": spec, "mode": mode, "build_s": round(build_s, 3)}
+                run.update(await evaluate(retriever, questions, relevant, args.k, args.repeats))
+                result["runs"].append(run)
+                _print_run(run)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if not compare(result, baseline, args.max_drop):
+            return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eval-set", default=str(EVAL_SET))
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--modes", nargs="+", choices=RETRIEVAL_MODES, default=["hybrid"])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--max-drop", type=float, default=0.02)
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
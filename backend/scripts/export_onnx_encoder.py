@@ -0,0 +1,101 @@
+"""Export all-MiniLM-L6-v2 to ONNX for `EMBEDDING_BACKEND=onnx` / `onnx-int8`.
+
+Run from the project root (needs torch, sentence-transformers and onnxruntime):
+
+    python -m backend.scripts.export_onnx_encoder --int8
+
+Writes `model.onnx`, `model.int8.onnx` (with `--int8`), `tokenizer.json` and
+`encoder_config.json` to `backend/.onnx/<model>/` (or `--out-dir`, or
+`EMBEDDING_ONNX_DIR`). Check the result with `check_encoder_parity`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from backend.config import get_settings
+from backend.rag.embeddings import DEFAULT_MODEL_NAME
+from backend.rag.encoders import (
+    ONNX_CONFIG_FILE,
+    ONNX_INT8_MODEL_FILE,
+    ONNX_MODEL_FILE,
+    TOKENIZER_FILE,
+    onnx_model_dir,
+)
+
+
+def export(model_name: str, out_dir: Path, int8: bool, opset: int = 14) -> None:
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    modules = [type(m).__name__ for m in st_model]
+    # Only the pipeline OnnxEncoder reproduces: Transformer -> mean Pooling
+    # [-> Normalize].
+    pooling = st_model[1]
+    if modules[:2] != ["Transformer", "Pooling"] or pooling.get_pooling_mode_str() != "mean":
+        raise SystemExit(f"Unsupported sentence-transformers pipeline for {model_name}: {modules}")
+
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):  # type: ignore[no-untyped-def]
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+    sample = tokenizer(["an example sentence", "another one"], padding=True, return_tensors="pt")
+    inputs = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = out_dir / ONNX_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(),
+            tuple(sample[name] for name in inputs),
+            str(model_path),
+            input_names=inputs,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in inputs + ["token_embeddings"]},
+            opset_version=opset,
+        )
+    print(f"Wrote {model_path} ({model_path.stat().st_size / 1e6:.1f} MB)")
+
+    tokenizer.backend_tokenizer.save(str(out_dir / TOKENIZER_FILE))
+    config = {
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pooling": "mean",
+        "normalize": "Normalize" in modules,
+    }
+    (out_dir / ONNX_CONFIG_FILE).write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = out_dir / ONNX_INT8_MODEL_FILE
+        quantize_dynamic(str(model_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"Wrote {int8_path} ({int8_path.stat().st_size / 1e6:.1f} MB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--out-dir", help="base directory (default: EMBEDDING_ONNX_DIR or backend/.onnx)")
+    parser.add_argument("--int8", action="store_true", help="also write the int8-quantized model")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    base = args.out_dir or get_settings().embedding_onnx_dir
+    export(args.model, onnx_model_dir(args.model, Path(base) if base else None), args.int8, args.opset)
+
+
+if __name__ == "__main__":
+    main()
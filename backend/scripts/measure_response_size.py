@@ -0,0 +1,134 @@
+"""Measure chat response size and serialization time per verbosity.
+
+Run from the project root, after `python -m backend.rag.ingest`:
+
+    python -m backend.scripts.measure_response_size --repeats 200
+
+Builds responses for a set of questions from the real index, with no LLM
+call (the reply is a fixed ~1.5 KB answer), in these shapes:
+
+- `legacy`: the previous payload (prompt chunks, sources with texts, few-shot
+  texts and the full `prompt_messages`, null fields included);
+- `minimal` / `standard` / `debug`: `ChatRequest.verbosity` as served now.
+
+Each shape is encoded with the stdlib `json` module and, if installed,
+`orjson`. For each combination the script prints mean bytes and the p50
+serialization time (`model_dump` + encode), i.e. the "before" and "after"
+of the compact responses.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.config import get_settings
+from backend.models import ChatRequest, ChatResponse, PrattProfile
+from backend.rag.embeddings import EmbeddingBackend
+from backend.rag.ingest import PERSIST_DIR
+from backend.rag.retriever import Retriever
+from backend.rag.schema import Document
+from backend.rag.vector_store import create_vector_store
+from backend.rag_pipeline import build_answer_messages, docs_to_sources, document_chunks, shape_response
+
+
+_QUESTIONS = [
+    "What does ECE 280L cover?",
+    "Can I take ECE 230L before ECE 280L?",
+    "What are the ECE core courses?",
+    "How do I get an overload approved as a sophomore?",
+    "Will study abroad courses count toward my major?",
+    "Which ME design courses lead up to the senior capstone?",
+]
+
+_REPLY = (
+    "Based on the Pratt handbook excerpts, you should plan to take the course after completing "
+    "its listed prerequisites. Check the typical offering term before registering. "
+) * 8
+
+
+def _encoders() -> List[Tuple[str, Callable[[Any], bytes]]]:
+    encoders: List[Tuple[str, Callable[[Any], bytes]]] = [("json", lambda data: json.dumps(data).encode("utf-8"))]
+    if importlib.util.find_spec("orjson") is not None:
+        import orjson
+
+        encoders.append(("orjson", orjson.dumps))
+    return encoders
+
+
+def _legacy_response(request: ChatRequest, docs: List[Document], fewshot: List[Document]) -> ChatResponse:
+    chunks = document_chunks(docs)
+    fewshot_chunks = [d.text for d in fewshot]
+    return ChatResponse(
+        reply=_REPLY,
+        retrieved_chunks=chunks,
+        sources=docs_to_sources(docs),
+        metadata={
+            "intent": "other",
+            "prompt_messages": build_answer_messages(request, chunks, "other", fewshot_chunks),
+            "fewshot_chunks": fewshot_chunks[:2],
+        },
+    )
+
+
+def _response(request: ChatRequest, docs: List[Document], fewshot: List[Document]) -> ChatResponse:
+    chunks = document_chunks(docs)
+    fewshot_chunks = [d.text for d in fewshot]
+    metadata: Dict[str, Any] = {"intent": "other"}
+    if request.verbosity == "debug":
+        metadata["prompt_messages"] = build_answer_messages(request, chunks, "other", fewshot_chunks)
+    if request.verbosity != "minimal":
+        metadata["fewshot_chunks"] = fewshot_chunks[:2]
+    response = ChatResponse(reply=_REPLY, retrieved_chunks=chunks, metadata=metadata)
+    return shape_response(response, docs, request.verbosity)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    embedding_backend = EmbeddingBackend()
+    store = create_vector_store(settings.vector_store_backend, PERSIST_DIR, dtype=settings.vector_store_dtype)
+    retriever = Retriever(store, embedding_backend, mode=settings.retrieval_mode)
+    profile = PrattProfile(major="ECE", classYear="Sophomore", completedCourses=["ECE 110L", "MATH 218D"])
+
+    retrieved: List[Tuple[str, List[Document], List[Document]]] = []
+    for question in _QUESTIONS:
+        docs = await retriever.retrieve(question, profile, intent="other", k=5)
+        fewshot = await retriever.retrieve(question, profile, intent=None, k=2, type_filter="fewshot_example")
+        retrieved.append((question, docs, fewshot))
+
+    print(f"{len(_QUESTIONS)} questions, {args.repeats} repeats; serialization = model_dump + encode")
+    print(f"{'shape':>9} {'encoder':>8} {'bytes':>9} {'p50 us':>9}")
+    for shape in ("legacy", "minimal", "standard", "debug"):
+        for encoder_name, encode in _encoders():
+            sizes: List[int] = []
+            timings: List[float] = []
+            for question, docs, fewshot in retrieved:
+                if shape == "legacy":
+                    request = ChatRequest(message=question, prattProfile=profile, verbosity="debug")
+                    response = _legacy_response(request, docs, fewshot)
+                else:
+                    request = ChatRequest(message=question, prattProfile=profile, verbosity=shape)
+                    response = _response(request, docs, fewshot)
+                # The endpoint drops null fields (`response_model_exclude_none`).
+                exclude_none = shape != "legacy"
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    body = encode(response.model_dump(mode="json", exclude_none=exclude_none))
+                    timings.append((time.perf_counter() - start) * 1e6)
+                sizes.append(len(body))
+            print(f"{shape:>9} {encoder_name:>8} {statistics.mean(sizes):>9.0f} {statistics.median(timings):>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
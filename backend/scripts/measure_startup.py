@@ -0,0 +1,114 @@
+"""Measure API import time, time to ready and first-request latency.
+
+Run from the project root, after `python -m backend.rag.ingest`:
+
+    python -m backend.scripts.measure_startup --repeats 3
+    python -m backend.scripts.measure_startup --no-warmup
+    python -m backend.scripts.measure_startup --importtime
+
+Each repeat runs in a fresh Python process, so nothing is imported or
+loaded already:
+
+1. `import backend.main` is timed (what every uvicorn worker spawn and
+   `--reload` pays before it can accept connections).
+2. The app is started in-process (its lifespan runs, as under uvicorn) and
+   `/ready` is polled until it returns 200. The script reports that time
+   and the warmup step durations `/ready` returns.
+3. Two `/api/retrieve/batch` requests are timed: the first request after
+   ready, and the same request again.
+
+With `--no-warmup` (`STARTUP_WARMUP=false`), the app is ready at once and
+the first request pays for loading the model and index instead.
+`--importtime` adds the slowest modules from `python -X importtime`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+
+# Runs in the child process; prints one JSON line.
+_CHILD = r"""
+import json, time
+start = time.perf_counter()
+import backend.main as main
+import_s = time.perf_counter() - start
+
+from fastapi.testclient import TestClient
+
+body = {"queries": [{"message": "What does ECE 280L cover?", "prattProfile": {"major": "ECE"}}]}
+with TestClient(main.app) as client:
+    start = time.perf_counter()
+    while True:
+        ready = client.get("/ready")
+        if ready.status_code == 200 or ready.json()["status"] == "failed":
+            break
+        time.sleep(0.01)
+    ready_s = time.perf_counter() - start
+    requests_ms = []
+    for _ in range(2):
+        start = time.perf_counter()
+        client.post("/api/retrieve/batch", json=body).raise_for_status()
+        requests_ms.append((time.perf_counter() - start) * 1000.0)
+print(json.dumps({"import_s": import_s, "ready_s": ready_s, "ready": ready.json(), "requests_ms": requests_ms}))
+"""
+
+
+def _run_child(warmup: bool) -> Dict[str, Any]:
+    env = {**os.environ, "STARTUP_WARMUP": "true" if warmup else "false"}
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _slowest_imports(limit: int) -> List[Tuple[str, float]]:
+    """Top-level packages imported by `backend.main`, by cumulative import time.
+
+    Cumulative times nest (fastapi's includes pydantic's), so they do not add up.
+    """
+
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"], capture_output=True, text=True, check=True
+    ).stderr
+    rows: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if "." not in name and name != "backend":
+            rows.append((name, int(parts[1]) / 1e6))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-warmup", action="store_true", help="STARTUP_WARMUP=false (lazy loading)")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports")
+    args = parser.parse_args()
+
+    runs = [_run_child(warmup=not args.no_warmup) for _ in range(args.repeats)]
+    print(f"{len(runs)} runs, STARTUP_WARMUP={'false' if args.no_warmup else 'true'}")
+    print(f"  import backend.main     median {statistics.median(r['import_s'] for r in runs):8.3f} s")
+    print(f"  lifespan start to ready median {statistics.median(r['ready_s'] for r in runs):8.3f} s")
+    print(f"  first request           median {statistics.median(r['requests_ms'][0] for r in runs):8.1f} ms")
+    print(f"  second request          median {statistics.median(r['requests_ms'][1] for r in runs):8.1f} ms")
+    print(f"  last /ready: {json.dumps(runs[-1]['ready'])}")
+
+    if args.importtime:
+        print("\nSlowest packages imported by backend.main (cumulative):")
+        for name, seconds in _slowest_imports(10):
+            print(f"  {seconds:8.3f} s  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .models import ChatMessage, ChatRole
+
+
+# (previous summary, messages to fold into it) -> new summary
+Summarize = Callable[[str, List[ChatMessage]], Awaitable[str]]
+
+
+def new_message(role: ChatRole, content: str) -> ChatMessage:
+    return ChatMessage(
+        id=uuid.uuid4().hex,
+        role=role,
+        content=content,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+@dataclass
+class Session:
+    """One conversation: a rolling summary plus the turns not yet folded in."""
+
+    conversation_id: str
+    summary: str = ""
+    # Messages folded into `summary` so far.
+    summarized_count: int = 0
+    messages: List[ChatMessage] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    def copy(self) -> "Session":
+        return Session(self.conversation_id, self.summary, self.summarized_count, list(self.messages), self.updated_at)
+
+
+class UnknownSessionError(LookupError):
+    """A conversation ID the store did not issue, or whose session expired."""
+
+
+class SessionStore:
+    """Server-side conversation history keyed by IDs issued by `create`.
+
+    An LRU of at most `max_sessions`, written through to a SQLite file when
+    `path` is given. Sessions idle for more than `ttl_seconds` are gone.
+    Public methods are thread-safe and return copies.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 7 * 24 * 3600.0,
+    ) -> None:
+        self._max_sessions = max(1, max_sessions)
+        self._ttl = ttl_seconds
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            # WAL without a sync per commit keeps writes well under a
+            # millisecond, so they can run on the event loop; a power cut
+            # may lose the last few turns, which is acceptable here.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, summary TEXT NOT NULL, summarized_count INTEGER NOT NULL, "
+                "messages TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self._ttl,))
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def _load(self, conversation_id: str) -> Optional[Session]:
+        session = self._sessions.get(conversation_id)
+        if session is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT summary, summarized_count, messages, updated_at FROM sessions WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+            if row is not None:
+                messages = [ChatMessage(**m) for m in json.loads(row[2])]
+                session = Session(conversation_id, row[0], row[1], messages, row[3])
+        if session is None:
+            return None
+        if time.time() - session.updated_at > self._ttl:
+            self._delete(conversation_id)
+            return None
+        self._remember(session)
+        return session
+
+    def _remember(self, session: Session) -> None:
+        self._sessions[session.conversation_id] = session
+        self._sessions.move_to_end(session.conversation_id)
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _save(self, session: Session) -> None:
+        session.updated_at = time.time()
+        if self._db is None:
+            return
+        messages = json.dumps([m.model_dump() for m in session.messages])
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (id, summary, summarized_count, messages, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (session.conversation_id, session.summary, session.summarized_count, messages, session.updated_at),
+        )
+        self._db.commit()
+
+    def _delete(self, conversation_id: str) -> None:
+        self._sessions.pop(conversation_id, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (conversation_id,))
+            self._db.commit()
+
+    def get(self, conversation_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._load(conversation_id)
+            return session.copy() if session is not None else None
+
+    def create(self) -> str:
+        """Start an empty session and return its new, random conversation ID."""
+
+        with self._lock:
+            session = Session(secrets.token_urlsafe(24))
+            self._remember(session)
+            self._save(session)
+            return session.conversation_id
+
+    def append(self, conversation_id: str, messages: List[ChatMessage]) -> Session:
+        """Add messages to an existing conversation.
+
+        Raises `UnknownSessionError` if the store has no such session.
+        """
+
+        with self._lock:
+            session = self._load(conversation_id)
+            if session is None:
+                raise UnknownSessionError(conversation_id)
+            session.messages.extend(messages)
+            self._save(session)
+            return session.copy()
+
+    def compact(self, conversation_id: str, folded_ids: List[str], summary: str) -> bool:
+        """Replace the leading messages `folded_ids` with `summary`.
+
+        Returns False (and changes nothing) if the session no longer starts
+        with those messages, e.g. because it was deleted meanwhile.
+        """
+
+        with self._lock:
+            session = self._load(conversation_id)
+            if session is None or [m.id for m in session.messages[: len(folded_ids)]] != folded_ids:
+                return False
+            del session.messages[: len(folded_ids)]
+            session.summary = summary
+            session.summarized_count += len(folded_ids)
+            self._save(session)
+            return True
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._delete(conversation_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions_in_memory": len(self._sessions)}
+
+
+class SessionSummarizer:
+    """Folds older turns of a session into its rolling summary, in the background.
+
+    Once a session holds `keep_messages + batch_messages` unsummarized
+    messages, all but the newest `keep_messages` are summarized by one task
+    per conversation; a failure leaves them for the next turn.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        summarize: Summarize,
+        keep_messages: int = 6,
+        batch_messages: int = 2,
+    ) -> None:
+        self._store = store
+        self._summarize = summarize
+        self._keep = max(0, keep_messages)
+        self._batch = max(1, batch_messages)
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._runs = 0
+        self._failures = 0
+
+    def _due(self, session: Optional[Session]) -> bool:
+        return session is not None and len(session.messages) >= self._keep + self._batch
+
+    def schedule(self, conversation_id: str) -> None:
+        if conversation_id in self._tasks or not self._due(self._store.get(conversation_id)):
+            return
+        task = asyncio.create_task(self._run(conversation_id))
+        self._tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(conversation_id, None))
+
+    async def _run(self, conversation_id: str) -> None:
+        session = self._store.get(conversation_id)
+        # Loop in case turns arrived while the previous summary was generated.
+        while self._due(session):
+            assert session is not None
+            folded = session.messages[: len(session.messages) - self._keep]
+            try:
+                summary = await self._summarize(session.summary, folded)
+            except Exception:  # the next turn retries
+                self._failures += 1
+                return
+            self._runs += 1
+            if not self._store.compact(conversation_id, [m.id for m in folded], summary.strip()):
+                return
+            session = self._store.get(conversation_id)
+
+    async def drain(self) -> None:
+        """Wait for the running summaries (used by scripts and at shutdown)."""
+
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": len(self._tasks), "runs": self._runs, "failures": self._failures}
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from .intent_classifier import LocalIntentClassifier
+from .rag.embeddings import EmbeddingBackend
+from .rag.executor import get_stage_executor
+from .rag.retriever import Retriever
+from .rag.vector_store import AnyVectorStore
+
+
+T = TypeVar("T")
+
+# Typical questions run once at startup so the first student does not pay
+# for the model's first forward passes, Chroma's index load or the BM25
+# build. A mix of course-code, course-topic and handbook questions.
+WARMUP_QUESTIONS: List[str] = [
+    "What does ECE 280L cover?",
+    "Which courses satisfy the mechanical engineering design requirement?",
+    "Can I study abroad junior year and still graduate on time?",
+]
+
+
+class Readiness:
+    """Startup progress, reported by `/ready`.
+
+    The status goes from "starting" to "ready" when every warmup step has
+    finished, or to "failed" if one raised. Each step's duration and the
+    total time to ready (from construction, i.e. app startup) are recorded.
+    A failed warmup is retried with a fresh `Readiness` (see `backend/main.py`).
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.status = "starting"
+        self.steps_s: Dict[str, float] = {}
+        self.time_to_ready_s: Optional[float] = None
+        self.error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "failed"
+
+    async def step(self, name: str, awaitable: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.steps_s[name] = round(time.perf_counter() - start, 3)
+
+    def mark_ready(self) -> None:
+        self.status = "ready"
+        self.time_to_ready_s = round(time.perf_counter() - self._start, 3)
+
+    def mark_failed(self, exc: BaseException) -> None:
+        self.status = "failed"
+        self.error = f"{type(exc).__name__}: {exc}"
+        self.failed_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {"status": self.status, "steps_s": dict(self.steps_s)}
+        if self.time_to_ready_s is not None:
+            snapshot["time_to_ready_s"] = self.time_to_ready_s
+        if self.error is not None:
+            snapshot["error"] = self.error
+        return snapshot
+
+
+async def warm_up(
+    readiness: Readiness,
+    embedding_backend: EmbeddingBackend,
+    store: AnyVectorStore,
+    retriever: Retriever,
+    intent_classifier: Optional[LocalIntentClassifier] = None,
+    load_catalog: Optional[Callable[[], Any]] = None,
+    questions: List[str] = WARMUP_QUESTIONS,
+) -> None:
+    """Load the catalog, model and index, then run `questions` through retrieval.
+
+    Meant to run as a background task from the FastAPI lifespan, so the
+    server accepts connections (and answers `/health`) while it loads.
+    Blocking loads run on the stage executor. `load_catalog` (reading the
+    course CSVs) runs first: it is quick, and requests that arrive while the
+    model loads are answered from the catalog.
+    """
+
+    try:
+        if load_catalog is not None:
+            await readiness.step("course_catalog", get_stage_executor().run(load_catalog))
+        await readiness.step("load_model", embedding_backend.warmup(questions))
+        await readiness.step("open_index", store.open())
+        if retriever.mode != "vector":
+            await readiness.step("lexical_index", retriever.lexical_index())
+        if intent_classifier is not None:
+            await readiness.step("intent_centroids", intent_classifier.warmup())
+
+        async def queries() -> None:
+            for question in questions:
+                await retriever.retrieve(question, None, intent="other")
+
+        await readiness.step("warmup_queries", queries())
+    except Exception as exc:
+        readiness.mark_failed(exc)
+        return
+    readiness.mark_ready()
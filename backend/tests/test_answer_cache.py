@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend import answer_cache
+from backend.answer_cache import AnswerCache
+from backend.rag.numpy_store import NumpyVectorStore
+
+KEY = AnswerCache.make_key("ece", "prerequisites_sequencing", ["doc-1", "doc-2"])
+QUESTION = [1.0, 0.0, 0.0]
+
+
+def test_reuses_only_near_duplicates_with_the_same_context() -> None:
+    cache = AnswerCache(similarity_threshold=0.95)
+    cache.store(KEY, QUESTION, "Take ECE 110L first.")
+
+    same_context = AnswerCache.make_key("ECE", "prerequisites_sequencing", ["doc-2", "doc-1"])
+    assert cache.lookup(same_context, [2.0, 0.1, 0.0]) == "Take ECE 110L first."
+    # cos([1, 0.5, 0], QUESTION) ~ 0.89
+    assert cache.lookup(KEY, [1.0, 0.5, 0.0]) is None
+    assert cache.lookup(AnswerCache.make_key("ECE", "prerequisites_sequencing", ["doc-1"]), QUESTION) is None
+    assert cache.lookup(AnswerCache.make_key("ME", "prerequisites_sequencing", ["doc-1", "doc-2"]), QUESTION) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = AnswerCache(ttl_seconds=60)
+    now = answer_cache.time.monotonic()
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now)
+    cache.store(KEY, QUESTION, "Take ECE 110L first.")
+
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now + 59)
+    assert cache.lookup(KEY, QUESTION) == "Take ECE 110L first."
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now + 61)
+    assert cache.lookup(KEY, QUESTION) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_reingest_drops_every_entry(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    cache = AnswerCache(index_version=store.index_version)
+    cache.store(KEY, QUESTION, "Take ECE 110L first.")
+    assert cache.lookup(KEY, QUESTION) == "Take ECE 110L first."
+
+    store.bump_index_version()
+    assert cache.lookup(KEY, QUESTION) is None
+    assert cache.stats()["invalidations"] == 1
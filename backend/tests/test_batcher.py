@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import pytest
+
+from backend.rag.batcher import QueryBatcher
+
+
+def _encoder(calls: List[List[str]], fail: bool = False):
+    async def encode(texts: List[str]) -> List[List[float]]:
+        calls.append(list(texts))
+        if fail:
+            raise RuntimeError("model crashed")
+        return [[float(len(text))] for text in texts]
+
+    return encode
+
+
+def test_concurrent_submits_share_one_batch() -> None:
+    calls: List[List[str]] = []
+    batcher = QueryBatcher(_encoder(calls), max_batch_size=16, max_wait_ms=5.0)
+
+    async def run() -> List[List[float]]:
+        return await asyncio.gather(*(batcher.submit("x" * n) for n in range(1, 5)))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [4.0]]
+    assert calls == [["x", "xx", "xxx", "xxxx"]]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_full_batch_flushes_without_waiting() -> None:
+    calls: List[List[str]] = []
+    batcher = QueryBatcher(_encoder(calls), max_batch_size=2, max_wait_ms=60_000.0)
+
+    async def run() -> List[List[float]]:
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(t) for t in "abc")), timeout=1.0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        # The third text waits for the (one minute) window.
+        asyncio.run(run())
+    assert calls == [["a", "b"]]
+
+
+def test_encode_errors_reach_every_caller() -> None:
+    calls: List[List[str]] = []
+    batcher = QueryBatcher(_encoder(calls, fail=True), max_wait_ms=1.0)
+
+    async def run() -> List[BaseException]:
+        return await asyncio.gather(*(batcher.submit(t) for t in "ab"), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert [str(e) for e in errors] == ["model crashed", "model crashed"]
+    assert len(calls) == 1
+
+
+def test_cancelled_batch_does_not_leave_callers_waiting() -> None:
+    async def run() -> None:
+        running = asyncio.Event()
+
+        async def encode(texts: List[str]) -> List[List[float]]:
+            running.set()
+            await asyncio.sleep(60)
+            return []
+
+        batcher = QueryBatcher(encode, max_wait_ms=0.0)
+        callers = [asyncio.ensure_future(batcher.submit(t)) for t in "ab"]
+        await running.wait()
+        for task in list(batcher._inflight):
+            task.cancel()
+        done, pending = await asyncio.wait(callers, timeout=1.0)
+        assert not pending
+        assert all(task.cancelled() for task in done)
+
+    asyncio.run(run())
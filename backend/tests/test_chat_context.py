@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models import ChatRequest
+from backend.rag.retriever import QueryContext
+from backend.rag.schema import Document
+from backend.rag_pipeline import prepare_chat_context
+
+K = 2
+
+
+def _doc(doc_id: str, doc_type: str) -> Document:
+    return Document(
+        id=doc_id,
+        major="ECE",
+        type=doc_type,  # type: ignore[arg-type]
+        code=None,
+        title=None,
+        text=doc_id,
+        metadata={},
+    )
+
+
+class SlowLLM:
+    """Replies with `intent` after `delay` seconds."""
+
+    def __init__(self, intent: str, delay: float) -> None:
+        self.intent = intent
+        self.delay = delay
+
+    async def chat(self, messages: List[Any], temperature: float = 0.2) -> str:
+        await asyncio.sleep(self.delay)
+        return self.intent
+
+
+class FakeRetriever:
+    def __init__(self, speculative: List[Document], block_speculative: bool = False) -> None:
+        self.speculative = speculative
+        self.block_speculative = block_speculative
+        self.calls: List[Tuple[Optional[str], Optional[str]]] = []
+        self.cancelled = False
+
+    async def prepare_query(self, question: str, pratt_profile: Any) -> QueryContext:
+        return QueryContext(text=question, embedding=[1.0, 0.0], question=question)
+
+    async def retrieve(self, question: str, pratt_profile: Any, intent: Optional[str], **kwargs: Any) -> List[Document]:
+        self.calls.append((intent, kwargs.get("type_filter")))
+        if kwargs.get("type_filter") == "fewshot_example":
+            return [_doc("example", "fewshot_example")]
+        if intent == "other":
+            if self.block_speculative:
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    self.cancelled = True
+                    raise
+            return self.speculative
+        return [_doc("targeted", "course_description")]
+
+
+def _prepare(retriever: FakeRetriever, llm: SlowLLM) -> Dict[str, Any]:
+    ctx = asyncio.run(
+        prepare_chat_context(llm, retriever, ChatRequest(message="Can I take ECE 280L?"), k=K)  # type: ignore[arg-type]
+    )
+    return {"docs": [d.id for d in ctx.docs], "speculative": ctx.speculative_used, "fewshot": len(ctx.fewshot_docs)}
+
+
+def test_finished_speculative_results_are_narrowed() -> None:
+    speculative = [_doc("policy", "policy"), _doc("c1", "course_description"), _doc("c2", "handbook_requirement")]
+    retriever = FakeRetriever(speculative)
+    result = _prepare(retriever, SlowLLM("prerequisites_sequencing", delay=0.05))
+    assert result == {"docs": ["c1", "c2"], "speculative": True, "fewshot": 1}
+    assert ("prerequisites_sequencing", None) not in retriever.calls
+
+
+def test_too_few_narrowed_results_issue_a_targeted_query() -> None:
+    retriever = FakeRetriever([_doc("policy", "policy"), _doc("c1", "course_description")])
+    result = _prepare(retriever, SlowLLM("prerequisites_sequencing", delay=0.05))
+    assert result["docs"] == ["targeted"]
+    assert not result["speculative"]
+
+
+def test_unfinished_speculative_query_is_cancelled() -> None:
+    retriever = FakeRetriever([], block_speculative=True)
+    result = _prepare(retriever, SlowLLM("prerequisites_sequencing", delay=0.0))
+    assert result["docs"] == ["targeted"]
+    assert not result["speculative"]
+    assert retriever.cancelled
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.startup import Readiness
+
+
+def _parse(body: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for frame in body.split("\n\n"):
+        if not frame:
+            continue
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: ") :], json.loads(data_line[len("data: ") :])))
+    return events
+
+
+def test_sse_frame_is_one_event_and_one_data_line() -> None:
+    frame = main._sse("token", {"text": "line one\nline two"})
+    assert frame.endswith("\n\n")
+    assert _parse(frame) == [("token", {"text": "line one\nline two"})]
+
+
+def _stream(monkeypatch: pytest.MonkeyPatch, fail: bool) -> List[Tuple[str, Dict[str, Any]]]:
+    async def fake_pipeline(*args: Any, **kwargs: Any) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        yield "sources", {"retrieved_chunks": ["ECE 280L: Signals and Systems"], "sources": [], "metadata": {}}
+        yield "token", {"text": "ECE 280L covers"}
+        if fail:
+            raise RuntimeError("upstream closed")
+        yield "done", {"metadata": {"cached": False}}
+
+    async def no_course_data() -> None:
+        pass
+
+    readiness = Readiness()
+    readiness.status = "ready"
+    monkeypatch.setattr(main, "_readiness", readiness)
+    monkeypatch.setattr(main.get_settings(), "openrouter_api_key", "test-key")
+    monkeypatch.setattr(main, "_ensure_course_data", no_course_data)
+    monkeypatch.setattr(main, "_get_llm_client", lambda: None)
+    monkeypatch.setattr(main, "stream_chat_pipeline", fake_pipeline)
+
+    response = TestClient(main.app).post("/api/chat/stream", json={"message": "What does ECE 280L cover?"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    return _parse(response.text)
+
+
+def test_stream_events_in_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    events = _stream(monkeypatch, fail=False)
+    assert [name for name, _ in events] == ["sources", "token", "done"]
+    assert events[1][1] == {"text": "ECE 280L covers"}
+
+
+def test_pipeline_failure_ends_the_stream_with_an_error_event(monkeypatch: pytest.MonkeyPatch) -> None:
+    events = _stream(monkeypatch, fail=True)
+    assert [name for name, _ in events] == ["sources", "token", "error"]
+    assert events[-1][1] == {"detail": "Chat pipeline failed: upstream closed"}
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from backend.rag.embedding_cache import EmbeddingCache
+
+MODEL = "test-model"
+DIM = 4
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).random(DIM, dtype=np.float32)
+
+
+def _disk_dir(tmp_path: Path) -> Path:
+    return tmp_path / MODEL
+
+
+def _assert_cached(cache: EmbeddingCache, texts: list, seeds: list) -> None:
+    for vector, seed in zip(cache.get_many(texts), seeds):
+        assert vector is not None
+        np.testing.assert_array_equal(vector, _vector(seed))
+
+
+def test_reload_from_disk(tmp_path: Path) -> None:
+    cache = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    cache.put_many(["a", "b"], [_vector(1), _vector(2)])
+    cache.put_many(["c"], [_vector(3)])
+
+    reloaded = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    _assert_cached(reloaded, ["a", "b", "c"], [1, 2, 3])
+    assert reloaded.get_many(["d"]) == [None]
+    assert reloaded.stats()["hits_disk"] == 3
+
+
+def test_whitespace_variants_share_a_key(tmp_path: Path) -> None:
+    cache = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    cache.put_many(["ECE  280L\n"], [_vector(1)])
+    _assert_cached(cache, ["ECE 280L"], [1])
+
+
+def test_rows_without_keys_are_truncated(tmp_path: Path) -> None:
+    cache = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    cache.put_many(["a"], [_vector(1)])
+    # A crash between the vector and the key append: one orphan row plus a
+    # partial vector.
+    with (_disk_dir(tmp_path) / "vectors.f32").open("ab") as f:
+        f.write(_vector(99).tobytes() + b"\0\0")
+
+    reloaded = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    assert (_disk_dir(tmp_path) / "vectors.f32").stat().st_size == DIM * 4
+    reloaded.put_many(["b"], [_vector(2)])
+
+    fresh = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    _assert_cached(fresh, ["a", "b"], [1, 2])
+
+
+def test_malformed_key_truncates_the_rest(tmp_path: Path) -> None:
+    cache = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    cache.put_many(["a", "b", "c"], [_vector(1), _vector(2), _vector(3)])
+    keys_path = _disk_dir(tmp_path) / "keys.txt"
+    lines = keys_path.read_text().splitlines()
+    keys_path.write_text("\n".join([lines[0], "garbage", lines[2]]) + "\n")
+
+    reloaded = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    assert reloaded.stats()["disk_items"] == 1
+    reloaded.put_many(["d"], [_vector(4)])
+
+    fresh = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    _assert_cached(fresh, ["a", "d"], [1, 4])
+    assert fresh.get_many(["b", "c"]) == [None, None]
+
+
+def test_partial_key_line_is_dropped(tmp_path: Path) -> None:
+    cache = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    cache.put_many(["a", "b"], [_vector(1), _vector(2)])
+    keys_path = _disk_dir(tmp_path) / "keys.txt"
+    keys_path.write_bytes(keys_path.read_bytes()[:-10])
+
+    reloaded = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    reloaded.put_many(["c"], [_vector(3)])
+
+    fresh = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    _assert_cached(fresh, ["a", "c"], [1, 3])
+    assert fresh.get_many(["b"]) == [None]
+
+
+def test_two_writers_share_a_directory(tmp_path: Path) -> None:
+    first = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    second = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    first.put_many(["a", "b"], [_vector(1), _vector(2)])
+    # `second` loaded before those rows existed; its rows must still follow them.
+    second.put_many(["c"], [_vector(3)])
+    first.put_many(["d", "c"], [_vector(4), _vector(3)])
+
+    _assert_cached(second, ["a", "b", "c"], [1, 2, 3])
+    fresh = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    _assert_cached(fresh, ["a", "b", "c", "d"], [1, 2, 3, 4])
+    assert fresh.stats()["disk_items"] == 4
+
+
+def test_sees_rows_appended_by_another_instance(tmp_path: Path) -> None:
+    reader = EmbeddingCache(MODEL, cache_dir=tmp_path, max_memory_items=0)
+    assert reader.get_many(["a"]) == [None]
+
+    writer = EmbeddingCache(MODEL, cache_dir=tmp_path)
+    writer.put_many(["a", "b"], [_vector(1), _vector(2)])
+    _assert_cached(reader, ["a", "b"], [1, 2])
+
+    writer.put_many(["c"], [_vector(3)])
+    _assert_cached(reader, ["c"], [3])
+    assert reader.stats()["disk_items"] == 3
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend.config import get_settings
+from backend.rag.embeddings import DEFAULT_MODEL_NAME
+from backend.rag.encoders import ONNX_MODEL_FILE, OnnxEncoder, create_encoder, mean_pool
+from backend.rag.ingest import load_course_documents
+
+# Same floor as `check_encoder_parity --min-cosine`.
+MIN_COSINE = 0.98
+
+
+def test_mean_pool_ignores_padding() -> None:
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+
+    np.testing.assert_allclose(mean_pool(hidden, mask, normalize=False), [[2.0, 0.0]])
+    np.testing.assert_allclose(mean_pool(hidden, mask), [[1.0, 0.0]])
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_encoder("tensorflow", DEFAULT_MODEL_NAME)
+
+
+def test_missing_onnxruntime_is_a_clear_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / ONNX_MODEL_FILE).write_bytes(b"")
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+
+    encoder = OnnxEncoder(DEFAULT_MODEL_NAME, model_dir=tmp_path)
+    with pytest.raises(ImportError, match="requirements-onnx.txt"):
+        encoder.encode(["ECE 280L"])
+    assert not encoder.loaded
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_matches_torch(backend: str) -> None:
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    onnx_dir = get_settings().embedding_onnx_dir
+    encoder = create_encoder(backend, DEFAULT_MODEL_NAME, onnx_dir=Path(onnx_dir) if onnx_dir else None)
+    assert isinstance(encoder, OnnxEncoder)
+    if not encoder.model_path.exists():
+        pytest.skip(f"no ONNX export at {encoder.model_path}")
+
+    # Short questions and long course descriptions (truncated at max_seq_length).
+    texts = ["What does ECE 280L cover?", "Can I study abroad junior year?"]
+    texts += [d.text for d in load_course_documents()[::10]]
+    reference = create_encoder("torch", DEFAULT_MODEL_NAME).encode(texts)
+    vectors = encoder.encode(texts)
+
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosines = np.sum(reference * vectors, axis=1)
+    assert cosines.min() >= MIN_COSINE, texts[int(np.argmin(cosines))]
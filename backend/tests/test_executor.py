@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Callable, List
+
+import pytest
+
+from backend.rag.executor import StageExecutor
+
+
+async def _until(predicate: Callable[[], bool], timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_callers_past_capacity_wait_for_a_slot() -> None:
+    executor = StageExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    started: List[int] = []
+
+    def blocking(i: int) -> int:
+        started.append(i)
+        release.wait(5)
+        return i
+
+    async def run() -> List[int]:
+        tasks = [asyncio.create_task(executor.run(blocking, i)) for i in range(4)]
+        await _until(lambda: executor.stats()["running"] == 1)
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        # One running, one queued in the pool, two waiting for a slot.
+        assert stats["capacity"] == 2
+        assert stats["queue_depth"] == 3
+        assert started == [0]
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    try:
+        assert asyncio.run(run()) == [0, 1, 2, 3]
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["completed"] == 4
+    assert stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] == 3
+
+
+def test_failures_are_counted_and_loops_get_their_own_slots() -> None:
+    executor = StageExecutor(max_workers=1, max_pending=0)
+
+    def fail() -> None:
+        raise ValueError("boom")
+
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(fail))
+        # A second event loop (another asyncio.run) is not stuck on the first's semaphore.
+        assert asyncio.run(executor.run(lambda: 7)) == 7
+    finally:
+        executor.shutdown()
+    assert executor.stats()["failed"] == 1
+    assert executor.stats()["completed"] == 1
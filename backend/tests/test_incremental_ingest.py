@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+from backend.rag.ingest import iter_changes
+from backend.rag.ingest_pipeline import IngestPipeline
+from backend.rag.manifest import IngestManifest
+from backend.rag.schema import Document
+
+CSV_NAME = "TEST_classes.csv"
+HEADER = ["Subject code", "Catalog Number", "Course Title", "Course Description"]
+
+
+class FakeStore:
+    def __init__(self) -> None:
+        self.docs: Dict[str, Document] = {}
+        self.version = 0
+
+    def index_version(self) -> str:
+        return str(self.version)
+
+    def bump_index_version(self) -> None:
+        self.version += 1
+
+    async def upsert_documents(self, docs: List[Document], embeddings: List[List[float]]) -> None:
+        for doc in docs:
+            self.docs[doc.id] = doc
+
+    async def delete_documents(self, ids: List[str]) -> None:
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+
+class FakeEmbeddings:
+    def __init__(self, fail_on_call: Optional[int] = None) -> None:
+        self.calls = 0
+        self.texts = 0
+        self._fail_on_call = fail_on_call
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.calls == self._fail_on_call:
+            raise RuntimeError("embedding worker died")
+        self.texts += len(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+
+def _write_csv(context_dir: Path, rows: List[List[str]]) -> None:
+    with (context_dir / CSV_NAME).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def _rows(count: int) -> List[List[str]]:
+    return [["ECE", f"{100 + i}L", f"Course {i}", f"Description of course {i}."] for i in range(count)]
+
+
+def _run(context_dir: Path, store_dir: Path, store: FakeStore, embeddings: FakeEmbeddings, batch_size: int = 2):
+    manifest = IngestManifest.load(store_dir)
+    pipeline = IngestPipeline(store, embeddings, manifest=IngestManifest.load(store_dir), persist_dir=store_dir)  # type: ignore[arg-type]
+    return asyncio.run(pipeline.run(iter_changes(context_dir, manifest), batch_size=batch_size))
+
+
+@pytest.fixture
+def dirs(tmp_path: Path):
+    context_dir = tmp_path / "context"
+    store_dir = tmp_path / "index"
+    context_dir.mkdir()
+    store_dir.mkdir()
+    return context_dir, store_dir
+
+
+def test_every_checkpoint_bumps_the_version(dirs) -> None:
+    context_dir, store_dir = dirs
+    _write_csv(context_dir, _rows(5))
+    store = FakeStore()
+
+    progress = _run(context_dir, store_dir, store, FakeEmbeddings())
+
+    assert progress.upserted == 5
+    assert len(store.docs) == 5
+    # Three batches (2 + 2 + 1 documents), one bump per committed batch.
+    assert store.version == 3
+    entry = IngestManifest.load(store_dir).files[CSV_NAME]
+    assert len(entry.docs) == 5
+    assert entry.sha256
+
+
+def test_crash_leaves_manifest_and_version_consistent(dirs) -> None:
+    context_dir, store_dir = dirs
+    _write_csv(context_dir, _rows(5))
+    store = FakeStore()
+
+    with pytest.raises(RuntimeError):
+        _run(context_dir, store_dir, store, FakeEmbeddings(fail_on_call=2))
+
+    # The first batch is committed: in the store, in the manifest (the file
+    # itself not yet complete) and visible as a new index version.
+    entry = IngestManifest.load(store_dir).files[CSV_NAME]
+    assert set(entry.docs) == set(store.docs)
+    assert len(entry.docs) == 2
+    assert entry.sha256 == ""
+    assert store.version == 1
+
+    embeddings = FakeEmbeddings()
+    progress = _run(context_dir, store_dir, store, embeddings)
+    assert embeddings.texts == 3
+    assert progress.upserted == 3
+    assert store.version > 1
+    assert IngestManifest.load(store_dir).files[CSV_NAME].sha256
+
+
+def test_unchanged_run_keeps_the_version(dirs) -> None:
+    context_dir, store_dir = dirs
+    _write_csv(context_dir, _rows(3))
+    store = FakeStore()
+    _run(context_dir, store_dir, store, FakeEmbeddings())
+    version = store.version
+
+    embeddings = FakeEmbeddings()
+    progress = _run(context_dir, store_dir, store, embeddings)
+
+    assert not progress.changed
+    assert embeddings.calls == 0
+    assert store.version == version
+
+
+def test_changed_and_removed_rows(dirs) -> None:
+    context_dir, store_dir = dirs
+    _write_csv(context_dir, _rows(3))
+    store = FakeStore()
+    _run(context_dir, store_dir, store, FakeEmbeddings())
+    version = store.version
+
+    rows = _rows(2)
+    rows[1][3] = "A rewritten description."
+    _write_csv(context_dir, rows)
+    embeddings = FakeEmbeddings()
+    progress = _run(context_dir, store_dir, store, embeddings)
+
+    assert embeddings.texts == 1
+    assert progress.upserted == 1
+    assert progress.deleted == 1
+    assert len(store.docs) == 2
+    assert store.version > version
+    assert set(IngestManifest.load(store_dir).files[CSV_NAME].docs) == set(store.docs)
+
+
+def test_removed_file(dirs) -> None:
+    context_dir, store_dir = dirs
+    _write_csv(context_dir, _rows(2))
+    store = FakeStore()
+    _run(context_dir, store_dir, store, FakeEmbeddings())
+
+    (context_dir / CSV_NAME).unlink()
+    progress = _run(context_dir, store_dir, store, FakeEmbeddings())
+
+    assert progress.deleted == 2
+    assert store.docs == {}
+    assert CSV_NAME not in IngestManifest.load(store_dir).files
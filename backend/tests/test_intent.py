@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from backend.intent_classifier import LocalIntentClassifier
+from backend.models import IntentResult
+from backend.rag_pipeline import classify_intent
+
+
+class FakeLLM:
+    def __init__(self, reply: str) -> None:
+        self.reply = reply
+        self.calls = 0
+
+    async def chat(self, messages: List[Any], temperature: float = 0.2) -> str:
+        self.calls += 1
+        return self.reply
+
+
+class FakeLocalClassifier:
+    def __init__(self, intent: str, confidence: float) -> None:
+        self.result = IntentResult(intent=intent, confidence=confidence, source="local")
+
+    async def classify(self, question: str, embedding: Optional[Sequence[float]] = None) -> IntentResult:
+        return self.result
+
+
+def _classify(llm: FakeLLM, local: Any = None) -> IntentResult:
+    return asyncio.run(classify_intent(llm, "Can I take ECE 280L?", local, threshold=0.6))  # type: ignore[arg-type]
+
+
+def test_confident_local_result_skips_the_llm() -> None:
+    llm = FakeLLM("other")
+    result = _classify(llm, FakeLocalClassifier("prerequisites_sequencing", 0.9))
+    assert result.source == "local"
+    assert result.confidence == 0.9
+    assert llm.calls == 0
+
+
+def test_llm_fallback_has_no_confidence() -> None:
+    llm = FakeLLM("prerequisites_sequencing\n")
+    result = _classify(llm, FakeLocalClassifier("other", 0.3))
+    assert result == IntentResult(intent="prerequisites_sequencing", confidence=None, source="llm")
+    assert llm.calls == 1
+
+
+def test_unknown_llm_label_is_other() -> None:
+    result = _classify(FakeLLM("scheduling please"))
+    assert result.intent == "other"
+    assert result.confidence is None
+
+
+class FakeEmbeddings:
+    """Label examples lie on the axes; questions are embedded on the first."""
+
+    def __init__(self) -> None:
+        self.queries: List[str] = []
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        axis = {"greeting": 0, "prereq": 1}[texts[0].split()[0]]
+        return [[1.0 if i == axis else 0.0 for i in range(2)] for _ in texts]
+
+    async def embed_query(self, text: str) -> List[float]:
+        self.queries.append(text)
+        return [1.0, 0.0]
+
+
+def test_local_classifier_reuses_the_query_embedding() -> None:
+    embeddings = FakeEmbeddings()
+    classifier = LocalIntentClassifier(
+        embeddings,  # type: ignore[arg-type]
+        examples={"other": ["greeting hi"], "prerequisites_sequencing": ["prereq ECE 280L"]},
+    )
+
+    given = asyncio.run(classifier.classify("Can I take ECE 280L?", embedding=np.array([0.1, 0.9])))
+    assert given.intent == "prerequisites_sequencing"
+    assert embeddings.queries == []
+
+    embedded = asyncio.run(classifier.classify("hello"))
+    assert embedded.intent == "other"
+    assert embeddings.queries == ["hello"]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("prometheus_client")
+
+from backend import main  # noqa: E402
+from backend.metrics import observe_stage  # noqa: E402
+from backend.openrouter_client import _record_call  # noqa: E402
+
+
+def test_metrics_endpoint_exports_prometheus_text() -> None:
+    client = TestClient(main.app)
+    client.post("/api/chat", json={"message": "What does ECE 280L cover?"})
+    observe_stage("embed_query", 0.004)
+    _record_call("chat", "ok", 0.0, {"prompt_tokens": 120, "completion_tokens": 30})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'rag_stage_duration_seconds_bucket{le="0.005",stage="embed_query"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",path="/api/chat",status="200"}' in body
+    assert 'llm_tokens_total{call="chat",kind="prompt"}' in body
+    assert 'llm_requests_total{call="chat",outcome="ok"}' in body
+    assert "# TYPE app_ready gauge" in body
+    assert "# TYPE rag_stage_executor_tasks gauge" in body
+
+
+def test_metrics_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(main.get_settings(), "metrics_enabled", False)
+    assert TestClient(main.app).get("/metrics").status_code == 404
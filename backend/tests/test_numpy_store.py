@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from backend.rag import numpy_store
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.schema import Document
+from backend.rag.vector_store import SearchSpec
+
+DIM = 8
+
+
+def _docs(count: int, start: int = 0) -> List[Document]:
+    return [
+        Document(
+            id=f"doc-{i}",
+            major="ECE" if i % 2 else "ME",
+            type="course_description",
+            code=None,
+            title=None,
+            text=f"text {i}",
+            metadata={},
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def _embeddings(count: int, start: int = 0) -> List[List[float]]:
+    # One-hot-ish vectors, so each document is its own nearest neighbor.
+    rng = np.random.default_rng(start)
+    return [(np.eye(DIM)[i % DIM] + 0.01 * rng.random(DIM)).tolist() for i in range(start, start + count)]
+
+
+def _header(path: Path) -> Dict[str, int]:
+    return json.loads((path / "index.json").read_text())
+
+
+def _all(store: NumpyVectorStore) -> Dict[str, Document]:
+    return {d.id: d for d in asyncio.run(store.all_documents())}
+
+
+def _top(store: NumpyVectorStore, embedding: List[float], k: int = 1, where=None) -> List[str]:
+    docs = asyncio.run(store.similarity_search(None, "", k=k, where=where, query_embedding=embedding))
+    return [d.id for d in docs]
+
+
+def test_constructor_reads_and_writes_nothing(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(4), _embeddings(4)))
+    files = {p.name: p.stat().st_mtime_ns for p in tmp_path.iterdir()}
+
+    reopened = NumpyVectorStore(tmp_path, dtype="float16")
+    assert not reopened.loaded
+    assert len(_all(reopened)) == 4
+    # An index at another dtype is searched as stored, not converted on open.
+    assert {p.name: p.stat().st_mtime_ns for p in tmp_path.iterdir()} == files
+
+
+def test_upsert_appends_and_tombstones(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    docs = _docs(6)
+    embeddings = _embeddings(6)
+    asyncio.run(store.upsert_documents(docs, embeddings))
+
+    changed = dataclasses.replace(docs[0], text="rewritten")
+    asyncio.run(store.upsert_documents([changed], [embeddings[3]]))
+
+    header = _header(tmp_path)
+    assert header["generation"] == 0
+    assert header["count"] == 7
+    assert header["dead"] == 1
+    found = _all(store)
+    assert len(found) == 6
+    assert found["doc-0"].text == "rewritten"
+    # The dead row is never returned, the replacement is.
+    assert set(_top(store, embeddings[3], k=2)) == {"doc-0", "doc-3"}
+    assert _top(store, embeddings[0]) != ["doc-0"]
+
+
+def test_reload_keeps_tombstones(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(5), _embeddings(5)))
+    asyncio.run(store.upsert_documents(_docs(1), _embeddings(1, start=4)))
+    asyncio.run(store.delete_documents(["doc-2", "missing"]))
+
+    reopened = NumpyVectorStore(tmp_path)
+    found = _all(reopened)
+    assert sorted(found) == ["doc-0", "doc-1", "doc-3", "doc-4"]
+    assert set(_top(reopened, _embeddings(1, start=2)[0], k=4, where={"major": "ME"})) == {"doc-0", "doc-4"}
+    assert asyncio.run(reopened.memory_stats())["documents"] == 4
+
+
+def test_filtered_search_skips_dead_rows(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(4), _embeddings(4)))
+    asyncio.run(store.delete_documents(["doc-1"]))
+
+    hits = _top(store, _embeddings(1, start=1)[0], k=4, where={"major": "ECE"})
+    assert hits == ["doc-3"]
+
+
+def test_compaction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(numpy_store, "COMPACT_MIN_DEAD", 2)
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(6), _embeddings(6)))
+
+    asyncio.run(store.upsert_documents(_docs(1), _embeddings(1)))
+    assert _header(tmp_path)["generation"] == 0
+    asyncio.run(store.delete_documents(["doc-1", "doc-2"]))
+
+    header = _header(tmp_path)
+    assert header["generation"] == 1
+    assert header["dead"] == 0
+    assert header["count"] == 4
+    assert not list(tmp_path.glob("*-0.*"))
+    assert sorted(_all(NumpyVectorStore(tmp_path))) == ["doc-0", "doc-3", "doc-4", "doc-5"]
+
+
+def test_dtype_converted_on_first_write(tmp_path: Path) -> None:
+    asyncio.run(NumpyVectorStore(tmp_path).upsert_documents(_docs(3), _embeddings(3)))
+
+    store = NumpyVectorStore(tmp_path, dtype="int8")
+    assert _top(store, _embeddings(1, start=2)[0]) == ["doc-2"]
+    assert _header(tmp_path)["dtype"] == "float32"
+
+    asyncio.run(store.upsert_documents(_docs(1, start=3), _embeddings(1, start=3)))
+    header = _header(tmp_path)
+    assert header["dtype"] == "int8"
+    assert header["count"] == 4
+    assert _top(NumpyVectorStore(tmp_path, dtype="int8"), _embeddings(1, start=3)[0]) == ["doc-3"]
+
+
+def test_uncommitted_append_is_ignored(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(3), _embeddings(3)))
+    with (tmp_path / "rows-0.jsonl").open("ab") as f:
+        f.write(b'{"garbage')
+    with (tmp_path / "vectors-0.f32").open("ab") as f:
+        f.write(b"\0" * 10)
+
+    reopened = NumpyVectorStore(tmp_path)
+    assert len(_all(reopened)) == 3
+    asyncio.run(reopened.upsert_documents(_docs(1, start=3), _embeddings(1, start=3)))
+    assert (tmp_path / "vectors-0.f32").stat().st_size == 4 * DIM * 4
+    assert _top(NumpyVectorStore(tmp_path), _embeddings(1, start=3)[0]) == ["doc-3"]
+
+
+def test_reader_sees_external_writes(tmp_path: Path) -> None:
+    reader = NumpyVectorStore(tmp_path)
+    assert _all(reader) == {}
+
+    writer = NumpyVectorStore(tmp_path)
+    asyncio.run(writer.upsert_documents(_docs(3), _embeddings(3)))
+    assert sorted(_all(reader)) == ["doc-0", "doc-1", "doc-2"]
+
+    asyncio.run(writer.delete_documents(["doc-0"]))
+    assert sorted(_top(reader, _embeddings(1)[0], k=3)) == ["doc-1", "doc-2"]
+
+
+def test_search_results_carry_their_vectors(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path, dtype="float16")
+    embeddings = _embeddings(3)
+    asyncio.run(store.upsert_documents(_docs(3), embeddings))
+
+    (hit,) = asyncio.run(store.similarity_search(None, "", k=1, query_embedding=embeddings[1]))
+    assert hit.id == "doc-1"
+    assert isinstance(hit.embedding, np.ndarray) and hit.embedding.dtype == np.float32
+    expected = np.asarray(embeddings[1]) / np.linalg.norm(embeddings[1])
+    np.testing.assert_allclose(hit.embedding, expected, atol=1e-3)
+    assert all(d.embedding is None for d in asyncio.run(store.all_documents()))
+
+
+def test_reload_runs_on_the_executor(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    server = NumpyVectorStore(tmp_path)
+    asyncio.run(server.upsert_documents(_docs(2), _embeddings(2)))
+    # An ingest run in another process replaces `index.json`.
+    asyncio.run(NumpyVectorStore(tmp_path).upsert_documents(_docs(3), _embeddings(3)))
+
+    load = server._load
+    threads: List[threading.Thread] = []
+
+    def recording_load() -> Any:
+        threads.append(threading.current_thread())
+        return load()
+
+    monkeypatch.setattr(server, "_load", recording_load)
+    assert len(_all(server)) == 3
+    assert threads and threading.main_thread() not in threads
+
+
+def test_batched_search_matches_single_searches(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents(_docs(12), _embeddings(12)))
+    rng = np.random.default_rng(7)
+    specs = [
+        SearchSpec(k=k, where=where, query="", query_embedding=rng.random(DIM).tolist())
+        for k, where in [(3, None), (5, {"major": "ECE"}), (1, {"major": "ME"}), (4, {"major": "ECE"}), (20, None)]
+    ]
+
+    batched = asyncio.run(store.similarity_search_many(None, specs))
+    for spec, docs in zip(specs, batched):
+        assert [d.id for d in docs] == _top(store, spec.query_embedding, k=spec.k, where=spec.where)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from backend.config import get_settings
+from backend.openrouter_client import OpenRouterClient
+
+STREAM = (
+    ": OPENROUTER PROCESSING\n\n"
+    'data: {"choices": [{"delta": {"content": "ECE 280L"}}]}\n\n'
+    'data: {"choices": [{"delta": {"content": " covers signals."}}]}\n\n'
+    'data: {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 4}}\n\n'
+    "data: [DONE]\n\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "openrouter_api_key", "test-key")
+    monkeypatch.setattr(get_settings(), "openrouter_base_url", "https://openrouter.test/api/v1")
+
+
+def test_calls_share_the_injected_client() -> None:
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if json.loads(request.content).get("stream"):
+            return httpx.Response(200, text=STREAM, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "other"}}]})
+
+    async def run() -> List[str]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            client = OpenRouterClient(http_client=http)
+            replies = [await client.chat([{"role": "user", "content": "hi"}])]
+            replies += [delta async for delta in client.chat_stream([{"role": "user", "content": "hi"}])]
+            await client.aclose()
+            # The caller's client is left open.
+            assert not http.is_closed
+            return replies
+
+    assert asyncio.run(run()) == ["other", "ECE 280L", " covers signals."]
+    assert [str(r.url) for r in requests] == ["https://openrouter.test/api/v1/chat/completions"] * 2
+    assert requests[0].headers["authorization"] == "Bearer test-key"
+
+
+def test_owned_client_is_closed_with_it() -> None:
+    client = OpenRouterClient()
+    asyncio.run(client.aclose())
+    assert client._http.is_closed
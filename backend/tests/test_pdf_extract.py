@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from pypdf import PageObject, PdfWriter
+
+from backend.rag.pdf_extract import extract_pdf_pages
+
+
+def _blank_pdf(path: Path, pages: int) -> Path:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with path.open("wb") as f:
+        writer.write(f)
+    return path
+
+
+def test_failed_pages_are_not_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pdf = _blank_pdf(tmp_path / "handbook.pdf", pages=3)
+    cache_dir = tmp_path / "cache"
+    original = PageObject.extract_text
+    calls = {"n": 0}
+
+    def flaky_extract_text(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise MemoryError("transient")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(PageObject, "extract_text", flaky_extract_text)
+
+    failed: dict = {}
+    pages = extract_pdf_pages([pdf], max_workers=1, cache_dir=cache_dir, failed_pages=failed)
+    assert len(pages[pdf]) == 3
+    assert failed == {pdf: [1]}
+    assert not list(cache_dir.glob("*.json"))
+
+    failed = {}
+    extract_pdf_pages([pdf], max_workers=1, cache_dir=cache_dir, failed_pages=failed)
+    assert failed == {}
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    # Served from the cache now: no extraction at all.
+    before = calls["n"]
+    extract_pdf_pages([pdf], max_workers=1, cache_dir=cache_dir)
+    assert calls["n"] == before
+
+
+def test_pool_extraction_from_a_worker_thread(tmp_path: Path) -> None:
+    pdf = _blank_pdf(tmp_path / "handbook.pdf", pages=8)
+    with ThreadPoolExecutor(max_workers=1) as threads:
+        pages = threads.submit(extract_pdf_pages, [pdf], max_workers=2, cache_dir=None).result(timeout=60)
+    assert pages == {pdf: [""] * 8}
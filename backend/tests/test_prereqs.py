@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.rag.ingest import load_course_documents
+from backend.rag.prereqs import PrereqGraph, parse_requirements
+
+
+@pytest.fixture(scope="module")
+def catalog_graph() -> PrereqGraph:
+    return PrereqGraph.from_documents(load_course_documents())
+
+
+def test_semicolons_separate_requirements(catalog_graph: PrereqGraph) -> None:
+    # "Physics 152L; Mathematics 353 or 353A; BME 244L; ECE 110L or BME 253L;
+    # BME 271 or BME 271A or ECE 280L; or consent of the instructor."
+    node = catalog_graph.courses["BME 354L"]
+    assert node.prereqs == [
+        ["PHYSICS 152L"],
+        ["MATH 353", "MATH 353A"],
+        ["BME 244L"],
+        ["ECE 110L", "BME 253L"],
+        ["BME 271", "BME 271A", "ECE 280L"],
+    ]
+    assert node.notes == ["consent of the instructor"]
+
+
+def test_math_abbreviation(catalog_graph: PrereqGraph) -> None:
+    # "BME 244L and (Math 353 or 353A) and (ME 221L or BME 221L)."
+    assert catalog_graph.courses["BME 302L"].prereqs == [
+        ["BME 244L"],
+        ["MATH 353", "MATH 353A"],
+        ["ME 221L", "BME 221L"],
+    ]
+
+
+def test_ampersand_subject_name(catalog_graph: PrereqGraph) -> None:
+    # "Biomedical Engineering 253L or Electrical & Computer Engineering 110L
+    # and Mathematics 216, 218, 221, or 356."
+    node = catalog_graph.courses["BME 271D"]
+    assert node.prereqs == [
+        ["BME 253L", "ECE 110L"],
+        ["MATH 216", "MATH 218", "MATH 221", "MATH 356"],
+    ]
+    assert node.notes == []
+
+
+def test_unspaced_course_code(catalog_graph: PrereqGraph) -> None:
+    # "EGR103 or EGR 105L or CS 201 (GE)."
+    assert catalog_graph.courses["BME 254L"].prereqs == [["EGR 103", "EGR 105L", "CS 201"]]
+
+
+def test_comma_list_with_inner_or(catalog_graph: PrereqGraph) -> None:
+    # "ECE 280L, Math 212 or 219."
+    assert catalog_graph.courses["ECE 380"].prereqs == [["ECE 280L"], ["MATH 212", "MATH 219"]]
+
+
+def test_eligible_requires_every_group(catalog_graph: PrereqGraph) -> None:
+    assert "BME 354L" not in catalog_graph.eligible(["PHYSICS 152L"], major="BME")
+    done = ["PHYSICS 152L", "MATH 353", "BME 244L", "ECE 110L", "ECE 280L"]
+    assert "BME 354L" in catalog_graph.eligible(done, major="BME")
+
+
+def test_chain_includes_every_group(catalog_graph: PrereqGraph) -> None:
+    chain = catalog_graph.chain("BME 354L", ["PHYSICS 152L"])
+    assert chain is not None
+    assert chain[-1] == "BME 354L"
+    assert {"MATH 353", "BME 244L"} <= set(chain)
+
+
+def test_bare_number_does_not_cross_unknown_subject() -> None:
+    prereqs, _, notes = parse_requirements("Prerequisite: Chemistry 20 and Neuroscience 101, 102.")
+    assert prereqs == [["CHEM 20"]]
+    assert notes == ["Neuroscience 101, 102"]
+
+
+def test_bare_number_inherits_subject() -> None:
+    prereqs, _, _ = parse_requirements("Prerequisite: Chemistry 20, 21, or 101DL.")
+    assert prereqs == [["CHEM 20", "CHEM 21", "CHEM 101DL"]]
+
+
+def test_corequisites_are_separate() -> None:
+    prereqs, coreqs, _ = parse_requirements(
+        "Corequisite: Biomedical Engineering 244L. Prerequisite: Biology 201L or 203L."
+    )
+    assert coreqs == [["BME 244L"]]
+    assert prereqs == [["BIOLOGY 201L", "BIOLOGY 203L"]]
+
+
+def test_co_slash_prerequisite_is_a_corequisite(catalog_graph: PrereqGraph) -> None:
+    # "Prerequisite: Engineering 103L or Computer Science 201 and
+    # co-/prerequisite: (Biology 201L or Biology 203L) and (Mathematics 212, ...)."
+    node = catalog_graph.courses["BME 244L"]
+    assert node.prereqs == [["EGR 103L", "COMPSCI 201"]]
+    assert node.coreqs[0] == ["BIOLOGY 201L", "BIOLOGY 203L"]
+    assert node.notes == []
+
+
+def test_parenthetical_asides_are_dropped() -> None:
+    prereqs, _, notes = parse_requirements("Prerequisite: BME 260L (GE, MC) and senior standing.")
+    assert prereqs == [["BME 260L"]]
+    assert notes == ["senior standing"]
+
+    _, _, notes = parse_requirements(
+        "Prerequisite: prior experience with computational software (R preferred; Stata acceptable)."
+    )
+    assert notes == ["prior experience with computational software"]
+
+
+def test_cee_courses_belong_to_the_cee_major(catalog_graph: PrereqGraph) -> None:
+    assert catalog_graph.courses["CEE 365"].major == "CEE_ENV"
+    eligible = catalog_graph.eligible([], major="CEE_ENV")
+    assert eligible and all(code.startswith("CEE ") for code in eligible)
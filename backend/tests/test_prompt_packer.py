@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+import numpy as np
+
+from backend.rag.prompt_packer import PromptPacker, TokenCounter, select_diverse
+from backend.rag.schema import Document
+
+
+class CountingEmbeddings:
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.texts.extend(texts)
+        return [[0.0, 0.0, 1.0] for _ in texts]
+
+
+def _doc(i: int, embedding: Optional[List[float]]) -> Document:
+    return Document(
+        id=f"doc-{i}",
+        major="ECE",
+        type="handbook_requirement",
+        code=None,
+        title=None,
+        text=f"excerpt {i}",
+        metadata={},
+        embedding=embedding,
+    )
+
+
+def _pack(packer: PromptPacker, docs: List[Document]) -> List[str]:
+    packed = asyncio.run(packer.pack([], "", docs, [d.text for d in docs], [], []))
+    return [d.id for d in packed.docs]
+
+
+def test_select_diverse_drops_near_duplicates() -> None:
+    vectors = np.array([[1, 0, 0], [0.99, 0.1, 0], [0, 1, 0]], dtype=np.float32)
+    order, duplicates = select_diverse(vectors, duplicate_threshold=0.9)
+    assert order == [0, 2]
+    assert duplicates == [1]
+
+
+def test_stored_vectors_are_not_embedded_again() -> None:
+    embeddings = CountingEmbeddings()
+    packer = PromptPacker(TokenCounter(), embedding_backend=embeddings)  # type: ignore[arg-type]
+    docs = [_doc(0, [1.0, 0.0, 0.0]), _doc(1, [1.0, 0.01, 0.0]), _doc(2, [0.0, 1.0, 0.0])]
+
+    assert _pack(packer, docs) == ["doc-0", "doc-2"]
+    assert embeddings.texts == []
+
+
+def test_only_documents_without_vectors_are_embedded() -> None:
+    embeddings = CountingEmbeddings()
+    packer = PromptPacker(TokenCounter(), embedding_backend=embeddings)  # type: ignore[arg-type]
+    # A pinned catalog course or BM25-only hit has no stored vector.
+    docs = [_doc(0, None), _doc(1, [0.0, 0.0, 1.0]), _doc(2, [0.0, 1.0, 0.0])]
+
+    assert _pack(packer, docs) == ["doc-0", "doc-2"]
+    assert embeddings.texts == ["excerpt 0"]
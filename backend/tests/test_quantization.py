@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.rag.quantization import concat, quantize
+
+DIM = 384
+K = 10
+
+
+def _unit(rows: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((rows, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype, max_error, min_recall", [("float16", 1e-3, 0.99), ("int8", 5e-3, 0.95)])
+def test_quantized_ranking_matches_float32(dtype: str, max_error: float, min_recall: float) -> None:
+    corpus = _unit(2000, seed=0)
+    # Queries near corpus rows, as for a question close to one course.
+    queries = corpus[:50] + 0.5 * _unit(50, seed=1)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = queries @ corpus.T
+    scores = quantize(corpus, dtype).score(queries)
+    assert np.abs(scores - exact).max() < max_error
+
+    top_exact = np.argsort(-exact, axis=1)[:, :K]
+    top = np.argsort(-scores, axis=1)[:, :K]
+    recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(top_exact, top)])
+    assert recall >= min_recall
+    assert (top[:, 0] == top_exact[:, 0]).all()
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_blocked_scores_match_dequantized(dtype: str) -> None:
+    matrix = concat([quantize(_unit(7, seed=2), dtype), quantize(_unit(5, seed=3), dtype)])
+    queries = _unit(3, seed=4)
+    expected = queries @ matrix.dequantize().T
+    np.testing.assert_allclose(matrix.score(queries, block_rows=4), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_zero_row_survives_int8() -> None:
+    matrix = quantize(np.zeros((1, DIM), dtype=np.float32), "int8")
+    assert matrix.scales is not None and matrix.scales[0] == 1.0
+    assert not matrix.dequantize().any()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.models import ChatRequest, ChatResponse, IntentResult
+from backend.rag.retriever import QueryContext
+from backend.rag.schema import Document
+from backend.rag_pipeline import ChatContext, StageTimer, _finish_timings, shape_response
+
+
+def _doc(doc_id: str) -> Document:
+    return Document(
+        id=doc_id,
+        major="ECE",
+        type="course_description",
+        code=None,
+        title=None,
+        text=f"{doc_id} text",
+        metadata={"source_file": "handbook.pdf", "page": 3},
+    )
+
+
+DOCS = [_doc("a"), _doc("b"), _doc("a")]
+
+
+def _shape(verbosity: str) -> Dict[str, Any]:
+    response = ChatResponse(reply="ECE 280L covers signals.", retrieved_chunks=["a chunk", "b chunk", "a chunk"])
+    return shape_response(response, DOCS, verbosity).model_dump(exclude_none=True)  # type: ignore[arg-type]
+
+
+def test_standard_sends_sources_once_without_prompt_chunks() -> None:
+    shaped = _shape("standard")
+    assert shaped["retrieved_chunks"] == []
+    assert [s["id"] for s in shaped["sources"]] == ["a", "b"]
+    assert shaped["sources"][0] == {
+        "id": "a",
+        "text": "a text",
+        "source_file": "handbook.pdf",
+        "page": 3,
+        "type": "course_description",
+    }
+
+
+def test_minimal_drops_source_texts() -> None:
+    shaped = _shape("minimal")
+    assert shaped["retrieved_chunks"] == []
+    assert all("text" not in s for s in shaped["sources"])
+
+
+def test_debug_keeps_prompt_chunks() -> None:
+    assert _shape("debug")["retrieved_chunks"] == ["a chunk", "b chunk", "a chunk"]
+
+
+def _context() -> ChatContext:
+    return ChatContext(
+        intent=IntentResult(intent="prerequisites_sequencing", confidence=None, source="llm"),
+        query=QueryContext(text="ECE 280L", embedding=None),
+        docs=DOCS[:2],
+        fewshot_docs=[_doc("example-1"), _doc("example-2"), _doc("example-3")],
+        speculative_used=True,
+        timer=StageTimer(),
+        retrieval_timings_ms={"search": 1.234},
+    )
+
+
+@pytest.mark.parametrize(
+    "verbosity, fewshot, debug_timings",
+    [("minimal", 0, False), ("standard", 2, False), ("debug", 2, True)],
+)
+def test_metadata_by_verbosity(verbosity: str, fewshot: int, debug_timings: bool) -> None:
+    metadata = _context().response_metadata(verbosity)  # type: ignore[arg-type]
+    assert len(metadata.get("fewshot_chunks", [])) == fewshot
+    assert ("retrieval_timings_ms" in metadata) == debug_timings
+
+
+def test_timings_only_when_enabled_or_debug() -> None:
+    results: List[bool] = []
+    for verbosity, enabled in [("standard", False), ("standard", True), ("debug", False)]:
+        metadata: Dict[str, Any] = {}
+        request = ChatRequest(message="hi", verbosity=verbosity)  # type: ignore[arg-type]
+        _finish_timings(_context(), metadata, request, enabled)
+        results.append("timings_ms" in metadata)
+    assert results == [False, True, True]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.models import PrattProfile
+from backend.rag.retriever import QueryContext, RetrievalRequest, Retriever, reciprocal_rank_fusion
+from backend.rag.schema import Document
+
+DIM = 4
+
+
+def _doc(doc_id: str, text: str = "", code: str = "", major: str = "ECE") -> Document:
+    return Document(
+        id=doc_id,
+        major=major,  # type: ignore[arg-type]
+        type="course_description",
+        code=code or None,
+        title=None,
+        text=text or doc_id,
+        metadata={},
+    )
+
+
+def _ids(docs: List[Document]) -> List[str]:
+    return [d.id for d in docs]
+
+
+def test_rrf_rewards_agreement() -> None:
+    vector = [_doc("a"), _doc("b"), _doc("c")]
+    lexical = [_doc("c"), _doc("d")]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+    # c: 1/63 + 1/61 beats a's single 1/61; b and d tie at 1/62.
+    assert _ids(fused) == ["c", "a", "b", "d"]
+
+
+def test_rrf_ties_keep_first_seen_order_and_object() -> None:
+    vector = [_doc("a"), _doc("b")]
+    lexical = [_doc("b"), _doc("a")]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+    assert _ids(fused) == ["a", "b"]
+    # The first ranking's Document is kept (vector hits carry their stored vector).
+    assert fused[0] is vector[0]
+    assert fused[1] is vector[1]
+
+
+# The exact course code is only in `code-row`; the semantic match is `circuits`.
+CORPUS = [
+    (_doc("code-row", "Signals and systems ECE 280L", code="ECE 280L"), [1.0, 0.0, 0.0, 0.0]),
+    (_doc("circuits", "Introduction to circuits and electronics"), [0.0, 1.0, 0.0, 0.0]),
+    (_doc("algebra", "Linear algebra for engineers"), [0.0, 0.0, 1.0, 0.0]),
+]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> NumpyVectorStore:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents([d for d, _ in CORPUS], [v for _, v in CORPUS]))
+    return store
+
+
+def _retrieve(store: NumpyVectorStore, mode: str, embedding: List[float], k: int) -> List[str]:
+    retriever = Retriever(store=store, embedding_backend=None, mode=mode)  # type: ignore[arg-type]
+    query = QueryContext(text="ECE 280L", embedding=embedding, question="ECE 280L")
+    return _ids(asyncio.run(retriever.retrieve("ECE 280L", None, None, k=k, query=query)))
+
+
+def test_hybrid_adds_the_exact_code_match(store: NumpyVectorStore) -> None:
+    near_circuits = [0.1, 1.0, 0.2, 0.0]
+    assert _retrieve(store, "vector", near_circuits, k=1) == ["circuits"]
+    assert _retrieve(store, "bm25", near_circuits, k=1) == ["code-row"]
+    assert set(_retrieve(store, "hybrid", near_circuits, k=2)) == {"circuits", "code-row"}
+
+
+def test_hybrid_puts_agreement_first(store: NumpyVectorStore) -> None:
+    near_code_row = [1.0, 0.1, 0.3, 0.0]
+    hits = _retrieve(store, "hybrid", near_code_row, k=3)
+    assert hits[0] == "code-row"
+    assert set(hits) == {"code-row", "circuits", "algebra"}
+
+
+def test_major_filter_inside_and_falls_back(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    asyncio.run(store.upsert_documents([_doc("me-course", major="ME")], [[1.0, 0.0, 0.0, 0.0]]))
+    retriever = Retriever(store=store, embedding_backend=None, mode="vector")  # type: ignore[arg-type]
+    query = QueryContext(text="ME 344L", embedding=[1.0, 0.0, 0.0, 0.0], question="ME 344L")
+    request = RetrievalRequest(
+        question="ME 344L", pratt_profile=PrattProfile(major="ECE"), intent="prerequisites_sequencing", query=query
+    )
+
+    assert "$and" in Retriever.build_where(request.pratt_profile, request.intent)
+    timings: dict = {}
+    (found,) = asyncio.run(retriever.retrieve_many([request], timings=timings))
+    assert _ids(found) == ["me-course"]
+    assert "fallback" in timings
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from backend import session_store
+from backend.models import ChatMessage, ChatRequest
+from backend.rag_pipeline import load_session, record_turn
+from backend.session_store import SessionStore, SessionSummarizer, UnknownSessionError, new_message
+
+
+def _turns(count: int, start: int = 0) -> List[ChatMessage]:
+    return [new_message("user" if i % 2 == 0 else "assistant", f"message {i}") for i in range(start, start + count)]
+
+
+def _contents(store: SessionStore, conversation_id: str) -> List[str]:
+    session = store.get(conversation_id)
+    assert session is not None
+    return [m.content for m in session.messages]
+
+
+def test_sessions_survive_a_restart(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    c1 = store.create()
+    store.append(c1, _turns(2))
+    assert store.compact(c1, [store.get(c1).messages[0].id], "asked about ECE 280L")  # type: ignore[union-attr]
+    store.append(c1, _turns(1, start=2))
+    store.close()
+
+    reopened = SessionStore(tmp_path / "sessions.db")
+    session = reopened.get(c1)
+    assert session is not None
+    assert session.summary == "asked about ECE 280L"
+    assert session.summarized_count == 1
+    assert [m.content for m in session.messages] == ["message 1", "message 2"]
+    assert reopened.get("unknown") is None
+
+
+def test_evicted_sessions_reload_from_disk(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db", max_sessions=2)
+    ids = [store.create() for _ in range(3)]
+    for conversation_id in ids:
+        store.append(conversation_id, _turns(1))
+    assert store.stats()["sessions_in_memory"] == 2
+
+    assert _contents(store, ids[0]) == ["message 0"]
+    assert store.stats()["sessions_in_memory"] == 2
+
+
+def test_memory_only_store_forgets_evicted_sessions() -> None:
+    store = SessionStore(None, max_sessions=1)
+    a = store.create()
+    b = store.create()
+    store.append(b, _turns(1))
+    assert not store.persistent
+    assert store.get(a) is None
+    assert _contents(store, b) == ["message 0"]
+
+
+def test_idle_sessions_expire(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SessionStore(tmp_path / "sessions.db", ttl_seconds=60)
+    c1 = store.create()
+    store.append(c1, _turns(1))
+
+    now = time.time()
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 61)
+    assert store.get(c1) is None
+    assert SessionStore(tmp_path / "sessions.db", ttl_seconds=60).get(c1) is None
+
+
+def test_get_returns_a_copy_and_delete_forgets(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    c1 = store.create()
+    store.append(c1, _turns(1))
+    store.get(c1).messages.clear()  # type: ignore[union-attr]
+    assert _contents(store, c1) == ["message 0"]
+
+    store.delete(c1)
+    assert store.get(c1) is None
+    assert SessionStore(tmp_path / "sessions.db").get(c1) is None
+
+
+def test_ids_are_issued_not_chosen_by_the_client() -> None:
+    store = SessionStore(None)
+    issued = {store.create() for _ in range(100)}
+    assert len(issued) == 100
+    assert all(len(conversation_id) >= 32 for conversation_id in issued)
+
+    with pytest.raises(UnknownSessionError):
+        store.append("conv-1760659200000", _turns(1))
+    assert store.get("conv-1760659200000") is None
+
+
+def test_compact_refuses_stale_message_ids() -> None:
+    store = SessionStore(None)
+    c1 = store.create()
+    store.append(c1, _turns(3))
+    assert not store.compact(c1, ["not-the-first-message"], "summary")
+    assert not store.compact("gone", [], "summary")
+    assert store.get(c1).summary == ""  # type: ignore[union-attr]
+
+
+def _summarizer(store: SessionStore, calls: List[Tuple[str, List[str]]], fail: bool = False) -> SessionSummarizer:
+    async def summarize(summary: str, messages: List[ChatMessage]) -> str:
+        calls.append((summary, [m.content for m in messages]))
+        if fail:
+            raise RuntimeError("LLM unavailable")
+        return f"{summary} + {len(messages)} messages".strip(" +")
+
+    return SessionSummarizer(store, summarize, keep_messages=2, batch_messages=2)
+
+
+def test_summarizer_folds_all_but_the_newest_messages() -> None:
+    store = SessionStore(None)
+    calls: List[Tuple[str, List[str]]] = []
+    summarizer = _summarizer(store, calls)
+    c1 = store.create()
+
+    async def run() -> None:
+        store.append(c1, _turns(3))
+        summarizer.schedule(c1)  # 3 < keep + batch: nothing to do yet
+        store.append(c1, _turns(2, start=3))
+        summarizer.schedule(c1)
+        summarizer.schedule(c1)  # at most one task per conversation
+        await summarizer.drain()
+
+    asyncio.run(run())
+    assert calls == [("", ["message 0", "message 1", "message 2"])]
+    session = store.get(c1)
+    assert session is not None
+    assert session.summary == "3 messages"
+    assert session.summarized_count == 3
+    assert [m.content for m in session.messages] == ["message 3", "message 4"]
+    assert summarizer.stats() == {"running": 0, "runs": 1, "failures": 0}
+
+
+def test_failed_summary_keeps_the_messages() -> None:
+    store = SessionStore(None)
+    calls: List[Tuple[str, List[str]]] = []
+    summarizer = _summarizer(store, calls, fail=True)
+    c1 = store.create()
+
+    async def run() -> None:
+        store.append(c1, _turns(4))
+        summarizer.schedule(c1)
+        await summarizer.drain()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert len(_contents(store, c1)) == 4
+    assert store.get(c1).summary == ""  # type: ignore[union-attr]
+    assert summarizer.stats()["failures"] == 1
+
+
+def test_pipeline_rejects_unknown_ids_and_keeps_own_history() -> None:
+    store = SessionStore(None)
+    with pytest.raises(UnknownSessionError):
+        load_session(ChatRequest(message="hi", conversationId="guessed"), store)
+    with pytest.raises(UnknownSessionError):
+        load_session(ChatRequest(message="hi", conversationId="guessed"), None)
+
+    c1 = store.create()
+    record_turn(ChatRequest(message="hi", conversationId=c1), "hello", store, None)
+    request, _, info = load_session(ChatRequest(message="next", conversationId=c1), store)
+    assert [m.content for m in request.history] == ["hi", "hello"]
+    assert info == {"messages": 2, "summarized_messages": 0}
+
+    own = ChatRequest(message="next", history=_turns(1))
+    assert load_session(own, None) == (own, None, None)
+
+    store.delete(c1)
+    record_turn(ChatRequest(message="late", conversationId=c1), "reply", store, None)
+    assert store.get(c1) is None
+
+
+def test_session_endpoints(monkeypatch: pytest.MonkeyPatch) -> None:
+    from fastapi.testclient import TestClient
+
+    from backend import main
+
+    monkeypatch.setattr(main, "_session_store", SessionStore(None))
+    client = TestClient(main.app)
+    chat = {"message": "What does ECE 280L cover?"}
+
+    assert client.post("/api/chat", json={**chat, "conversationId": "conv-1760659200000"}).status_code == 404
+    assert client.post("/api/chat/stream", json={**chat, "conversationId": "conv-1"}).status_code == 404
+    assert client.delete("/api/sessions/conv-1").status_code == 404
+
+    created = client.post("/api/sessions")
+    assert created.status_code == 201
+    conversation_id = created.json()["conversationId"]
+    assert client.delete(f"/api/sessions/{conversation_id}").status_code == 204
+    assert client.delete(f"/api/sessions/{conversation_id}").status_code == 404
+
+    monkeypatch.setattr(main, "_session_store", None)
+    assert client.post("/api/sessions").status_code == 404
+    assert client.post("/api/chat", json={**chat, "conversationId": conversation_id}).status_code == 400
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.rag.executor import StageExecutor, get_stage_executor
+from backend.startup import Readiness
+
+CHAT = {"message": "What does ECE 280L cover?", "prattProfile": {"major": "ECE"}}
+
+
+def _wait_for(client: TestClient, status: str) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        body = client.get("/ready").json()
+        if body["status"] == status:
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"/ready never reported {status!r}")
+
+
+@pytest.fixture
+def warmups(monkeypatch: pytest.MonkeyPatch) -> List[Readiness]:
+    """Replace the model/index warmup: the first attempt fails, later ones succeed."""
+
+    attempts: List[Readiness] = []
+
+    async def fake_warm_up(readiness: Readiness, *args: Any, load_catalog: Any, **kwargs: Any) -> None:
+        attempts.append(readiness)
+        await readiness.step("course_catalog", get_stage_executor().run(load_catalog))
+        if len(attempts) == 1:
+            readiness.mark_failed(RuntimeError("index missing"))
+        else:
+            readiness.mark_ready()
+
+    monkeypatch.setattr(main, "warm_up", fake_warm_up)
+    monkeypatch.setattr(main.get_settings(), "startup_warmup", True)
+    monkeypatch.setattr(main.get_settings(), "startup_retry_seconds", 3600.0)
+    return attempts
+
+
+def test_import_loads_nothing() -> None:
+    assert not main._embedding_backend.loaded
+    assert not main._vector_store.loaded
+
+
+def test_failed_warmup_is_reported_and_retried(warmups: List[Readiness], monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(main.app) as client:
+        body = _wait_for(client, "failed")
+        assert body["error"] == "RuntimeError: index missing"
+        assert client.get("/ready").status_code == 503
+
+        for path, payload in [
+            ("/api/chat", CHAT),
+            ("/api/chat/stream", CHAT),
+            ("/api/retrieve/batch", {"queries": [{"message": "robotics"}]}),
+        ]:
+            response = client.post(path, json=payload)
+            assert response.status_code == 500
+            assert "index missing" in response.json()["detail"]
+        # Not retried before `startup_retry_seconds`.
+        assert len(warmups) == 1
+
+        monkeypatch.setattr(main.get_settings(), "startup_retry_seconds", 0.0)
+        _wait_for(client, "ready")
+        assert len(warmups) == 2
+        assert client.get("/ready").status_code == 200
+
+
+def test_app_restarts_in_the_same_process(warmups: List[Readiness]) -> None:
+    warmups.append(Readiness())  # Skip the failing first attempt.
+    for _ in range(2):
+        # The lifespan shuts the shared stage executor down on exit; the
+        # next startup still runs its warmup on it.
+        with TestClient(main.app) as client:
+            body = _wait_for(client, "ready")
+            assert "course_catalog" in body["steps_s"]
+
+
+def test_executor_runs_after_shutdown() -> None:
+    executor = StageExecutor(max_workers=1, max_pending=0)
+    assert asyncio.run(executor.run(sum, [1, 2])) == 3
+    executor.shutdown()
+    assert asyncio.run(executor.run(sum, [3, 4])) == 7
+    executor.shutdown()
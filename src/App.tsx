@@ -1,6 +1,17 @@
 import React, { useCallback, useMemo, useState } from 'react';
 import { ChatLayout } from './components/ChatLayout';
-import type { ChatMessage, Conversation, PrattProfile } from './types';
+import type { ChatMessage, Conversation, PrattProfile, SourceChunk } from './types';
+
+interface StreamEventData {
+  text?: string;
+  detail?: string;
+  retrieved_chunks?: string[];
+  sources?: SourceChunk[];
+  metadata?: {
+    fewshot_chunks?: string[];
+    [key: string]: unknown;
+  };
+}
 
 const createMessage = (role: ChatMessage['role'], content: string): ChatMessage => ({
   id: `${Date.now()}-${Math.random().toString(36).slice(2)}`,
@@ -9,6 +20,18 @@ const createMessage = (role: ChatMessage['role'], content: string): ChatMessage
   timestamp: new Date().toISOString(),
 });
 
+// Returns undefined when the backend keeps no sessions (404) or is unreachable.
+const openSession = async (): Promise<string | undefined> => {
+  try {
+    const response = await fetch('http://localhost:8000/api/sessions', { method: 'POST' });
+    if (!response.ok) return undefined;
+    const body = (await response.json()) as { conversationId?: string };
+    return body.conversationId;
+  } catch {
+    return undefined;
+  }
+};
+
 const App: React.FC = () => {
   const [conversations, setConversations] = useState<Conversation[]>([{
     id: `conv-${Date.now()}`,
@@ -39,6 +62,12 @@ const App: React.FC = () => {
     );
   };
 
+  const setConversationSession = (conversationId: string, sessionId: string | undefined) => {
+    setConversations((prev) =>
+      prev.map((conv) => (conv.id === conversationId ? { ...conv, sessionId } : conv)),
+    );
+  };
+
   const handleNewConversation = useCallback(() => {
     const id = `conv-${Date.now()}-${Math.random().toString(36).slice(2)}`;
     const newConversation: Conversation = {
@@ -69,61 +98,121 @@ const App: React.FC = () => {
       updateConversationMessages(activeConversation.id, (prev) => [...prev, userMessage]);
       setIsLoading(true);
 
+      // The assistant bubble is created on the first `sources` event and
+      // then filled in token by token as Server-Sent Events arrive. Errors
+      // are written into it too, so a failure never leaves a second bubble
+      // next to a partial answer.
+      const assistantMessage = createMessage('assistant', '');
+      let assistantContent = '';
+      let bubbleAdded = false;
+      const upsertAssistant = (patch: Partial<ChatMessage>) => {
+        Object.assign(assistantMessage, patch);
+        const snapshot = { ...assistantMessage };
+        updateConversationMessages(activeConversation.id, (prev) =>
+          bubbleAdded
+            ? prev.map((m) => (m.id === snapshot.id ? snapshot : m))
+            : [...prev, snapshot],
+        );
+        bubbleAdded = true;
+      };
+      // Keeps whatever was already streamed and appends the notice.
+      const showError = (notice: string) => {
+        upsertAssistant({
+          content: assistantContent.trim() ? `${assistantContent}\n\n${notice}` : notice,
+        });
+      };
+
       try {
-        const payload = {
-          message: content,
-          history: [...(activeConversation?.messages ?? []), userMessage],
-          prattProfile,
-        };
+        // A conversation that starts with a server-side session sends only
+        // the new message; the backend keeps its history. Otherwise (no
+        // session support, or the session expired) the history is sent.
+        let sessionId = activeConversation.sessionId;
+        if (!sessionId && activeConversation.messages.length === 0) {
+          sessionId = await openSession();
+          if (sessionId) setConversationSession(activeConversation.id, sessionId);
+        }
 
-        const response = await fetch('http://localhost:8000/api/chat', {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify(payload),
-        });
+        const post = (conversationId: string | undefined) =>
+          fetch('http://localhost:8000/api/chat/stream', {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              Accept: 'text/event-stream',
+            },
+            body: JSON.stringify(
+              conversationId
+                ? { message: content, conversationId, prattProfile }
+                : { message: content, history: activeConversation.messages, prattProfile },
+            ),
+          });
+
+        let response = await post(sessionId);
+        if (sessionId && (response.status === 404 || response.status === 400)) {
+          setConversationSession(activeConversation.id, undefined);
+          response = await post(undefined);
+        }
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
           throw new Error(`HTTP error ${response.status}`);
         }
 
-        const data = (await response.json()) as {
-          reply?: string;
-          retrieved_chunks?: string[];
-          sources?: {
-            text: string;
-            source_file?: string;
-            page?: number;
-            chunk_index?: number;
-            type?: string;
-          }[];
-          metadata?: {
-            fewshot_chunks?: string[];
-            [key: string]: unknown;
-          };
+        let streamFailed = false;
+        const handleEvent = (event: string, data: StreamEventData) => {
+          if (event === 'sources') {
+            upsertAssistant({
+              retrievedChunks: data.retrieved_chunks ?? [],
+              sources: data.sources ?? [],
+              fewshotChunks: data.metadata?.fewshot_chunks ?? [],
+            });
+            setIsLoading(false);
+          } else if (event === 'token') {
+            assistantContent += data.text ?? '';
+            upsertAssistant({ content: assistantContent });
+          } else if (event === 'error') {
+            streamFailed = true;
+            showError(`Sorry, the answer could not be completed: ${data.detail ?? 'Chat pipeline failed'}`);
+          }
         };
 
-        const assistantContent =
-          data.reply?.trim() ||
-          'This is where the Duke degree planning model will respond once the backend is connected.';
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let boundary = buffer.indexOf('\n\n');
+          while (boundary !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            const dataLines: string[] = [];
+            for (const line of block.split('\n')) {
+              if (line.startsWith('event:')) event = line.slice(6).trim();
+              else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            }
+            if (dataLines.length > 0) {
+              handleEvent(event, JSON.parse(dataLines.join('\n')) as StreamEventData);
+            }
+            boundary = buffer.indexOf('\n\n');
+          }
+        }
 
-        const assistantMessage = createMessage('assistant', assistantContent);
-        assistantMessage.retrievedChunks = data.retrieved_chunks ?? [];
-        assistantMessage.sources = data.sources ?? [];
-        assistantMessage.fewshotChunks = data.metadata?.fewshot_chunks ?? [];
-        updateConversationMessages(activeConversation.id, (prev) => {
-          return [...prev, assistantMessage];
-        });
+        if (!streamFailed && !assistantContent.trim()) {
+          upsertAssistant({
+            content:
+              'This is where the Duke degree planning model will respond once the backend is connected.',
+          });
+        }
       } catch (error) {
         // Frontend-only mock behavior for now
         // eslint-disable-next-line no-console
-        console.error('Error calling /api/chat (backend not implemented yet):', error);
-        const assistantMessage = createMessage(
-          'assistant',
-          'I was unable to reach the chat service. In the full version, I will use Pratt engineering degree handbooks to reason about requirements, prerequisites, study abroad, and overload policies.',
+        console.error('Error calling /api/chat/stream:', error);
+        showError(
+          bubbleAdded
+            ? 'The connection to the chat service was lost before the answer was complete.'
+            : 'I was unable to reach the chat service. In the full version, I will use Pratt engineering degree handbooks to reason about requirements, prerequisites, study abroad, and overload policies.',
         );
-        updateConversationMessages(activeConversation.id, (prev) => [...prev, assistantMessage]);
       } finally {
         setIsLoading(false);
       }
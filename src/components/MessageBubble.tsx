@@ -81,7 +81,7 @@ export const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
                       : undefined;
 
                     return (
-                      <div key={index} className="leading-snug">
+                      <div key={src.id ?? index} className="leading-snug">
                         <div className="font-semibold text-slate-800 flex items-center justify-between gap-2">
                           <span>[{index + 1}] {label}</span>
                           {href && (
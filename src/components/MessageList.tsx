@@ -10,11 +10,14 @@ interface MessageListProps {
 export const MessageList: React.FC<MessageListProps> = ({ messages, isLoading }) => {
   const containerRef = useRef<HTMLDivElement | null>(null);
 
+  // Also follow the last message's content so streamed replies stay in view.
+  const lastContent = messages[messages.length - 1]?.content;
+
   useEffect(() => {
     const el = containerRef.current;
     if (!el) return;
     el.scrollTop = el.scrollHeight;
-  }, [messages.length, isLoading]);
+  }, [messages.length, lastContent, isLoading]);
 
   return (
     <div
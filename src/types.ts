@@ -1,7 +1,8 @@
 export type ChatRole = 'user' | 'assistant' | 'system';
 
 export interface SourceChunk {
-  text: string;
+  id?: string;
+  text?: string;
   source_file?: string;
   page?: number;
   chunk_index?: number;
@@ -23,6 +24,9 @@ export interface Conversation {
   title: string;
   messages: ChatMessage[];
   createdAt: string; // ISO string
+  // Server-issued session ID (POST /api/sessions); unset when the server
+  // keeps no sessions, in which case the full history is sent instead.
+  sessionId?: string;
 }
 
 export interface PrattProfile {